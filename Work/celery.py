@@ -1,6 +1,7 @@
 import os
 
 from celery import Celery
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "Work.settings")
 
@@ -9,6 +10,16 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
 
 
+@worker_init.connect
+def _install_worker_lifecycle(**kwargs):
+    # Connected from worker_init so the hooks run after Celery's Django fixup has
+    # closed the connections inherited from the parent process.
+    from api import worker
+
+    worker_process_init.connect(worker.process_init, weak=False)
+    worker_process_shutdown.connect(worker.process_shutdown, weak=False)
+
+
 @app.task(bind=True)
 def healthcheck(self):
     return "ok"
@@ -27,6 +27,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "rest_framework",
+    "django_filters",
     "corsheaders",
     "rest_framework_simplejwt",
     "api",
@@ -41,6 +42,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "api.profiling.ProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "Work.urls"
@@ -64,6 +66,24 @@ TEMPLATES = [
 WSGI_APPLICATION = "Work.wsgi.application"
 
 DATABASES = {"default": env.db("DATABASE_URL", default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}")}
+# Keep connections across requests/tasks and validate them before reuse. This is for
+# WSGI and the Celery workers only: under ASGI the ORM runs in executor threads whose
+# connections request_finished never closes, so asgi.py defaults it to 0.
+DATABASES["default"]["CONN_MAX_AGE"] = env.int("DB_CONN_MAX_AGE", default=60)
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+STATS_CACHE_TTL = env.int("STATS_CACHE_TTL", default=5)
+# Cached client/campaign reads are invalidated on save; the TTL only bounds races.
+RESPONSE_CACHE_TTL = env.int("RESPONSE_CACHE_TTL", default=300)
+# Buffer for high-rate status writes (delivery receipts); empty means in-process.
+STATUS_BUFFER_URL = env("STATUS_BUFFER_URL", default="")
+RECEIPT_FLUSH_BATCH_SIZE = env.int("RECEIPT_FLUSH_BATCH_SIZE", default=2000)
+RECEIPT_FLUSH_INTERVAL = env.float("RECEIPT_FLUSH_INTERVAL", default=0.25)  # seconds
+# Write-behind for send outcomes: statuses are buffered and written in bulk.
+SEND_STATUS_WRITE_BEHIND = env.bool("SEND_STATUS_WRITE_BEHIND", default=False)
+SEND_STATUS_FLUSH_BATCH_SIZE = env.int("SEND_STATUS_FLUSH_BATCH_SIZE", default=1000)
+SEND_STATUS_FLUSH_INTERVAL = env.float("SEND_STATUS_FLUSH_INTERVAL", default=0.5)  # seconds
 
 LANGUAGE_CODE = "en-us"
 TIME_ZONE = env("DJANGO_TIME_ZONE", default="UTC")
@@ -77,7 +97,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        "api.renderers.ORJSONRenderer",
         "rest_framework.renderers.BrowsableAPIRenderer",
     ],
     "DEFAULT_PARSER_CLASSES": [
@@ -88,11 +108,14 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 50,
     "DEFAULT_PERMISSION_CLASSES": ["rest_framework.permissions.IsAuthenticated"],
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.CachedJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ),
 }
 
+# List pages report the planner's estimate instead of COUNT(*) from this many rows on.
+ESTIMATED_COUNT_THRESHOLD = env.int("ESTIMATED_COUNT_THRESHOLD", default=10000)
+
 CORS_ALLOWED_ORIGINS = env.list("CORS_ALLOWED_ORIGINS", default=[])
 CORS_ALLOW_ALL_ORIGINS = bool(DEBUG and not CORS_ALLOWED_ORIGINS)
 
@@ -105,13 +128,94 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TRACK_STARTED = True
+# Separate queues per workload class so long materializations never delay sends;
+# docker-compose runs a dedicated worker pool for each queue.
+CELERY_TASK_ROUTES = {
+    "api.tasks.send_message_async": {"queue": "send"},
+    "api.tasks.dispatch_due_messages": {"queue": "dispatch"},
+    "api.tasks.start_scheduled_runs": {"queue": "dispatch"},
+    "api.tasks.prune_throughput": {"queue": "dispatch"},
+    "api.tasks.start_campaign_async": {"queue": "campaigns"},
+    "api.tasks.purge_deleted_objects": {"queue": "campaigns"},
+}
+# Redis emulates priorities with one list per step; 0 is consumed first. Kombu's
+# default separator is kept, so the lists of already queued tasks keep their names.
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "priority_steps": list(range(10)),
+    "queue_order_strategy": "priority",
+}
+CELERY_TASK_DEFAULT_PRIORITY = 6
+CELERY_WORKER_PREFETCH_MULTIPLIER = env.int("CELERY_WORKER_PREFETCH_MULTIPLIER", default=4)
+# Fair dispatch: each round a run may queue DISPATCH_QUANTUM * campaign.weight messages,
+# one dispatch_due_messages call queues at most DISPATCH_BATCH_SIZE in total.
+DISPATCH_QUANTUM = env.int("DISPATCH_QUANTUM", default=100)
+DISPATCH_BATCH_SIZE = env.int("DISPATCH_BATCH_SIZE", default=5000)
+# Sharded dispatch (manage.py run_dispatcher): messages are split by id % DISPATCH_SHARDS
+# among live dispatchers, each holding its shards on a lease of DISPATCH_LEASE_TTL seconds.
+DISPATCH_SHARDS = env.int("DISPATCH_SHARDS", default=16)
+DISPATCH_LEASE_TTL = env.int("DISPATCH_LEASE_TTL", default=30)
+DISPATCH_POLL_INTERVAL = env.float("DISPATCH_POLL_INTERVAL", default=1.0)  # seconds
+# Failed sends go back to PENDING with a jittered exponential backoff
+# (min(MAX_DELAY, BASE_DELAY * 2**attempt) seconds, full jitter) until SEND_MAX_ATTEMPTS.
+SEND_MAX_ATTEMPTS = env.int("SEND_MAX_ATTEMPTS", default=5)
+SEND_RETRY_BASE_DELAY = env.float("SEND_RETRY_BASE_DELAY", default=30.0)
+SEND_RETRY_MAX_DELAY = env.float("SEND_RETRY_MAX_DELAY", default=3600.0)
+# Provider circuit breaker: CIRCUIT_BREAKER_THRESHOLD failures within
+# CIRCUIT_BREAKER_WINDOW seconds stop sends for CIRCUIT_BREAKER_COOLDOWN seconds.
+SMS_PROVIDER_NAME = env("SMS_PROVIDER_NAME", default="default")
+CIRCUIT_BREAKER_THRESHOLD = env.int("CIRCUIT_BREAKER_THRESHOLD", default=20)
+CIRCUIT_BREAKER_WINDOW = env.int("CIRCUIT_BREAKER_WINDOW", default=30)
+CIRCUIT_BREAKER_COOLDOWN = env.int("CIRCUIT_BREAKER_COOLDOWN", default=60)
+# Send tasks keep up to SEND_SNAPSHOT_CACHE_SIZE runs (with their campaign) per worker
+# process, reloaded when the campaign or run is saved or after SEND_SNAPSHOT_MAX_AGE seconds.
+# "Saved" is only seen across processes through a shared CACHE_URL; without one, edits
+# to a running campaign reach the workers after up to SEND_SNAPSHOT_MAX_AGE (0 disables
+# the snapshots). Pause and delete are exempt: each send reads them from the database.
+SEND_SNAPSHOT_CACHE_SIZE = env.int("SEND_SNAPSHOT_CACHE_SIZE", default=256)
+SEND_SNAPSHOT_MAX_AGE = env.float("SEND_SNAPSHOT_MAX_AGE", default=30.0)
+# Per-run, per-minute counters (api.metrics): flushed from memory every interval.
+THROUGHPUT_FLUSH_INTERVAL = env.float("THROUGHPUT_FLUSH_INTERVAL", default=10.0)  # seconds
+THROUGHPUT_FLUSH_BATCH_SIZE = env.int("THROUGHPUT_FLUSH_BATCH_SIZE", default=50000)
+THROUGHPUT_RETENTION_DAYS = env.int("THROUGHPUT_RETENTION_DAYS", default=30)
+SCHEDULED_START_BATCH_SIZE = env.int("SCHEDULED_START_BATCH_SIZE", default=100)
+SCHEDULED_START_CLAIM_TIMEOUT = env.int("SCHEDULED_START_CLAIM_TIMEOUT", default=600)
+MATERIALIZE_BATCH_SIZE = env.int("MATERIALIZE_BATCH_SIZE", default=5000)
+# "sql" materializes runs with one INSERT ... SELECT on PostgreSQL (api.materialize);
+# rate-limited campaigns and other databases keep the batched "python" engine.
+MATERIALIZE_ENGINE = env("MATERIALIZE_ENGINE", default="python")
+# Deleted clients and campaigns are purged DELETION_BATCH_SIZE messages per transaction;
+# one purge task runs for at most DELETION_TASK_TIME_LIMIT seconds, then re-queues itself.
+DELETION_BATCH_SIZE = env.int("DELETION_BATCH_SIZE", default=5000)
+DELETION_TASK_TIME_LIMIT = env.float("DELETION_TASK_TIME_LIMIT", default=10.0)
 CELERY_BEAT_SCHEDULE = {
     "dispatch_due_messages": {
         "task": "api.tasks.dispatch_due_messages",
         "schedule": crontab(),  # every minute
     },
+    "start_scheduled_runs": {
+        "task": "api.tasks.start_scheduled_runs",
+        "schedule": env.float("SCHEDULED_START_INTERVAL", default=10.0),  # seconds
+    },
+    "prune_throughput": {
+        "task": "api.tasks.prune_throughput",
+        "schedule": crontab(hour=3, minute=0),
+    },
+    "purge_deleted_objects": {
+        # Picks up deletions whose task was lost; each DELETE also queues one.
+        "task": "api.tasks.purge_deleted_objects",
+        "schedule": crontab(),  # every minute
+    },
 }
 
+# Opt-in profiling: "pattern=rate" pairs, e.g. PROFILE_TASKS=api.tasks.send_message_async=1000
+PROFILE_DIR = env("PROFILE_DIR", default=str(BASE_DIR / "profiles"))
+PROFILE_TASKS = {name: int(rate) for name, rate in env.dict("PROFILE_TASKS", default={}).items()}
+PROFILE_URLS = {path: int(rate) for path, rate in env.dict("PROFILE_URLS", default={}).items()}
+
+# Users resolved from JWTs are cached; bump the version to drop every cached user.
+AUTH_USER_CACHE_TTL = env.int("AUTH_USER_CACHE_TTL", default=60)
+AUTH_USER_CACHE_VERSION = env.int("AUTH_USER_CACHE_VERSION", default=1)
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
@@ -0,0 +1,26 @@
+"""Settings for Celery workers and beat, which never serve HTTP.
+
+Admin, DRF, simplejwt and CORS are left out of ``INSTALLED_APPS``, and the
+URLconf is empty. Without this, Celery's Django fixup runs the system checks at
+startup, which import every view, serializer and DRF module into each worker.
+``benchmarks/importtime.py`` measures the difference and enforces the budget in
+``benchmarks/import_budget.json``.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS
+
+HTTP_ONLY_APPS = {
+    "django.contrib.admin",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "django.contrib.staticfiles",
+    "rest_framework",
+    "django_filters",
+    "corsheaders",
+    "rest_framework_simplejwt",
+}
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in HTTP_ONLY_APPS]
+MIDDLEWARE = []
+ROOT_URLCONF = "Work.urls_worker"
@@ -0,0 +1,2 @@
+# Workers resolve no URLs; see Work/settings_worker.py.
+urlpatterns = []
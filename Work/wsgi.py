@@ -5,3 +5,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "Work.settings")
 
 application = get_wsgi_application()
+
+from api.services import start_receipt_flusher  # noqa: E402
+
+start_receipt_flusher()
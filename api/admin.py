@@ -1,9 +1,87 @@
 # api/admin.py
 
+import uuid
+
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+
+from .models import CampaignRun, Client, Message, Newsletter
+from .pagination import EstimatedCountPaginator
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelists that never count or list a whole multi-million-row table.
+
+    The filtered count comes from the planner estimate (see ``api.pagination``), the
+    unfiltered total is not shown, and foreign keys are edited as raw ids instead of
+    dropdowns of every row.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Client)
+class ClientAdmin(LargeTableAdmin):
+    list_display = ("id", "phone_number", "mobile_operator_code", "tag", "timezone")
+    search_fields = ("phone_number",)
+    search_help_text = "Phone number or its prefix."
+    ordering = ("-id",)
+
+    def get_search_results(self, request, queryset, search_term):
+        # A case-sensitive prefix match is what client_phone_idx can serve.
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return queryset.filter(phone_number__startswith=search_term), False
+
+
+@admin.register(Newsletter)
+class NewsletterAdmin(admin.ModelAdmin):
+    list_display = ("id", "status", "tag", "priority", "start_datetime", "end_datetime")
+    list_filter = ("status",)
+    raw_id_fields = ("active_run",)
+    ordering = ("-id",)
+
+
+@admin.register(CampaignRun)
+class CampaignRunAdmin(admin.ModelAdmin):
+    list_display = ("id", "campaign", "status", "force_resend", "start_at", "finished_at")
+    list_filter = ("status",)
+    list_select_related = ("campaign",)
+    raw_id_fields = ("campaign",)
+    ordering = ("-created_at",)
+
+
+class RunIdFilter(admin.SimpleListFilter):
+    """Filter messages by ``?run=<id>`` without listing every run as a choice.
+
+    Only the selected run is offered, so the sidebar shows the active filter and a way
+    to clear it; runs are picked from the run changelist or the message's run link.
+    """
+
+    title = "run"
+    parameter_name = "run"
+
+    def lookups(self, request, model_admin):
+        value = self.value()
+        return [(value, value)] if value else []
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if not value:
+            return queryset
+        try:
+            run_id = uuid.UUID(value)
+        except ValueError as exc:
+            raise IncorrectLookupParameters(exc) from exc
+        return queryset.filter(run_id=run_id)
 
-from .models import Client, Message, Newsletter
 
-admin.site.register(Client)
-admin.site.register(Newsletter)
-admin.site.register(Message)
+@admin.register(Message)
+class MessageAdmin(LargeTableAdmin):
+    list_display = ("id", "status", "run", "campaign", "client", "planned_send_at", "attempts")
+    list_filter = ("status", RunIdFilter)
+    list_select_related = ("run", "campaign", "client")
+    raw_id_fields = ("campaign", "client", "run")
+    ordering = ("-id",)
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class ApiConfig(AppConfig):
+    name = "api"
+
+    def ready(self):
+        from . import profiling, signals  # noqa: F401
+
+        profiling.connect_task_hooks()
@@ -0,0 +1,130 @@
+"""Async counterparts of the read-heavy and fan-out endpoints.
+
+Served from ``asgi.py`` these views do not pin a worker thread while waiting on
+the database or cache. Authentication and permissions reuse the DRF classes
+configured in ``REST_FRAMEWORK`` so both deployments accept the same credentials.
+"""
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.http import Http404, JsonResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .models import MessageStatus, Newsletter
+from .serializers import NewsletterSerializer
+from .utils import campaign_recipients
+from .views import _start_campaign
+
+
+def _stats_cache_key(pk) -> str:
+    return f"api:campaign-stats:{pk}"
+
+
+class AsyncAPIView(View):
+    """Minimal async API view: DRF authentication/permissions, JSON responses."""
+
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    permission_classes = api_settings.DEFAULT_PERMISSION_CLASSES
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        # CSRF is enforced by SessionAuthentication only, exactly as in DRF's APIView.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    def _check_access(self, request):
+        drf_request = Request(
+            request, authenticators=[auth() for auth in self.authentication_classes]
+        )
+        user = drf_request.user
+        for permission in (perm() for perm in self.permission_classes):
+            if not permission.has_permission(drf_request, self):
+                if drf_request.successful_authenticator is None:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied()
+        return user
+
+    def _error(self, request, exc: exceptions.APIException) -> JsonResponse:
+        detail = exc.detail if isinstance(exc.detail, (dict, list)) else {"detail": exc.detail}
+        response = JsonResponse(detail, status=exc.status_code, safe=False)
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            authenticators = [auth() for auth in self.authentication_classes]
+            header = authenticators[0].authenticate_header(request) if authenticators else None
+            if header:
+                response["WWW-Authenticate"] = header
+            else:
+                response.status_code = status.HTTP_403_FORBIDDEN
+        return response
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            request.user = await sync_to_async(self._check_access)(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self._error(request, exc)
+        except Http404:
+            return JsonResponse({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+
+class AsyncCampaignStatsView(AsyncAPIView):
+    async def get(self, request, pk=None):
+        key = _stats_cache_key(pk if pk is not None else "all")
+        stats = await cache.aget(key)
+        if stats is None:
+            stats = await (self._all_stats() if pk is None else self._campaign_stats(pk))
+            await cache.aset(key, stats, settings.STATS_CACHE_TTL)
+        return JsonResponse(stats, safe=False)
+
+    async def _all_stats(self):
+        queryset = Newsletter.objects.annotate(
+            total_messages=Count("messages"),
+            sent_messages=Count("messages", filter=Q(messages__status=MessageStatus.SENT)),
+            failed_messages=Count("messages", filter=Q(messages__status=MessageStatus.FAILED)),
+            recipients=Count("messages__client", distinct=True),
+        ).values("id", "total_messages", "sent_messages", "failed_messages", "recipients", "status")
+        return [row async for row in queryset]
+
+    async def _campaign_stats(self, pk):
+        campaign = await Newsletter.objects.filter(pk=pk).afirst()
+        if campaign is None:
+            raise Http404
+        counts = await campaign.messages.aaggregate(
+            total_messages=Count("id"),
+            sent_messages=Count("id", filter=Q(status=MessageStatus.SENT)),
+            failed_messages=Count("id", filter=Q(status=MessageStatus.FAILED)),
+        )
+        return {
+            "id": campaign.id,
+            **counts,
+            "eligible_clients": await campaign_recipients(campaign).acount(),
+            "status": campaign.status,
+        }
+
+
+class AsyncCampaignDetailView(AsyncAPIView):
+    async def get(self, request, pk):
+        campaign = await Newsletter.objects.filter(pk=pk).afirst()
+        if campaign is None:
+            raise Http404
+        return JsonResponse(NewsletterSerializer(campaign).data)
+
+
+class AsyncCampaignStartView(AsyncAPIView):
+    async def post(self, request, pk):
+        if request.content_type == "application/json" and request.body:
+            try:
+                payload = json.loads(request.body)
+            except ValueError:
+                raise exceptions.ParseError() from None
+        else:
+            payload = request.POST or request.GET
+        body, status_code = await sync_to_async(_start_campaign)(pk, payload)
+        return JsonResponse(body, status=status_code)
@@ -0,0 +1,143 @@
+"""Batched, resumable data backfills.
+
+A backfill walks its queryset in primary-key order, ``chunk_size`` rows at a time,
+and hands each chunk to ``process`` for a bulk update. The chunk and the
+``BackfillCheckpoint`` that records its last primary key commit in one
+transaction, so an interrupted run resumes after the last committed chunk instead
+of starting over. ``run_backfill`` throttles to a target rows per second so a
+backfill can run next to live traffic.
+
+Backfills register themselves by name and run through
+``manage.py run_backfill <name>``.
+"""
+
+import json
+import logging
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import caching
+from .models import BackfillCheckpoint, Newsletter
+
+logger = logging.getLogger(__name__)
+
+BACKFILLS: dict[str, "Backfill"] = {}
+
+
+def register(backfill_class):
+    backfill = backfill_class()
+    BACKFILLS[backfill.name] = backfill
+    return backfill_class
+
+
+class Backfill:
+    name: str
+    model = None
+    chunk_size = 1000
+
+    def queryset(self):
+        return self.model._default_manager.all()
+
+    def process(self, rows) -> int:
+        """Apply the change to one chunk of rows; return how many were updated."""
+        raise NotImplementedError
+
+
+def run_backfill(backfill, *, chunk_size=None, rate=None, restart=False, progress=None):
+    """Run ``backfill`` from its checkpoint to the end of the table.
+
+    ``rate`` caps throughput in rows per second; ``progress`` is called after every
+    chunk with the checkpoint, the estimated number of rows left and the ETA in
+    seconds at the rate achieved so far.
+    """
+    chunk_size = chunk_size or backfill.chunk_size
+    checkpoint, _ = BackfillCheckpoint.objects.get_or_create(name=backfill.name)
+    if restart:
+        checkpoint.last_pk = None
+        checkpoint.processed = checkpoint.updated = 0
+        checkpoint.finished_at = None
+        checkpoint.save()
+
+    pk_field = backfill.model._meta.pk
+    queryset = backfill.queryset().order_by("pk")
+    last_pk = pk_field.to_python(checkpoint.last_pk) if checkpoint.last_pk is not None else None
+    pending = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+    remaining = pending.count()
+
+    started = time.monotonic()
+    done = 0
+    while True:
+        pks = list(pending.values_list("pk", flat=True)[:chunk_size])
+        if not pks:
+            break
+
+        with transaction.atomic():
+            rows = list(queryset.filter(pk__in=pks).select_for_update())
+            updated = backfill.process(rows)
+            checkpoint.last_pk = str(pks[-1])
+            checkpoint.processed += len(pks)
+            checkpoint.updated += updated
+            checkpoint.save(update_fields=["last_pk", "processed", "updated", "updated_at"])
+
+        pending = queryset.filter(pk__gt=pks[-1])
+        done += len(pks)
+        remaining = max(remaining - len(pks), 0)
+
+        elapsed = time.monotonic() - started
+        if rate:
+            # Sleep off whatever the run is ahead of the target rate.
+            ahead = done / rate - elapsed
+            if ahead > 0:
+                time.sleep(ahead)
+                elapsed += ahead
+        if progress is not None:
+            progress(checkpoint, remaining, remaining * elapsed / done)
+
+    checkpoint.finished_at = timezone.now()
+    checkpoint.save(update_fields=["finished_at", "updated_at"])
+    return checkpoint
+
+
+def normalize_client_filter(value, pk=None):
+    """``client_filter`` as stored JSON: strings are parsed, anything unusable is ``{}``."""
+    parsed = value
+    if isinstance(value, str):
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            logger.warning(
+                "Failed to parse client_filter for newsletter %s, keeping empty dict", pk
+            )
+            parsed = {}
+
+    if parsed is None:
+        parsed = {}
+
+    if not isinstance(parsed, (dict, list)):
+        logger.warning("Unexpected client_filter type for newsletter %s: %s", pk, type(parsed))
+        parsed = {}
+    return parsed
+
+
+@register
+class NormalizeClientFilter(Backfill):
+    name = "normalize_client_filter"
+    model = Newsletter
+
+    def process(self, rows) -> int:
+        changed = []
+        for newsletter in rows:
+            normalized = normalize_client_filter(newsletter.client_filter, newsletter.pk)
+            if normalized != newsletter.client_filter:
+                newsletter.client_filter = normalized
+                changed.append(newsletter)
+        if changed:
+            now = timezone.now()
+            for newsletter in changed:
+                newsletter.updated_at = now
+            Newsletter.objects.bulk_update(changed, ["client_filter", "updated_at"])
+            pks = [newsletter.pk for newsletter in changed]
+            transaction.on_commit(lambda: caching.invalidate_many("campaign", pks))
+        return len(changed)
@@ -0,0 +1,233 @@
+"""Append-only buffers for high-rate status writes, drained in bulk.
+
+Producers ``push`` small JSON-able records and return immediately; a flusher
+``claim``s a batch, applies it with one bulk statement and ``ack``s it. With
+``STATUS_BUFFER_URL`` set the buffer is a Redis list shared by all processes and
+claimed batches are parked in an in-flight list until acknowledged, so a flusher
+that dies mid-batch loses nothing: ``requeue_stale`` puts the batch back and it
+is applied again. Apply functions must therefore be idempotent.
+
+Without ``STATUS_BUFFER_URL`` an in-process deque is used; it is the stand-in
+for tests and single-process setups and does not survive a crash.
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_CLAIM_SCRIPT = """
+local items = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #items > 0 then
+  redis.call('LTRIM', KEYS[1], #items, -1)
+  redis.call('RPUSH', KEYS[2], unpack(items))
+  redis.call('ZADD', KEYS[3], ARGV[3], ARGV[2])
+end
+return items
+"""
+
+_RELEASE_SCRIPT = """
+local items = redis.call('LRANGE', KEYS[2], 0, -1)
+for i = #items, 1, -1 do
+  redis.call('LPUSH', KEYS[1], items[i])
+end
+redis.call('DEL', KEYS[2])
+redis.call('ZREM', KEYS[3], ARGV[1])
+return #items
+"""
+
+
+class LocalBuffer:
+    """Thread-safe in-process buffer."""
+
+    def __init__(self):
+        self._items: deque = deque()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def push(self, items: List[dict]) -> None:
+        with self._lock:
+            self._items.extend(items)
+
+    def claim(self, limit: int) -> Tuple[Optional[str], List[dict]]:
+        with self._lock:
+            count = min(limit, len(self._items))
+            return None, [self._items.popleft() for _ in range(count)]
+
+    def ack(self, token: Optional[str]) -> None:
+        return None
+
+    def release(self, token: Optional[str], items: List[dict]) -> None:
+        with self._lock:
+            self._items.extendleft(reversed(items))
+
+    def requeue_stale(self, older_than: float) -> int:
+        return 0
+
+
+class RedisBuffer:
+    """Redis list with an in-flight list per claimed batch."""
+
+    def __init__(self, url: str, key: str):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.key = key
+        self.inflight_index = f"{key}:inflight"
+        self._claim = self.client.register_script(_CLAIM_SCRIPT)
+        self._release = self.client.register_script(_RELEASE_SCRIPT)
+
+    def _inflight_key(self, token: str) -> str:
+        return f"{self.key}:inflight:{token}"
+
+    def __len__(self) -> int:
+        return self.client.llen(self.key)
+
+    def push(self, items: List[dict]) -> None:
+        if items:
+            self.client.rpush(self.key, *(json.dumps(item) for item in items))
+
+    def claim(self, limit: int) -> Tuple[Optional[str], List[dict]]:
+        token = uuid.uuid4().hex
+        raw = self._claim(
+            keys=[self.key, self._inflight_key(token), self.inflight_index],
+            args=[limit, token, time.time()],
+        )
+        return token, [json.loads(item) for item in raw]
+
+    def ack(self, token: Optional[str]) -> None:
+        pipe = self.client.pipeline()
+        pipe.delete(self._inflight_key(token))
+        pipe.zrem(self.inflight_index, token)
+        pipe.execute()
+
+    def release(self, token: Optional[str], items: List[dict]) -> None:
+        self._release(keys=[self.key, self._inflight_key(token), self.inflight_index], args=[token])
+
+    def requeue_stale(self, older_than: float) -> int:
+        """Return batches claimed more than ``older_than`` seconds ago to the buffer."""
+        tokens = self.client.zrangebyscore(self.inflight_index, "-inf", time.time() - older_than)
+        requeued = 0
+        for token in tokens:
+            token = token.decode()
+            requeued += self._release(
+                keys=[self.key, self._inflight_key(token), self.inflight_index], args=[token]
+            )
+        return requeued
+
+
+_buffers: Dict[str, object] = {}
+_buffers_lock = threading.Lock()
+
+
+def get_buffer(name: str):
+    with _buffers_lock:
+        if name not in _buffers:
+            url = settings.STATUS_BUFFER_URL
+            _buffers[name] = RedisBuffer(url, f"task-delay:{name}") if url else LocalBuffer()
+        return _buffers[name]
+
+
+class BufferedWriter:
+    """Push records to a named buffer and flush them on a size or time trigger.
+
+    ``shared=False`` keeps the records in this process even when
+    ``STATUS_BUFFER_URL`` is set, for data that is aggregated before it is written.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        apply: Callable[[List[dict]], None],
+        batch_size: int,
+        interval: float,
+        shared: bool = True,
+    ):
+        self.name = name
+        self.apply = apply
+        self.batch_size = batch_size
+        self.interval = interval
+        self._last_flush = time.monotonic()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._local_buffer = None if shared else LocalBuffer()
+
+    @property
+    def buffer(self):
+        if self._local_buffer is not None:
+            return self._local_buffer
+        return get_buffer(self.name)
+
+    def add(self, items: List[dict]) -> None:
+        buffer = self.buffer
+        buffer.push(items)
+        # A shared buffer is drained by ``manage.py flush_status_buffers``; a local one
+        # can only be drained by the process that filled it, by its flush thread if it
+        # runs one and otherwise by the caller.
+        if isinstance(buffer, LocalBuffer) and not self.flushing_in_background:
+            self.maybe_flush()
+
+    def maybe_flush(self) -> int:
+        if (
+            len(self.buffer) >= self.batch_size
+            or time.monotonic() - self._last_flush >= self.interval
+        ):
+            return self.flush()
+        return 0
+
+    def flush(self) -> int:
+        """Drain the buffer in batches; a failed batch goes back to the buffer."""
+        self._last_flush = time.monotonic()
+        flushed = 0
+        while True:
+            token, items = self.buffer.claim(self.batch_size)
+            if not items:
+                return flushed
+            try:
+                self.apply(items)
+            except Exception:
+                self.buffer.release(token, items)
+                raise
+            self.buffer.ack(token)
+            flushed += len(items)
+            if len(items) < self.batch_size:
+                return flushed
+
+    def _flush_periodically(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Flushing %s failed, will retry: %s", self.name, exc)
+            finally:
+                # The thread owns its own DB connection; do not hold it between ticks.
+                connections.close_all()
+
+    @property
+    def flushing_in_background(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start_background_flush(self) -> None:
+        """Flush on the time trigger even when no new records arrive (idle tail)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._flush_periodically, name=f"flush-{self.name}", daemon=True
+            )
+            self._thread.start()
+
+    def stop_background_flush(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+            self._thread = None
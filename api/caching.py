@@ -0,0 +1,152 @@
+"""Cached, conditional reads for frequently polled resources.
+
+Detail responses are cached per object together with an ETag and Last-Modified
+derived from ``updated_at``; list responses are cached per query under a
+per-model generation counter. ``api.signals`` drops the object entry and bumps the
+generation on every save and delete, so a poll of an unchanged resource costs one
+cache lookup and usually ends in ``304 Not Modified``.
+
+The key and invalidation helpers are imported by ``api.signals`` in every
+process, workers included, so only the view mixins may touch DRF.
+
+Workers keep campaign and run snapshots in process memory (``api.snapshots``);
+a per-campaign generation here tells them when to reload.
+
+Invalidation is only visible to other processes with a shared cache
+(``CACHE_URL``), as configured in docker-compose.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def object_cache_key(prefix: str, pk) -> str:
+    return f"api:{prefix}:{pk}"
+
+
+def _generation_key(prefix: str) -> str:
+    return f"api:{prefix}:list-generation"
+
+
+def _generation(key: str) -> int:
+    generation = cache.get(key)
+    if generation is None:
+        # Seed from the clock so an evicted counter never reuses an old generation.
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def _bump_generation(key: str) -> None:
+    try:
+        cache.incr(key)
+    except ValueError:
+        _generation(key)
+
+
+def list_generation(prefix: str) -> int:
+    return _generation(_generation_key(prefix))
+
+
+def bump_list_generation(prefix: str) -> None:
+    _bump_generation(_generation_key(prefix))
+
+
+def _snapshot_generation_key(campaign_id) -> str:
+    return f"api:campaign:{campaign_id}:snapshot-generation"
+
+
+def snapshot_generation(campaign_id) -> int:
+    """Version of a campaign and its runs as cached by ``api.snapshots``."""
+    return _generation(_snapshot_generation_key(campaign_id))
+
+
+def bump_snapshot_generation(campaign_id) -> None:
+    _bump_generation(_snapshot_generation_key(campaign_id))
+
+
+def invalidate(prefix: str, pk) -> None:
+    cache.delete(object_cache_key(prefix, pk))
+    bump_list_generation(prefix)
+
+
+def invalidate_many(prefix: str, pks) -> None:
+    """``invalidate`` for rows changed in bulk, which bypasses ``api.signals``."""
+    cache.delete_many([object_cache_key(prefix, pk) for pk in pks])
+    bump_list_generation(prefix)
+
+
+def user_cache_key(user_id) -> str:
+    return f"auth:user:{user_id}"
+
+
+def invalidate_cached_user(user_id) -> None:
+    cache.delete(user_cache_key(user_id), version=settings.AUTH_USER_CACHE_VERSION)
+
+
+def _conditional(request, entry):
+    # Imported here so workers can invalidate through this module without loading DRF.
+    from rest_framework.response import Response
+
+    last_modified = entry.get("last_modified")
+    not_modified = get_conditional_response(
+        request, etag=entry["etag"], last_modified=last_modified
+    )
+    if not_modified is not None:
+        response = Response(status=not_modified.status_code)
+    else:
+        response = Response(entry["data"])
+    response["ETag"] = entry["etag"]
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+class CachedRetrieveMixin:
+    """``retrieve`` from the object cache with ETag/Last-Modified support."""
+
+    cache_prefix: str
+
+    def retrieve(self, request, *args, **kwargs):
+        key = object_cache_key(
+            self.cache_prefix, kwargs[self.lookup_url_kwarg or self.lookup_field]
+        )
+        entry = cache.get(key)
+        if entry is None:
+            instance = self.get_object()
+            updated = instance.updated_at
+            entry = {
+                "data": self.get_serializer(instance).data,
+                "etag": quote_etag(f"{self.cache_prefix}-{instance.pk}-{updated.timestamp()}"),
+                "last_modified": int(updated.timestamp()),
+            }
+            cache.set(key, entry, settings.RESPONSE_CACHE_TTL)
+        return _conditional(request, entry)
+
+
+class CachedListMixin:
+    """``list`` from a per-query cache keyed by the model's list generation."""
+
+    cache_prefix: str
+
+    def list(self, request, *args, **kwargs):
+        generation = list_generation(self.cache_prefix)
+        digest = hashlib.md5(
+            f"{request.get_host()}{request.get_full_path()}".encode(), usedforsecurity=False
+        ).hexdigest()
+        etag = quote_etag(f"{self.cache_prefix}-list-{generation}-{digest}")
+        if get_conditional_response(request, etag=etag) is not None:
+            # The client already has this generation; skip even the cache lookup.
+            return _conditional(request, {"etag": etag, "data": None})
+
+        key = f"api:{self.cache_prefix}:list:{generation}:{digest}"
+        entry = cache.get(key)
+        if entry is None:
+            entry = {"data": super().list(request, *args, **kwargs).data, "etag": etag}
+            cache.set(key, entry, settings.RESPONSE_CACHE_TTL)
+        return _conditional(request, entry)
@@ -0,0 +1,81 @@
+"""Shard ownership for concurrent dispatchers.
+
+Messages are split into ``DISPATCH_SHARDS`` shards by ``id % DISPATCH_SHARDS``.
+Every ``manage.py run_dispatcher`` process registers a ``Dispatcher`` row and
+renews it with each heartbeat. The live dispatchers, sorted by name, split the
+shards round-robin, and each process holds a ``DispatchShardLease`` on its share.
+When a process joins, the others release the shards that now belong to it on their
+next heartbeat. When a process dies, its leases expire after ``DISPATCH_LEASE_TTL``
+and the survivors take them over, so the shards rebalance without coordination
+beyond these rows.
+
+A lease only partitions the work. The PENDING -> QUEUED claim in
+``api.tasks._claim_due_messages`` still decides who sends a message, so two
+processes that briefly both believe they own a shard never queue it twice.
+"""
+
+import os
+import socket
+from datetime import timedelta
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Dispatcher, DispatchShardLease
+
+
+def live_dispatchers():
+    cutoff = timezone.now() - timedelta(seconds=settings.DISPATCH_LEASE_TTL)
+    return Dispatcher.objects.filter(heartbeat_at__gte=cutoff)
+
+
+class ShardCoordinator:
+    def __init__(self, name: Optional[str] = None):
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.owned: List[int] = []
+        self._renew_at = None
+
+    def shards(self) -> List[int]:
+        """The shards this process owns, renewing the lease a third of the TTL early."""
+        if self._renew_at is None or timezone.now() >= self._renew_at:
+            self.heartbeat()
+        return self.owned
+
+    def heartbeat(self) -> List[int]:
+        now = timezone.now()
+        ttl = timedelta(seconds=settings.DISPATCH_LEASE_TTL)
+        shard_count = settings.DISPATCH_SHARDS
+
+        Dispatcher.objects.update_or_create(name=self.name, defaults={"heartbeat_at": now})
+        Dispatcher.objects.filter(heartbeat_at__lt=now - ttl).delete()
+        live = list(live_dispatchers().order_by("name").values_list("name", flat=True))
+        index = live.index(self.name)
+        target = [shard for shard in range(shard_count) if shard % len(live) == index]
+
+        with transaction.atomic():
+            DispatchShardLease.objects.bulk_create(
+                [DispatchShardLease(shard=shard) for shard in range(shard_count)],
+                ignore_conflicts=True,
+            )
+            # Hand over shards that now belong to another dispatcher, or no longer exist.
+            DispatchShardLease.objects.filter(owner=self.name).exclude(shard__in=target).update(
+                owner="", expires_at=None
+            )
+            DispatchShardLease.objects.filter(shard__in=target).filter(
+                Q(owner=self.name) | Q(owner="") | Q(expires_at__lt=now)
+            ).update(owner=self.name, expires_at=now + ttl)
+            self.owned = sorted(
+                DispatchShardLease.objects.filter(owner=self.name).values_list("shard", flat=True)
+            )
+
+        self._renew_at = now + ttl / 3
+        return self.owned
+
+    def release(self) -> None:
+        DispatchShardLease.objects.filter(owner=self.name).update(owner="", expires_at=None)
+        Dispatcher.objects.filter(name=self.name).delete()
+        self.owned = []
+        self._renew_at = None
@@ -0,0 +1,17 @@
+import django_filters
+
+from .models import Client
+
+
+class ClientFilter(django_filters.FilterSet):
+    """Client list filters; each one is served by an index on ``Client``."""
+
+    phone = django_filters.CharFilter(field_name="phone_number")
+    phone_prefix = django_filters.CharFilter(field_name="phone_number", lookup_expr="startswith")
+    tag = django_filters.CharFilter()
+    operator = django_filters.CharFilter(field_name="mobile_operator_code")
+    timezone = django_filters.CharFilter()
+
+    class Meta:
+        model = Client
+        fields = ["phone", "phone_prefix", "tag", "operator", "timezone"]
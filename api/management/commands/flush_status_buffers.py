@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.services import receipt_writer
+from api.tasks import status_writer
+
+BUFFERED_WRITERS = [receipt_writer, status_writer]
+
+
+class Command(BaseCommand):
+    help = "Drain buffered status writes (receipts, send outcomes) into the database in bulk."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float, default=None, help="Seconds between idle polls."
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=float,
+            default=60.0,
+            help="Requeue batches claimed this many seconds ago and never acknowledged.",
+        )
+        parser.add_argument("--once", action="store_true", help="Drain once and exit.")
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+        if interval is None:
+            interval = min(writer.interval for writer in BUFFERED_WRITERS)
+
+        while True:
+            flushed = 0
+            for writer in BUFFERED_WRITERS:
+                requeued = writer.buffer.requeue_stale(options["stale_after"])
+                if requeued:
+                    self.stderr.write(f"{writer.name}: requeued {requeued} stale records")
+                started = time.monotonic()
+                count = writer.flush()
+                if count:
+                    elapsed = (time.monotonic() - started) * 1000
+                    self.stdout.write(f"{writer.name}: flushed {count} in {elapsed:.1f} ms")
+                flushed += count
+            if options["once"]:
+                return
+            if not flushed:
+                time.sleep(interval)
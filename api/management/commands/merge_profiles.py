@@ -0,0 +1,48 @@
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Merge collapsed-stack profiles into one flamegraph-ready file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", default=None, help="Profile directory (PROFILE_DIR).")
+        parser.add_argument(
+            "--match", default="*", help="Glob for profile files, e.g. 'api.tasks.send*'."
+        )
+        parser.add_argument("--output", default=None, help="Write merged stacks to this file.")
+        parser.add_argument("--top", type=int, default=15, help="Frames to list in the summary.")
+
+    def handle(self, *args, **options):
+        directory = Path(options["dir"] or settings.PROFILE_DIR)
+        pattern = options["match"]
+        if not pattern.endswith(".collapsed"):
+            pattern = f"{pattern}.collapsed"
+        files = sorted(directory.glob(pattern))
+        if not files:
+            raise CommandError(f"No profiles matching {pattern} in {directory}")
+
+        stacks: Counter = Counter()
+        for path in files:
+            for line in path.read_text().splitlines():
+                stack, _, weight = line.rpartition(" ")
+                if stack and weight.isdigit():
+                    stacks[stack] += int(weight)
+
+        merged = "".join(f"{stack} {weight}\n" for stack, weight in sorted(stacks.items()))
+        if options["output"]:
+            Path(options["output"]).write_text(merged)
+        else:
+            self.stdout.write(merged, ending="")
+
+        self_time: Counter = Counter()
+        for stack, weight in stacks.items():
+            self_time[stack.rsplit(";", 1)[-1]] += weight
+        total = sum(self_time.values()) or 1
+
+        self.stderr.write(f"Merged {len(files)} profiles, {total} us sampled.")
+        for frame, weight in self_time.most_common(options["top"]):
+            self.stderr.write(f"{weight * 100 / total:6.2f}%  {weight:>10} us  {frame}")
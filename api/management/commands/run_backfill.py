@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.backfill import BACKFILLS, run_backfill
+from api.models import BackfillCheckpoint
+
+
+class Command(BaseCommand):
+    help = "Run a registered data backfill in primary-key chunks, resuming from its checkpoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", nargs="?", help="Backfill to run.")
+        parser.add_argument(
+            "--chunk-size", type=int, default=None, help="Rows per chunk and transaction."
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=None,
+            help="Target rows per second (unthrottled if unset).",
+        )
+        parser.add_argument(
+            "--restart", action="store_true", help="Ignore the checkpoint and start from the top."
+        )
+        parser.add_argument(
+            "--list", action="store_true", help="List backfills and their checkpoints."
+        )
+
+    def handle(self, *args, **options):
+        if options["list"]:
+            checkpoints = {c.name: c for c in BackfillCheckpoint.objects.all()}
+            for name in sorted(BACKFILLS):
+                checkpoint = checkpoints.get(name)
+                if checkpoint is None:
+                    state = "not started"
+                elif checkpoint.finished_at:
+                    state = f"finished {checkpoint.finished_at:%Y-%m-%d %H:%M}"
+                else:
+                    state = f"at pk {checkpoint.last_pk}"
+                self.stdout.write(f"{name}: {state}")
+            return
+
+        name = options["name"]
+        if name not in BACKFILLS:
+            raise CommandError(f"Unknown backfill {name!r}; choose from {', '.join(BACKFILLS)}")
+
+        def report(checkpoint, remaining, eta):
+            self.stdout.write(
+                f"{name}: {checkpoint.processed} processed, {checkpoint.updated} updated, "
+                f"~{remaining} left, ETA {timedelta(seconds=round(eta))}"
+            )
+
+        checkpoint = run_backfill(
+            BACKFILLS[name],
+            chunk_size=options["chunk_size"],
+            rate=options["rate"],
+            restart=options["restart"],
+            progress=report,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{name}: done, {checkpoint.processed} processed, {checkpoint.updated} updated"
+            )
+        )
@@ -0,0 +1,50 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.dispatch import ShardCoordinator
+from api.services import provider_breaker
+from api.tasks import dispatch_round
+
+
+class Command(BaseCommand):
+    help = "Dispatch due messages of the shards this process leases; run several to scale out."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--name", default=None, help="Dispatcher name (host:pid).")
+        parser.add_argument(
+            "--interval", type=float, default=None, help="Seconds between idle polls."
+        )
+        parser.add_argument("--once", action="store_true", help="Dispatch one round and exit.")
+
+    def handle(self, *args, **options):
+        interval = options["interval"] or settings.DISPATCH_POLL_INTERVAL
+        coordinator = ShardCoordinator(options["name"])
+        stopping = False
+
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        owned = None
+        try:
+            while not stopping:
+                shards = coordinator.shards()
+                if shards != owned:
+                    owned = list(shards)
+                    self.stdout.write(f"{coordinator.name}: shards {owned}")
+                more = False
+                if shards and not provider_breaker.is_open():
+                    queued, more = dispatch_round(shards)
+                    if queued:
+                        self.stdout.write(f"{coordinator.name}: queued {queued}")
+                if options["once"]:
+                    return
+                if not more:
+                    time.sleep(interval)
+        finally:
+            coordinator.release()
@@ -0,0 +1,154 @@
+"""Materialize a run inside PostgreSQL with a single ``INSERT ... SELECT``.
+
+The Python engine (``api.tasks._materialize_messages``) reads every recipient id
+into the worker and writes it back in batches. This engine never moves the
+audience out of the database. The recipient query, including the
+``undelivered_recipients`` anti-join, becomes a CTE. ``planned_send_at`` is
+computed per timezone with ``AT TIME ZONE`` and the same day-by-day window walk
+as ``api.utils.next_send_at``. Unknown zones fall back to ``TIME_ZONE``, as
+``_as_zoneinfo`` does. ``ON CONFLICT DO NOTHING`` keeps a repeated start a no-op.
+
+Rate-limited campaigns (``max_rate``) still go through the Python engine: the
+shaper shares per-second budgets across zones, which does not map to one
+statement.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import CampaignRun, Message, MessageStatus, Newsletter
+
+_SLOTS_SQL = """
+params AS (
+    SELECT %s::timestamptz AS start_at, %s::timestamptz AS end_at, %s::timestamptz AS now_at,
+           %s::time AS window_start, %s::time AS window_end, %s::interval AS overnight,
+           %s::text AS default_tz
+),
+zones AS (
+    SELECT z.name, COALESCE(known.name, params.default_tz) AS tz
+    FROM ({zone_names}) AS z(name)
+    CROSS JOIN params
+    LEFT JOIN pg_timezone_names AS known ON known.name = z.name
+),
+slots AS (
+    SELECT zones.name,
+           CASE
+               WHEN first_slot.local IS NULL THEN NULL
+               -- Sending right away: keep the exact instant, as next_send_at does.
+               WHEN first_slot.local = bounds.start_from THEN bounds.start_instant
+               -- PostgreSQL reads an ambiguous wall time as the later instant, ZoneInfo
+               -- (fold=0) as the earlier one; prefer the earlier when it exists.
+               WHEN earlier.instant < later.instant
+                    AND earlier.instant AT TIME ZONE zones.tz = first_slot.local
+                   THEN earlier.instant
+               ELSE later.instant
+           END AS planned_send_at
+    FROM zones
+    CROSS JOIN params
+    CROSS JOIN LATERAL (
+        SELECT GREATEST(params.start_at AT TIME ZONE zones.tz,
+                        params.now_at AT TIME ZONE zones.tz) AS start_from,
+               CASE WHEN params.start_at AT TIME ZONE zones.tz
+                         >= params.now_at AT TIME ZONE zones.tz
+                    THEN params.start_at ELSE params.now_at END AS start_instant,
+               params.end_at AT TIME ZONE zones.tz AS end_local
+    ) AS bounds
+    CROSS JOIN LATERAL (
+        SELECT min(day_window.candidate) AS local
+        FROM generate_series(
+            bounds.start_from::date::timestamp,
+            bounds.end_local::date::timestamp + interval '1 day',
+            interval '1 day'
+        ) AS days(day)
+        CROSS JOIN LATERAL (
+            SELECT GREATEST(bounds.start_from, days.day::date + params.window_start) AS candidate,
+                   days.day::date + params.window_end + params.overnight AS closes_at
+        ) AS day_window
+        WHERE day_window.candidate <= day_window.closes_at
+          AND day_window.candidate <= bounds.end_local
+    ) AS first_slot
+    CROSS JOIN LATERAL (SELECT first_slot.local AT TIME ZONE zones.tz AS instant) AS later
+    CROSS JOIN LATERAL (
+        -- The same wall time at the UTC offset in effect three hours earlier.
+        SELECT (first_slot.local - ((later.instant - interval '3 hours') AT TIME ZONE zones.tz
+                                   - (later.instant - interval '3 hours') AT TIME ZONE 'UTC'))
+               AT TIME ZONE 'UTC' AS instant
+    ) AS earlier
+)"""
+
+
+def supports_sql_materialization(campaign: Newsletter) -> bool:
+    return connection.vendor == "postgresql" and not campaign.max_rate
+
+
+def _slot_params(campaign: Newsletter, now: datetime) -> list:
+    overnight = campaign.time_interval_end < campaign.time_interval_start
+    return [
+        campaign.start_datetime,
+        campaign.end_datetime,
+        now,
+        campaign.time_interval_start,
+        campaign.time_interval_end,
+        "1 day" if overnight else "0 days",
+        settings.TIME_ZONE,
+    ]
+
+
+def zone_send_times(
+    campaign: Newsletter, tz_names: Iterable[str], now: Optional[datetime] = None
+) -> Dict[str, Optional[datetime]]:
+    """The SQL engine's first send instant per zone; ``next_send_at`` for each name."""
+    tz_names = list(tz_names)
+    if not tz_names:
+        return {}
+    zone_names = f"VALUES {', '.join(['(%s)'] * len(tz_names))}"
+    sql = f"WITH {_SLOTS_SQL.format(zone_names=zone_names)} SELECT name, planned_send_at FROM slots"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, _slot_params(campaign, now or timezone.now()) + tz_names)
+        return dict(cursor.fetchall())
+
+
+def insert_messages(campaign: Newsletter, run: CampaignRun, recipients) -> int:
+    """Insert one message per recipient that fits the window; return how many were new."""
+    recipient_sql, recipient_params = (
+        recipients.order_by()
+        .values("id", "timezone")
+        .query.get_compiler(connection=connection)
+        .as_sql()
+    )
+    now = timezone.now()
+    values = {
+        "created_at": ("%s", [now]),
+        "planned_send_at": ("slots.planned_send_at", []),
+        "status": ("%s", [MessageStatus.PENDING]),
+        "campaign": ("%s", [campaign.pk]),
+        "client": ("recipients.id", []),
+        "run": ("%s", [run.pk]),
+        "message_text": ("%s", [campaign.text_message]),
+        "attempts": ("%s", [0]),
+        "last_error": ("%s", [""]),
+    }
+    columns = ", ".join(
+        connection.ops.quote_name(Message._meta.get_field(name).column) for name in values
+    )
+    select = ", ".join(expression for expression, _ in values.values())
+    select_params = [param for _, params in values.values() for param in params]
+
+    sql = (
+        f"WITH recipients AS ({recipient_sql}), "
+        f"{_SLOTS_SQL.format(zone_names='SELECT DISTINCT timezone FROM recipients')} "
+        f"INSERT INTO {connection.ops.quote_name(Message._meta.db_table)} ({columns}) "
+        f"SELECT {select} FROM recipients "
+        "JOIN slots ON slots.name = recipients.timezone "
+        "WHERE slots.planned_send_at IS NOT NULL "
+        "ORDER BY slots.planned_send_at, recipients.id "
+        "ON CONFLICT DO NOTHING"
+    )
+    params = [*recipient_params, *_slot_params(campaign, now), *select_params]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
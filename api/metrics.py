@@ -0,0 +1,83 @@
+"""Per-run, per-minute throughput counters.
+
+The send path only appends to an in-process buffer; every
+``THROUGHPUT_FLUSH_INTERVAL`` seconds the records are summed per run and minute
+and added to ``RunThroughput`` with one upsert. The table therefore grows by one
+row per run per minute, however many messages the run has, and a dashboard
+reads a few hundred rows from the ``(run, bucket)`` unique index.
+"""
+
+import time
+from collections import defaultdict
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection
+
+from .buffers import BufferedWriter
+from .models import CampaignRun, RunThroughput
+
+FIELDS = ("queued", "sent", "failed")
+
+
+def _apply_counts(records: List[dict]) -> None:
+    totals: Dict[Tuple[str, int], List[int]] = defaultdict(lambda: [0] * len(FIELDS))
+    for record in records:
+        totals[(record["run"], record["bucket"])][FIELDS.index(record["field"])] += record["n"]
+
+    # Counters of runs deleted since they were recorded are dropped.
+    run_field = RunThroughput._meta.get_field("run")
+    existing = {
+        str(pk)
+        for pk in CampaignRun.objects.filter(pk__in={run for run, _ in totals}).values_list(
+            "pk", flat=True
+        )
+    }
+    rows = [
+        (
+            run_field.get_db_prep_value(run, connection),
+            connection.ops.adapt_datetimefield_value(
+                datetime.fromtimestamp(bucket, tz=dt_timezone.utc)
+            ),
+            *counts,
+        )
+        for (run, bucket), counts in totals.items()
+        if run in existing
+    ]
+    if not rows:
+        return
+
+    table = connection.ops.quote_name(RunThroughput._meta.db_table)
+    increments = ", ".join(f"{field} = {table}.{field} + excluded.{field}" for field in FIELDS)
+    width = len(rows[0])
+    chunk_size = (connection.features.max_query_params or 5000) // width
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start : start + chunk_size]
+            placeholders = ", ".join([f"({', '.join(['%s'] * width)})"] * len(chunk))
+            cursor.execute(
+                f"INSERT INTO {table} (run_id, bucket, {', '.join(FIELDS)}) "
+                f"VALUES {placeholders} "
+                f"ON CONFLICT (run_id, bucket) DO UPDATE SET {increments}",
+                [value for row in chunk for value in row],
+            )
+
+
+throughput = BufferedWriter(
+    "throughput",
+    _apply_counts,
+    batch_size=settings.THROUGHPUT_FLUSH_BATCH_SIZE,
+    interval=settings.THROUGHPUT_FLUSH_INTERVAL,
+    shared=False,
+)
+
+
+def record(run_id, field: str, count: int = 1, at: Optional[float] = None) -> None:
+    """Count ``count`` ``field`` events (queued/sent/failed) of a run in the current minute."""
+    if count:
+        now = time.time() if at is None else at
+        throughput.add(
+            [{"run": str(run_id), "bucket": int(now // 60) * 60, "field": field, "n": count}]
+        )
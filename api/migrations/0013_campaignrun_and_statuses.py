@@ -2,6 +2,8 @@ import uuid
 
 import django.db.models.deletion
 from django.db import migrations, models
+from django.db.models import Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 
@@ -23,10 +25,15 @@ def backfill_runs(apps, schema_editor):
             started_at=now if campaign.is_active else None,
         )
 
-        for message in Message.objects.filter(campaign=campaign, run__isnull=True):
-            message.run = run
-            message.planned_send_at = message.planned_send_at or message.created_at or now
-            message.save(update_fields=["run", "planned_send_at"])
+        # One statement per campaign instead of a save() per message.
+        Message.objects.filter(campaign=campaign, run__isnull=True).update(
+            run=run,
+            planned_send_at=Coalesce(
+                "planned_send_at",
+                "created_at",
+                Value(now, output_field=models.DateTimeField()),
+            ),
+        )
 
         campaign.active_run = run
         campaign.status = campaign_status
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.11 on 2026-10-18 23:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0013_campaignrun_and_statuses"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="newsletter",
+            name="priority",
+            field=models.PositiveSmallIntegerField(
+                choices=[(0, "Transactional"), (3, "High"), (6, "Normal"), (9, "Bulk")], default=6
+            ),
+        ),
+    ]
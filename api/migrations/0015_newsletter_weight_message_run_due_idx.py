@@ -0,0 +1,24 @@
+# Generated by Django 4.2.11 on 2026-10-18 23:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0014_newsletter_priority"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="newsletter",
+            name="weight",
+            field=models.PositiveSmallIntegerField(default=1),
+        ),
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                fields=["run", "status", "planned_send_at"], name="message_run_due_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 23:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0015_newsletter_weight_message_run_due_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="newsletter",
+            name="max_rate",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
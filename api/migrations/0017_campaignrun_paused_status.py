@@ -0,0 +1,28 @@
+# Generated by Django 4.2.11 on 2026-10-18 23:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0016_newsletter_max_rate"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="campaignrun",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("SCHEDULED", "Scheduled"),
+                    ("RUNNING", "Running"),
+                    ("PAUSED", "Paused"),
+                    ("FINISHED", "Finished"),
+                    ("FAILED", "Failed"),
+                ],
+                default="SCHEDULED",
+                max_length=20,
+            ),
+        ),
+    ]
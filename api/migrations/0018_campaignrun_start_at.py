@@ -0,0 +1,39 @@
+# Generated by Django 4.2.11 on 2026-10-18 23:13
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_start_at(apps, schema_editor):
+    # Runs scheduled before this migration were ETA tasks; hand them to the scheduler.
+    CampaignRun = apps.get_model("api", "CampaignRun")
+    Newsletter = apps.get_model("api", "Newsletter")
+    start = Newsletter.objects.filter(pk=OuterRef("campaign_id")).values("start_datetime")[:1]
+    CampaignRun.objects.filter(status="SCHEDULED", start_at__isnull=True).update(
+        start_at=Subquery(start)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0017_campaignrun_paused_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="campaignrun",
+            name="claimed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="campaignrun",
+            name="start_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="campaignrun",
+            index=models.Index(fields=["status", "start_at"], name="run_scheduled_start_idx"),
+        ),
+        migrations.RunPython(backfill_start_at, migrations.RunPython.noop),
+    ]
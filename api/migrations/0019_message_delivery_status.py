@@ -0,0 +1,28 @@
+# Generated by Django 4.2.11 on 2026-10-18 23:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0018_campaignrun_start_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="message",
+            name="delivery_status",
+            field=models.CharField(
+                blank=True,
+                choices=[("DELIVERED", "Delivered"), ("UNDELIVERED", "Undelivered")],
+                max_length=20,
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="message",
+            name="delivery_updated_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.11 on 2026-10-18 23:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0020_message_retry_state"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RunThroughput",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("bucket", models.DateTimeField()),
+                ("queued", models.PositiveIntegerField(default=0)),
+                ("sent", models.PositiveIntegerField(default=0)),
+                ("failed", models.PositiveIntegerField(default=0)),
+                (
+                    "run",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="throughput",
+                        to="api.campaignrun",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["bucket"], name="run_throughput_bucket_idx")],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="runthroughput",
+            constraint=models.UniqueConstraint(
+                fields=("run", "bucket"), name="unique_run_throughput_bucket"
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.11 on 2026-10-18 23:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0023_backfillcheckpoint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Dispatcher",
+            fields=[
+                ("name", models.CharField(max_length=200, primary_key=True, serialize=False)),
+                ("heartbeat_at", models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="DispatchShardLease",
+            fields=[
+                ("shard", models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ("owner", models.CharField(blank=True, default="", max_length=200)),
+                ("expires_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
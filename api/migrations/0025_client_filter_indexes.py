@@ -0,0 +1,52 @@
+# Generated by Django 4.2.11 on 2026-10-19 00:00
+
+from django.db import migrations, models
+
+CLIENT_INDEXES = [
+    models.Index(
+        fields=["phone_number"], name="client_phone_idx", opclasses=["varchar_pattern_ops"]
+    ),
+    models.Index(fields=["tag", "id"], name="client_tag_idx"),
+    models.Index(fields=["mobile_operator_code", "id"], name="client_operator_idx"),
+    models.Index(fields=["timezone", "id"], name="client_timezone_idx"),
+]
+
+
+def _vendor_add_indexes(model_name, indexes):
+    """Build ``indexes`` without blocking writes: ``CONCURRENTLY`` on PostgreSQL."""
+
+    def forwards(apps, schema_editor):
+        model = apps.get_model("api", model_name)
+        for index in indexes:
+            if schema_editor.connection.vendor == "postgresql":
+                schema_editor.add_index(model, index, concurrently=True)
+            else:
+                schema_editor.add_index(model, index)
+
+    def backwards(apps, schema_editor):
+        model = apps.get_model("api", model_name)
+        for index in indexes:
+            if schema_editor.connection.vendor == "postgresql":
+                schema_editor.remove_index(model, index, concurrently=True)
+            else:
+                schema_editor.remove_index(model, index)
+
+    return migrations.RunPython(forwards, backwards)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ("api", "0024_dispatch_shards"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[_vendor_add_indexes("client", CLIENT_INDEXES)],
+            state_operations=[
+                migrations.AddIndex(model_name="client", index=index) for index in CLIENT_INDEXES
+            ],
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.11 on 2026-10-19 00:06
+
+from django.db import migrations, models
+
+MESSAGE_INDEXES = [
+    models.Index(fields=["status", "-id"], name="message_status_idx"),
+    models.Index(fields=["run", "-id"], name="message_run_idx"),
+]
+
+
+def _vendor_add_indexes(model_name, indexes):
+    """Build ``indexes`` without blocking writes: ``CONCURRENTLY`` on PostgreSQL."""
+
+    def forwards(apps, schema_editor):
+        model = apps.get_model("api", model_name)
+        for index in indexes:
+            if schema_editor.connection.vendor == "postgresql":
+                schema_editor.add_index(model, index, concurrently=True)
+            else:
+                schema_editor.add_index(model, index)
+
+    def backwards(apps, schema_editor):
+        model = apps.get_model("api", model_name)
+        for index in indexes:
+            if schema_editor.connection.vendor == "postgresql":
+                schema_editor.remove_index(model, index, concurrently=True)
+            else:
+                schema_editor.remove_index(model, index)
+
+    return migrations.RunPython(forwards, backwards)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ("api", "0025_client_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[_vendor_add_indexes("message", MESSAGE_INDEXES)],
+            state_operations=[
+                migrations.AddIndex(model_name="message", index=index) for index in MESSAGE_INDEXES
+            ],
+        ),
+    ]
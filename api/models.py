@@ -7,12 +7,59 @@ from django.db.models import JSONField
 from django.utils import timezone
 
 
-class Client(models.Model):
+class VersionedModel(models.Model):
+    """``updated_at`` is the version behind ETag/Last-Modified of cached API reads.
+
+    ``save(update_fields=...)`` bumps it too, so partial saves from tasks change the
+    version like full saves do.
+    """
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "updated_at" not in update_fields:
+            kwargs["update_fields"] = [*update_fields, "updated_at"]
+        super().save(*args, **kwargs)
+
+
+class AliveManager(models.Manager):
+    """Rows that are not soft-deleted; ``all_objects`` still sees every row.
+
+    A deleted row disappears from the API at once and is purged in the background
+    by ``api.tasks.purge_deleted_objects`` (see ``DeletionJob``).
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class Client(VersionedModel):
     id = models.AutoField(primary_key=True)
     phone_number = models.CharField(max_length=20)
     mobile_operator_code = models.CharField(max_length=3)
     tag = models.CharField(max_length=100)
     timezone = models.CharField(max_length=100)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = AliveManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            # varchar_pattern_ops serves both exact and prefix (LIKE 'x%') phone lookups
+            # on PostgreSQL regardless of collation; other backends get a plain index.
+            models.Index(
+                fields=["phone_number"], name="client_phone_idx", opclasses=["varchar_pattern_ops"]
+            ),
+            # Filtered list pages are ordered by id, so the index walks them in order.
+            models.Index(fields=["tag", "id"], name="client_tag_idx"),
+            models.Index(fields=["mobile_operator_code", "id"], name="client_operator_idx"),
+            models.Index(fields=["timezone", "id"], name="client_timezone_idx"),
+        ]
 
     def __str__(self):
         return f"{self.phone_number} - {self.tag}"
@@ -27,7 +74,16 @@ class CampaignStatus(models.TextChoices):
     FAILED = "FAILED", "Failed"
 
 
-class Newsletter(models.Model):
+class CampaignPriority(models.IntegerChoices):
+    """Celery message priority of sends; lower values are consumed first."""
+
+    TRANSACTIONAL = 0, "Transactional"
+    HIGH = 3, "High"
+    NORMAL = 6, "Normal"
+    BULK = 9, "Bulk"
+
+
+class Newsletter(VersionedModel):
     id = models.AutoField(primary_key=True)
     start_datetime = models.DateTimeField()
     end_datetime = models.DateTimeField()
@@ -37,6 +93,11 @@ class Newsletter(models.Model):
     tag = models.CharField(max_length=500, default="default_tag")
     client_filter = JSONField(default=list)
     is_active = models.BooleanField(default=False)
+    priority = models.PositiveSmallIntegerField(
+        choices=CampaignPriority.choices, default=CampaignPriority.NORMAL
+    )
+    weight = models.PositiveSmallIntegerField(default=1)
+    max_rate = models.PositiveIntegerField(null=True, blank=True)
     status = models.CharField(
         max_length=20, choices=CampaignStatus.choices, default=CampaignStatus.DRAFT
     )
@@ -44,6 +105,10 @@ class Newsletter(models.Model):
         "api.CampaignRun", null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
     )
     last_started_at = models.DateTimeField(null=True, blank=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = AliveManager()
+    all_objects = models.Manager()
 
     def __str__(self):
         return f"Newsletter {self.id}"
@@ -56,6 +121,7 @@ class Newsletter(models.Model):
 class CampaignRunStatus(models.TextChoices):
     SCHEDULED = "SCHEDULED", "Scheduled"
     RUNNING = "RUNNING", "Running"
+    PAUSED = "PAUSED", "Paused"
     FINISHED = "FINISHED", "Finished"
     FAILED = "FAILED", "Failed"
 
@@ -68,13 +134,37 @@ class CampaignRun(models.Model):
     )
     force_resend = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    start_at = models.DateTimeField(null=True, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
     started_at = models.DateTimeField(null=True, blank=True)
     finished_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["status", "start_at"], name="run_scheduled_start_idx")]
+
     def __str__(self) -> str:
         return f"Run {self.id} ({self.status})"
 
 
+class RunThroughput(models.Model):
+    """Per-minute send counters of a run, written in bulk by ``api.metrics``."""
+
+    run = models.ForeignKey(CampaignRun, related_name="throughput", on_delete=models.CASCADE)
+    bucket = models.DateTimeField()
+    queued = models.PositiveIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["run", "bucket"], name="unique_run_throughput_bucket")
+        ]
+        indexes = [models.Index(fields=["bucket"], name="run_throughput_bucket_idx")]
+
+    def __str__(self) -> str:
+        return f"{self.run_id} @ {self.bucket:%Y-%m-%d %H:%M}"
+
+
 class MessageStatus(models.TextChoices):
     PENDING = "PENDING", "Pending"
     QUEUED = "QUEUED", "Queued"
@@ -82,6 +172,13 @@ class MessageStatus(models.TextChoices):
     FAILED = "FAILED", "Failed"
 
 
+class DeliveryStatus(models.TextChoices):
+    """Final state reported by the provider in a delivery receipt."""
+
+    DELIVERED = "DELIVERED", "Delivered"
+    UNDELIVERED = "UNDELIVERED", "Undelivered"
+
+
 class Message(models.Model):
     id = models.AutoField(primary_key=True)
     created_at = models.DateTimeField(default=timezone.now)
@@ -93,6 +190,13 @@ class Message(models.Model):
     client = models.ForeignKey(Client, related_name="messages", on_delete=models.CASCADE)
     run = models.ForeignKey(CampaignRun, related_name="messages", on_delete=models.CASCADE)
     message_text = models.TextField()
+    delivery_status = models.CharField(
+        max_length=20, choices=DeliveryStatus.choices, null=True, blank=True
+    )
+    delivery_updated_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
 
     class Meta:
         constraints = [
@@ -100,6 +204,85 @@ class Message(models.Model):
                 fields=["campaign", "client", "run"], name="unique_message_per_run_per_client"
             )
         ]
+        indexes = [
+            models.Index(fields=["run", "status", "planned_send_at"], name="message_run_due_idx"),
+            # Admin changelist filters, newest first.
+            models.Index(fields=["status", "-id"], name="message_status_idx"),
+            models.Index(fields=["run", "-id"], name="message_run_idx"),
+        ]
 
     def __str__(self):
         return f"Message {self.id} - {self.status}"
+
+
+class BackfillCheckpoint(models.Model):
+    """Progress of a named ``api.backfill`` job, committed together with each chunk."""
+
+    name = models.CharField(max_length=100, unique=True)
+    last_pk = models.CharField(max_length=64, null=True, blank=True)
+    processed = models.PositiveBigIntegerField(default=0)
+    updated = models.PositiveBigIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        return f"{self.name} @ {self.last_pk}"
+
+
+class Dispatcher(models.Model):
+    """A running ``manage.py run_dispatcher``; rows past ``DISPATCH_LEASE_TTL`` are dead."""
+
+    name = models.CharField(max_length=200, primary_key=True)
+    heartbeat_at = models.DateTimeField()
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class DispatchShardLease(models.Model):
+    """Ownership of dispatch shard ``shard`` (messages with ``id % DISPATCH_SHARDS == shard``)."""
+
+    shard = models.PositiveIntegerField(primary_key=True)
+    owner = models.CharField(max_length=200, blank=True, default="")
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        return f"shard {self.shard} ({self.owner or 'free'})"
+
+
+class DeletionTarget(models.TextChoices):
+    CLIENT = "client", "Client"
+    CAMPAIGN = "campaign", "Campaign"
+
+
+class DeletionStatus(models.TextChoices):
+    PENDING = "PENDING", "Pending"
+    RUNNING = "RUNNING", "Running"
+    FINISHED = "FINISHED", "Finished"
+
+
+class DeletionJob(models.Model):
+    """Background removal of a soft-deleted client or campaign and its messages.
+
+    ``total`` is the number of messages found when the purge started, ``deleted``
+    how many of them are gone so far.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    target = models.CharField(max_length=20, choices=DeletionTarget.choices)
+    object_id = models.PositiveIntegerField()
+    status = models.CharField(
+        max_length=20, choices=DeletionStatus.choices, default=DeletionStatus.PENDING
+    )
+    total = models.PositiveBigIntegerField(default=0)
+    deleted = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["finished_at", "created_at"], name="deletion_queue_idx")]
+
+    def __str__(self) -> str:
+        return f"{self.target} {self.object_id} ({self.status})"
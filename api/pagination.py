@@ -0,0 +1,51 @@
+"""Page-number pagination that does not count millions of rows for every page.
+
+``COUNT(*)`` over a broad filter of a large table scans every matching row. On
+PostgreSQL the paginator asks the planner first; at or above
+``ESTIMATED_COUNT_THRESHOLD`` rows it reports the planner's estimate and flags the
+page with ``count_estimated``. Smaller results, and other databases, are counted
+exactly.
+"""
+
+import json
+from functools import cached_property
+from typing import Optional
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from rest_framework.pagination import PageNumberPagination
+
+
+def estimated_count(queryset) -> Optional[int]:
+    """The planner's row estimate for ``queryset``, or ``None`` off PostgreSQL."""
+    if connections[queryset.db].vendor != "postgresql":
+        return None
+    plan = json.loads(queryset.explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    estimated = False
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        if estimate is not None and estimate >= settings.ESTIMATED_COUNT_THRESHOLD:
+            self.estimated = True
+            return estimate
+        return super().count
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data["count_estimated"] = self.page.paginator.estimated
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema["properties"]["count_estimated"] = {"type": "boolean"}
+        return schema
@@ -0,0 +1,173 @@
+"""Opt-in profiling hook for Celery tasks and API requests.
+
+Targets are matched with shell-style patterns against task names
+(``settings.PROFILE_TASKS``) or request paths (``settings.PROFILE_URLS``), each
+mapped to a sample rate: ``1000`` profiles roughly one call in a thousand.
+Profiled calls are written as collapsed stacks (``frame;frame;frame weight``,
+weights in microseconds) into ``settings.PROFILE_DIR``; ``manage.py
+merge_profiles`` folds them into a single flamegraph-ready file.
+
+When no targets are configured the signal handlers are never connected and the
+middleware removes itself, so disabled profiling costs nothing per call.
+"""
+
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def _frame_label(frame) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{frame.f_code.co_name}"
+
+
+def _builtin_label(func) -> str:
+    module = getattr(func, "__module__", None) or "builtins"
+    return f"{module}:{getattr(func, '__qualname__', repr(func))}"
+
+
+class StackProfiler:
+    """Deterministic profiler that accumulates self time per collapsed stack."""
+
+    def __init__(self):
+        self.stacks: Counter = Counter()
+        self._stack: list = []
+        self._last = 0
+
+    def _tick(self) -> None:
+        now = time.perf_counter_ns()
+        if self._stack:
+            self.stacks[tuple(self._stack)] += now - self._last
+        self._last = now
+
+    def _dispatch(self, frame, event, arg) -> None:
+        self._tick()
+        if event == "call":
+            self._stack.append(_frame_label(frame))
+        elif event == "c_call":
+            self._stack.append(_builtin_label(arg))
+        elif self._stack:
+            # return / c_return / c_exception; frames entered before start() are ignored.
+            self._stack.pop()
+
+    def start(self) -> None:
+        self._last = time.perf_counter_ns()
+        sys.setprofile(self._dispatch)
+
+    def stop(self) -> Counter:
+        sys.setprofile(None)
+        self._tick()
+        return self.stacks
+
+    def collapsed(self) -> str:
+        lines = [
+            f"{';'.join(stack)} {max(weight // 1000, 1)}" for stack, weight in self.stacks.items()
+        ]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+
+def _match_rate(name: str, targets: Dict[str, int]) -> Optional[int]:
+    for pattern, rate in targets.items():
+        if fnmatchcase(name, pattern):
+            return max(int(rate), 1)
+    return None
+
+
+def _should_sample(rate: Optional[int]) -> bool:
+    return rate is not None and random.random() * rate < 1
+
+
+def _output_path(target: str) -> Path:
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", target).strip("_") or "root"
+    stamp = int(time.time() * 1000)
+    return Path(settings.PROFILE_DIR) / f"{slug}-{stamp}-{os.getpid()}.collapsed"
+
+
+@contextmanager
+def profile(target: str):
+    """Profile the enclosed block and write its collapsed stacks for ``target``."""
+    if getattr(_local, "active", False):
+        # Nested targets (a task called eagerly from a profiled view) share the outer profile.
+        yield None
+        return
+
+    profiler = StackProfiler()
+    _local.active = True
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        _local.active = False
+        _write(target, profiler)
+
+
+def _write(target: str, profiler: StackProfiler) -> None:
+    path = _output_path(target)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(profiler.collapsed())
+    except OSError as exc:
+        logger.warning("Failed to write profile for %s: %s", target, exc)
+    else:
+        logger.info("Profile for %s written to %s", target, path)
+
+
+_task_profiles: Dict[str, Tuple[object, StackProfiler]] = {}
+
+
+def _on_task_prerun(sender=None, task_id=None, task=None, **kwargs) -> None:
+    name = getattr(task, "name", None) or getattr(sender, "name", "")
+    if not _should_sample(_match_rate(name, settings.PROFILE_TASKS)):
+        return
+    context = profile(name)
+    context.__enter__()
+    _task_profiles[task_id] = context
+
+
+def _on_task_postrun(sender=None, task_id=None, **kwargs) -> None:
+    context = _task_profiles.pop(task_id, None)
+    if context is not None:
+        context.__exit__(None, None, None)
+
+
+def connect_task_hooks() -> None:
+    """Attach the Celery hooks when task profiling is configured."""
+    if not settings.PROFILE_TASKS:
+        return
+    from celery.signals import task_postrun, task_prerun
+
+    task_prerun.connect(_on_task_prerun, weak=False, dispatch_uid="api.profiling.prerun")
+    task_postrun.connect(_on_task_postrun, weak=False, dispatch_uid="api.profiling.postrun")
+
+
+class ProfilingMiddleware:
+    """Profile sampled requests whose path matches ``settings.PROFILE_URLS``."""
+
+    def __init__(self, get_response):
+        if not settings.PROFILE_URLS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.targets = dict(settings.PROFILE_URLS)
+
+    def __call__(self, request):
+        if not _should_sample(_match_rate(request.path_info, self.targets)):
+            return self.get_response(request)
+        with profile(f"{request.method} {request.path_info}"):
+            return self.get_response(request)
@@ -1,14 +1,22 @@
+from datetime import timedelta
+from functools import cached_property
+from operator import methodcaller
+from typing import Callable, Iterable, List, Optional, Tuple
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from rest_framework import serializers
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 
-from .models import Client, Message, Newsletter
+from .models import Client, DeletionJob, DeletionStatus, DeliveryStatus, Message, Newsletter
 
 
 class ClientSerializer(serializers.ModelSerializer):
     class Meta:
         model = Client
-        fields = "__all__"
+        exclude = ("deleted_at",)
 
     def validate_phone_number(self, value):
         digits = "".join(filter(str.isdigit, value))
@@ -29,7 +37,7 @@ class NewsletterSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Newsletter
-        fields = "__all__"
+        exclude = ("deleted_at",)
         read_only_fields = ("status", "is_active", "last_started_at", "active_run")
 
     def validate(self, attrs):
@@ -89,8 +97,145 @@ class MessageSerializer(serializers.ModelSerializer):
     class Meta:
         model = Message
         fields = "__all__"
-        read_only_fields = ("status", "planned_send_at", "created_at")
+        read_only_fields = (
+            "status",
+            "planned_send_at",
+            "created_at",
+            "delivery_status",
+            "delivery_updated_at",
+            "attempts",
+            "next_attempt_at",
+            "last_error",
+        )
 
 
 class CampaignStartSerializer(serializers.Serializer):
     force_resend = serializers.BooleanField(default=False)
+
+
+class DeliveryReceiptSerializer(serializers.Serializer):
+    message_id = serializers.IntegerField(min_value=1)
+    status = serializers.ChoiceField(choices=DeliveryStatus.choices)
+    timestamp = serializers.DateTimeField(required=False)
+
+
+class DeletionJobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DeletionJob
+        fields = (
+            "id",
+            "target",
+            "object_id",
+            "status",
+            "total",
+            "deleted",
+            "progress",
+            "created_at",
+            "finished_at",
+        )
+
+    def get_progress(self, job) -> float:
+        if job.status == DeletionStatus.FINISHED:
+            return 1.0
+        return min(job.deleted / job.total, 1.0) if job.total else 0.0
+
+
+class ThroughputQuerySerializer(serializers.Serializer):
+    run = serializers.UUIDField(required=False)
+    resolution = serializers.ChoiceField(choices=["minute", "hour", "day"], default="minute")
+
+
+ZERO = timedelta(0)
+
+# Fields whose to_representation() returns non-null ``values()`` output unchanged.
+_PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.JSONField,
+)
+
+
+class ValuesSerializer:
+    """Read-only twin of a ``ModelSerializer`` that works on ``values_list()`` rows.
+
+    Converters are resolved once from the serializer's fields, so a page is built
+    without model instances or per-field ``to_representation`` calls; the output is
+    the same as ``serializer_class(many=True).data``. Writes keep using
+    ``serializer_class`` and its validation.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+
+    @cached_property
+    def _columns(self) -> List[Tuple[str, str, object]]:
+        model = self.serializer_class.Meta.model
+        columns = []
+        for name, field in self.serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if field.source == "*" or "." in field.source:
+                raise ImproperlyConfigured(
+                    f"{self.serializer_class.__name__}.{name} is not a plain model field."
+                )
+            lookup = model._meta.get_field(field.source).attname
+            columns.append((name, lookup, field))
+        return columns
+
+    @property
+    def lookups(self) -> List[str]:
+        return [lookup for _, lookup, _ in self._columns]
+
+    @staticmethod
+    def _converter(field, tz) -> Optional[Callable]:
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+            return None
+        if isinstance(field, _PASSTHROUGH_FIELDS):
+            return None
+        if (
+            isinstance(field, serializers.DateTimeField)
+            and (getattr(field, "format", api_settings.DATETIME_FORMAT) or "").lower() == ISO_8601
+        ):
+            field_tz = getattr(field, "timezone", tz)
+            # Rows arrive in UTC; converting them to a UTC zone would not change the text.
+            to_utc = field_tz is not None and str(field_tz) == "UTC"
+
+            def datetime_to_iso(value):
+                if value.tzinfo is not None and field_tz is not None:
+                    if not (to_utc and value.utcoffset() == ZERO):
+                        value = value.astimezone(field_tz)
+                value = value.isoformat()
+                return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+            return datetime_to_iso
+        if (
+            isinstance(field, serializers.TimeField)
+            and (getattr(field, "format", api_settings.TIME_FORMAT) or "").lower() == ISO_8601
+        ):
+            return methodcaller("isoformat")
+        return field.to_representation
+
+    def serialize(self, rows: Iterable[tuple]) -> List[dict]:
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        names = [name for name, _, _ in self._columns]
+        converters = [
+            (index, converter)
+            for index, (_, _, field) in enumerate(self._columns)
+            if (converter := self._converter(field, tz)) is not None
+        ]
+        if not converters:
+            return [dict(zip(names, row, strict=True)) for row in rows]
+
+        data = []
+        for row in rows:
+            row = list(row)
+            for index, converter in converters:
+                value = row[index]
+                if value is not None:
+                    row[index] = converter(value)
+            data.append(dict(zip(names, row, strict=True)))
+        return data
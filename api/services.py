@@ -1,8 +1,17 @@
+import atexit
 import logging
-from typing import Any, Dict
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
 
-from django.db import transaction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
 
+from .buffers import BufferedWriter, LocalBuffer
 from .models import Message
 
 logger = logging.getLogger(__name__)
@@ -25,3 +34,162 @@ def send_message_to_external_service(message: Message, campaign) -> None:
     # Здесь можно разместить реальный HTTP-запрос (requests.post и т.п.)
     with transaction.atomic():
         logger.debug("Payload: %s", payload)
+
+
+RECEIPT_UPDATE_CHUNK = 5000
+
+
+def _latest_receipts(receipts: Iterable[dict]) -> Dict[int, Tuple[str, datetime]]:
+    latest: Dict[int, Tuple[str, datetime]] = {}
+    for receipt in receipts:
+        at = parse_datetime(receipt["at"])
+        current = latest.get(receipt["id"])
+        if current is None or current[1] <= at:
+            latest[receipt["id"]] = (receipt["status"], at)
+    return latest
+
+
+def _update_receipts(latest: Dict[int, Tuple[str, datetime]]) -> int:
+    # One statement joins the whole chunk as a VALUES list; building the equivalent
+    # ORM ``Case(When(...))`` costs more Python time than the UPDATE itself.
+    table = connection.ops.quote_name(Message._meta.db_table)
+    if connection.vendor == "postgresql":
+        row = "(%s::integer, %s::varchar, %s::timestamptz)"
+    else:
+        row = "(%s, %s, %s)"
+    chunk_size = min(
+        RECEIPT_UPDATE_CHUNK,
+        (connection.features.max_query_params or 3 * RECEIPT_UPDATE_CHUNK) // 3,
+    )
+    adapt = connection.ops.adapt_datetimefield_value
+
+    rows = list(latest.items())
+    updated = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start : start + chunk_size]
+            params = [item for pk, (status, at) in chunk for item in (pk, status, adapt(at))]
+            cursor.execute(
+                f"WITH v(id, status, at) AS (VALUES {', '.join([row] * len(chunk))}) "
+                f"UPDATE {table} "
+                "SET delivery_status = v.status, delivery_updated_at = v.at "
+                f"FROM v WHERE {table}.id = v.id "
+                f"AND ({table}.delivery_updated_at IS NULL OR {table}.delivery_updated_at <= v.at)",
+                params,
+            )
+            updated += cursor.rowcount
+    return updated
+
+
+def apply_delivery_receipts(receipts: Iterable[dict]) -> int:
+    """Write buffered delivery receipts to ``Message`` with one UPDATE per chunk.
+
+    Each receipt is ``{"id": message_id, "status": DeliveryStatus, "at": iso8601}``.
+    A receipt only replaces a stored one that is not newer, so replaying a batch or
+    receiving reports out of order leaves the latest state in place.
+    """
+    latest = _latest_receipts(receipts)
+    if not latest:
+        return 0
+    return _update_receipts(latest)
+
+
+receipt_writer = BufferedWriter(
+    "receipts",
+    apply_delivery_receipts,
+    batch_size=settings.RECEIPT_FLUSH_BATCH_SIZE,
+    interval=settings.RECEIPT_FLUSH_INTERVAL,
+)
+
+
+def _drain_receipts() -> None:
+    receipt_writer.stop_background_flush()
+    try:
+        receipt_writer.flush()
+    except Exception as exc:  # noqa: BLE001
+        logger.error("API process %s lost buffered receipts: %s", os.getpid(), exc)
+
+
+def start_receipt_flusher() -> None:
+    """Drain a process-local receipt buffer from a thread instead of from requests.
+
+    Called by the WSGI and ASGI entry points. Without ``STATUS_BUFFER_URL`` the
+    receipts stay in this process, so the thread also flushes the idle tail of a
+    burst, and whatever is left is written at exit.
+    """
+    if not isinstance(receipt_writer.buffer, LocalBuffer):
+        return
+    receipt_writer.start_background_flush()
+    atexit.register(_drain_receipts)
+
+
+class CircuitBreaker:
+    """Per-provider circuit breaker shared by all workers through the Django cache.
+
+    ``threshold`` failures within ``window`` seconds open the circuit for ``cooldown``
+    seconds. After that a single probe send is let through: success closes the
+    circuit, failure opens it for another cooldown.
+    """
+
+    def __init__(self, name: str, *, threshold: int, window: int, cooldown: int):
+        self.name = name
+        self.threshold = threshold
+        self.window = window
+        self.cooldown = cooldown
+        self._failures_key = f"circuit:{name}:failures"
+        self._open_key = f"circuit:{name}:open_until"
+        self._probe_key = f"circuit:{name}:probe"
+        self._local = threading.local()
+
+    def open_until(self) -> Optional[float]:
+        """Epoch seconds until which sends are stopped, or ``None`` when closed."""
+        until = cache.get(self._open_key)
+        return until if until is not None and time.time() < until else None
+
+    def is_open(self) -> bool:
+        return self.open_until() is not None
+
+    def allow(self) -> bool:
+        until = cache.get(self._open_key)
+        if until is None:
+            return True
+        if time.time() < until:
+            return False
+        # Half-open: exactly one caller gets to probe the provider.
+        if cache.add(self._probe_key, 1, timeout=self.cooldown):
+            self._local.probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if getattr(self._local, "probing", False):
+            self._local.probing = False
+            cache.delete_many([self._open_key, self._probe_key, self._failures_key])
+            logger.info("Circuit for provider %s closed.", self.name)
+
+    def record_failure(self) -> None:
+        probing = getattr(self._local, "probing", False)
+        self._local.probing = False
+        cache.add(self._failures_key, 0, timeout=self.window)
+        try:
+            failures = cache.incr(self._failures_key)
+        except ValueError:  # the window expired between add() and incr()
+            cache.set(self._failures_key, 1, timeout=self.window)
+            failures = 1
+        if probing or failures >= self.threshold:
+            cache.set(self._open_key, time.time() + self.cooldown, timeout=None)
+            cache.delete_many([self._probe_key, self._failures_key])
+            logger.warning(
+                "Circuit for provider %s opened for %s s after %s failures.",
+                self.name,
+                self.cooldown,
+                failures,
+            )
+
+
+provider_breaker = CircuitBreaker(
+    settings.SMS_PROVIDER_NAME,
+    threshold=settings.CIRCUIT_BREAKER_THRESHOLD,
+    window=settings.CIRCUIT_BREAKER_WINDOW,
+    cooldown=settings.CIRCUIT_BREAKER_COOLDOWN,
+)
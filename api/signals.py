@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import caching
+from .models import CampaignRun, Client, Newsletter
+
+CACHE_PREFIXES = {Client: "client", Newsletter: "campaign"}
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+@receiver(post_save, sender=Newsletter)
+@receiver(post_delete, sender=Newsletter)
+def invalidate_cached_reads(sender, instance, **kwargs):
+    prefix = CACHE_PREFIXES[sender]
+    caching.invalidate(prefix, instance.pk)
+    # Again after commit, in case a concurrent read re-cached the old row meanwhile.
+    transaction.on_commit(lambda: caching.invalidate(prefix, instance.pk))
+
+
+@receiver(post_save, sender=Newsletter)
+@receiver(post_delete, sender=Newsletter)
+@receiver(post_save, sender=CampaignRun)
+@receiver(post_delete, sender=CampaignRun)
+def invalidate_send_snapshots(sender, instance, **kwargs):
+    campaign_id = instance.pk if sender is Newsletter else instance.campaign_id
+    caching.bump_snapshot_generation(campaign_id)
+    transaction.on_commit(lambda: caching.bump_snapshot_generation(campaign_id))
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_cached_user_on_change(sender, instance, **kwargs):
+    caching.invalidate_cached_user(instance.pk)
+    transaction.on_commit(lambda: caching.invalidate_cached_user(instance.pk))
@@ -0,0 +1,77 @@
+"""In-process cache of the campaign and run a send task needs.
+
+Every send used to re-read its ``Newsletter`` (text, filter JSON) and ``CampaignRun``
+with the message. While a run is active neither changes except through a save, so
+each worker process keeps them in a small LRU keyed by run. An entry is valid while
+the campaign's snapshot generation (``api.caching``, bumped by ``api.signals`` on
+every campaign or run save) is unchanged, and for at most ``SEND_SNAPSHOT_MAX_AGE``
+seconds. The age limit bounds staleness when the cache is not shared between
+processes (no ``CACHE_URL``). The run status and the campaign's ``deleted_at`` are
+not trusted from here: the send task reads them with the message and drops an entry
+that disagrees, so a pause or delete takes effect on the next send.
+
+The cached instances are shared by the tasks of a process: code that changes them
+must save, which bumps the generation and makes the next task reload.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+from django.conf import settings
+
+from . import caching
+from .models import CampaignRun, CampaignRunStatus
+
+
+class RunSnapshots:
+    def __init__(self):
+        self._entries: "OrderedDict[str, Tuple[int, float, CampaignRun]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, run_id, campaign_id) -> CampaignRun:
+        """The run with its campaign attached; one cache lookup when warm."""
+        # Read the generation before loading: a bump in between leaves a newer row
+        # under an older generation, which only costs a reload.
+        generation = caching.snapshot_generation(campaign_id)
+        key = str(run_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if (
+                entry is not None
+                and entry[0] == generation
+                and now - entry[1] < settings.SEND_SNAPSHOT_MAX_AGE
+            ):
+                self._entries.move_to_end(key)
+                return entry[2]
+
+        run = CampaignRun.objects.select_related("campaign").get(pk=run_id)
+        with self._lock:
+            self._entries[key] = (generation, now, run)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.SEND_SNAPSHOT_CACHE_SIZE:
+                self._entries.popitem(last=False)
+        return run
+
+    def warm(self) -> int:
+        """Load the running runs, newest first, up to the cache size."""
+        running = CampaignRun.objects.filter(status=CampaignRunStatus.RUNNING).order_by(
+            "-started_at"
+        )
+        pairs = running.values_list("id", "campaign_id")[: settings.SEND_SNAPSHOT_CACHE_SIZE]
+        for run_id, campaign_id in pairs:
+            self.get(run_id, campaign_id)
+        return len(self._entries)
+
+    def discard(self, run_id) -> None:
+        with self._lock:
+            self._entries.pop(str(run_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+run_snapshots = RunSnapshots()
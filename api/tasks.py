@@ -1,23 +1,51 @@
 import logging
+import random
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from functools import partial
+from itertools import islice
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
 
 from celery import shared_task
+from django.conf import settings
 from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Mod
 from django.utils import timezone
 
+from . import metrics
+from .buffers import BufferedWriter
+from .dispatch import live_dispatchers
+from .materialize import insert_messages, supports_sql_materialization
 from .models import (
     CampaignRun,
     CampaignRunStatus,
     CampaignStatus,
+    Client,
+    DeletionJob,
+    DeletionStatus,
+    DeletionTarget,
     Message,
     MessageStatus,
+    Newsletter,
+    RunThroughput,
 )
-from .services import send_message_to_external_service
-from .utils import calculate_planned_send_at, campaign_recipients
+from .services import provider_breaker, send_message_to_external_service
+from .snapshots import run_snapshots
+from .utils import campaign_recipients, next_send_at, plan_send_times, undelivered_recipients
 
 logger = logging.getLogger(__name__)
 
 
-def _refresh_run_status(run: CampaignRun) -> None:
+def refresh_run_status(run: CampaignRun) -> None:
+    """Derive the run's status from its messages and mirror it onto the active campaign."""
+    if run.status == CampaignRunStatus.PAUSED:
+        # A paused run only changes state through the resume endpoint.
+        return
+
     pending_exists = run.messages.filter(
         status__in=[MessageStatus.PENDING, MessageStatus.QUEUED]
     ).exists()
@@ -47,78 +75,302 @@ def _refresh_run_status(run: CampaignRun) -> None:
     if campaign.active_run_id != run.id:
         return
 
-    campaign_updates = []
-    if new_status == CampaignRunStatus.RUNNING:
-        campaign.status = CampaignStatus.RUNNING
-        campaign.is_active = True
-        campaign_updates.extend(["status", "is_active"])
-    elif new_status in {CampaignRunStatus.FINISHED, CampaignRunStatus.FAILED}:
-        campaign.status = (
-            CampaignStatus.FINISHED
-            if new_status == CampaignRunStatus.FINISHED
-            else CampaignStatus.FAILED
+    campaign_state = {
+        CampaignRunStatus.RUNNING: (CampaignStatus.RUNNING, True),
+        CampaignRunStatus.FINISHED: (CampaignStatus.FINISHED, False),
+        CampaignRunStatus.FAILED: (CampaignStatus.FAILED, False),
+    }[new_status]
+    # Saving an unchanged campaign would also invalidate every worker's run snapshot.
+    if (campaign.status, campaign.is_active) != campaign_state:
+        campaign.status, campaign.is_active = campaign_state
+        campaign.save(update_fields=["status", "is_active"])
+
+
+def _claim_due_messages(
+    run_id, now, limit: int, shards: Optional[Sequence[int]] = None
+) -> List[int]:
+    """Atomically move up to ``limit`` due messages of a run from PENDING to QUEUED.
+
+    With ``shards`` only messages whose ``id % DISPATCH_SHARDS`` is among them are
+    claimed. Rows locked by a concurrent dispatcher are skipped rather than waited for.
+    """
+    due = (
+        Message.objects.select_for_update(skip_locked=True, of=("self",))
+        .filter(run_id=run_id, status=MessageStatus.PENDING, planned_send_at__lte=now)
+        .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+    )
+    if shards is not None:
+        due = due.alias(shard=Mod("id", settings.DISPATCH_SHARDS)).filter(shard__in=shards)
+    with transaction.atomic():
+        message_ids = list(
+            due.order_by("planned_send_at", "id").values_list("id", flat=True)[:limit]
         )
-        campaign.is_active = False
-        campaign_updates.extend(["status", "is_active"])
+        if message_ids:
+            Message.objects.filter(pk__in=message_ids).update(status=MessageStatus.QUEUED)
+    return message_ids
 
-    if campaign_updates:
-        campaign.save(update_fields=campaign_updates)
 
+def dispatch_round(shards: Optional[Sequence[int]] = None) -> Tuple[int, bool]:
+    """Queue due messages, interleaving running runs by deficit round-robin.
 
-@shared_task(bind=True)
-def dispatch_due_messages(self) -> None:
+    Every round a run earns ``DISPATCH_QUANTUM * campaign.weight`` sends, so a small
+    urgent run is drained in its first rounds no matter how large its neighbours are.
+    At most ``DISPATCH_BATCH_SIZE`` messages are queued; with ``shards`` only those
+    dispatch shards are considered. Returns how many were queued and whether due
+    work remains.
+    """
     now = timezone.now()
-    due_messages = (
-        Message.objects.select_related("campaign", "run")
-        .filter(status=MessageStatus.PENDING, planned_send_at__lte=now)
-        .iterator()
+    active = deque(
+        CampaignRun.objects.filter(status=CampaignRunStatus.RUNNING)
+        .order_by("campaign__priority", "started_at")
+        .values_list("id", "campaign__weight", "campaign__priority")
     )
+    budget = settings.DISPATCH_BATCH_SIZE
+    deficits: Dict[UUID, int] = defaultdict(int)
 
-    for message in due_messages:
-        with transaction.atomic():
-            updated = Message.objects.filter(pk=message.id, status=MessageStatus.PENDING).update(
-                status=MessageStatus.QUEUED
+    while active and budget > 0:
+        run_id, weight, priority = active.popleft()
+        deficits[run_id] += settings.DISPATCH_QUANTUM * max(weight, 1)
+        limit = min(deficits[run_id], budget)
+        message_ids = _claim_due_messages(run_id, now, limit, shards)
+        budget -= len(message_ids)
+        metrics.record(run_id, "queued", len(message_ids))
+        for message_id in message_ids:
+            send_message_async.apply_async(args=[message_id], priority=priority)
+        if len(message_ids) < limit:
+            # Nothing more is due for this run; an idle run keeps no credit.
+            continue
+        deficits[run_id] -= len(message_ids)
+        active.append((run_id, weight, priority))
+
+    return settings.DISPATCH_BATCH_SIZE - budget, bool(active)
+
+
+@shared_task(bind=True)
+def dispatch_due_messages(self) -> None:
+    """Queue due messages unless sharded ``run_dispatcher`` processes are doing it.
+
+    Re-enqueues itself while work remains. Nothing is queued while the provider
+    circuit is open.
+    """
+    if provider_breaker.is_open():
+        logger.info("Provider circuit is open, dispatch skipped.")
+        return
+    if live_dispatchers().exists():
+        return
+
+    _, more = dispatch_round()
+    if more:
+        dispatch_due_messages.delay()
+
+
+def _apply_send_outcomes(outcomes: List[dict]) -> None:
+    """Write buffered send outcomes: one UPDATE per status, one refresh per run.
+
+    SENT is terminal and wins over FAILED for the same message, so applying a batch
+    twice (a flusher that died before acknowledging it) changes nothing.
+    """
+    final: Dict[int, str] = {}
+    run_ids = set()
+    for outcome in outcomes:
+        if final.get(outcome["id"]) != MessageStatus.SENT:
+            final[outcome["id"]] = outcome["status"]
+        run_ids.add(outcome["run"])
+
+    by_status: Dict[str, List[int]] = defaultdict(list)
+    for message_id, message_status in final.items():
+        by_status[message_status].append(message_id)
+    with transaction.atomic():
+        for message_status, message_ids in by_status.items():
+            Message.objects.filter(pk__in=message_ids).exclude(status=MessageStatus.SENT).update(
+                status=message_status
             )
-            if not updated:
-                continue
-        send_message_async.delay(message.id)
 
+    for run in CampaignRun.objects.filter(pk__in=run_ids).select_related("campaign"):
+        refresh_run_status(run)
 
-@shared_task(
-    bind=True, autoretry_for=(Exception,), retry_backoff=True, retry_kwargs={"max_retries": 3}
+
+status_writer = BufferedWriter(
+    "send-status",
+    _apply_send_outcomes,
+    batch_size=settings.SEND_STATUS_FLUSH_BATCH_SIZE,
+    interval=settings.SEND_STATUS_FLUSH_INTERVAL,
+)
+
+
+def _park_message(message: Message) -> None:
+    # Dispatch picks the message up again once the run is resumed.
+    if message.status != MessageStatus.PENDING:
+        message.status = MessageStatus.PENDING
+        message.save(update_fields=["status"])
+
+
+def _record_outcome(message: Message, message_status: str) -> None:
+    if settings.SEND_STATUS_WRITE_BEHIND:
+        status_writer.add(
+            [{"id": message.id, "status": message_status, "run": str(message.run_id)}]
+        )
+        return
+    message.status = message_status
+    message.save(update_fields=["status"])
+
+
+def _retry_delay(attempts: int) -> float:
+    """Exponential backoff with full jitter, so retries of an outage do not stampede."""
+    ceiling = min(
+        settings.SEND_RETRY_MAX_DELAY, settings.SEND_RETRY_BASE_DELAY * 2 ** (attempts - 1)
+    )
+    return random.uniform(0, ceiling)
+
+
+def _reschedule(message: Message, not_before: datetime) -> None:
+    """Hand the message back to dispatch at the first allowed instant after ``not_before``.
+
+    A message whose campaign window has closed by then is failed for good.
+    """
+    retry_at = next_send_at(message.campaign, message.client.timezone, not_before=not_before)
+    message.status = MessageStatus.PENDING if retry_at else MessageStatus.FAILED
+    message.next_attempt_at = retry_at
+    message.save(update_fields=["status", "attempts", "next_attempt_at", "last_error"])
+
+
+def _schedule_retry(message: Message, exc: Exception) -> None:
+    message.attempts += 1
+    message.last_error = f"{type(exc).__name__}: {exc}"[:1000]
+    if message.attempts >= settings.SEND_MAX_ATTEMPTS:
+        message.status = MessageStatus.FAILED
+        message.next_attempt_at = None
+        message.save(update_fields=["status", "attempts", "next_attempt_at", "last_error"])
+        return
+    _reschedule(message, timezone.now() + timedelta(seconds=_retry_delay(message.attempts)))
+
+
+# Everything a send reads or writes; campaign and run come from ``run_snapshots``.
+_SEND_FIELDS = (
+    "status",
+    "campaign",
+    "run",
+    "message_text",
+    "attempts",
+    "next_attempt_at",
+    "last_error",
+    "client__phone_number",
+    "client__timezone",
+    "client__deleted_at",
 )
+
+
+def _send_queryset():
+    # A pause or a delete must stop sends at once, even where the snapshot cache is not
+    # shared: the run status and campaign deletion are read with the message itself.
+    return (
+        Message.objects.select_related("client")
+        .only(*_SEND_FIELDS)
+        .annotate(
+            current_run_status=F("run__status"),
+            current_campaign_deleted_at=F("campaign__deleted_at"),
+        )
+    )
+
+
+def _attach_snapshot(message: Message) -> Message:
+    run = run_snapshots.get(message.run_id, message.campaign_id)
+    if (
+        run.status != message.current_run_status
+        or run.campaign.deleted_at != message.current_campaign_deleted_at
+    ):
+        run_snapshots.discard(message.run_id)
+        run = run_snapshots.get(message.run_id, message.campaign_id)
+    message.run = run
+    message.campaign = run.campaign
+    return message
+
+
+def _is_deleted(message: Message) -> bool:
+    # Soft-deleted: purge_deleted_objects removes the message soon, never send it.
+    return message.campaign.deleted_at is not None or message.client.deleted_at is not None
+
+
+@shared_task(bind=True)
 def send_message_async(self, message_id: int) -> None:
     try:
-        message = Message.objects.select_related("campaign", "client", "run").get(pk=message_id)
+        if settings.SEND_STATUS_WRITE_BEHIND:
+            # Dispatch already marked the message QUEUED; the outcome is the only write.
+            message = _attach_snapshot(_send_queryset().get(pk=message_id))
+            if message.status == MessageStatus.SENT or _is_deleted(message):
+                return
+            if message.run.status == CampaignRunStatus.PAUSED:
+                _park_message(message)
+                return
+        else:
+            with transaction.atomic():
+                message = _attach_snapshot(
+                    _send_queryset().select_for_update(of=("self",)).get(pk=message_id)
+                )
+                if _is_deleted(message):
+                    return
+                if message.status == MessageStatus.SENT:
+                    refresh_run_status(message.run)
+                    return
+                if message.run.status == CampaignRunStatus.PAUSED:
+                    _park_message(message)
+                    return
+                if message.status != MessageStatus.QUEUED:
+                    message.status = MessageStatus.QUEUED
+                    message.save(update_fields=["status"])
     except Message.DoesNotExist:
         logger.warning("Message with id %s does not exist.", message_id)
         return
 
-    with transaction.atomic():
-        message = (
-            Message.objects.select_for_update()
-            .select_related("campaign", "client", "run")
-            .get(pk=message_id)
-        )
-        if message.status == MessageStatus.SENT:
-            _refresh_run_status(message.run)
-            return
-        if message.status != MessageStatus.QUEUED:
-            message.status = MessageStatus.QUEUED
-            message.save(update_fields=["status"])
+    if not provider_breaker.allow():
+        # Spread the held-back messages over one cooldown past the circuit's reopening.
+        until = provider_breaker.open_until() or timezone.now().timestamp()
+        until += random.uniform(0, provider_breaker.cooldown)
+        _reschedule(message, datetime.fromtimestamp(until, tz=dt_timezone.utc))
+        return
 
     try:
         send_message_to_external_service(message, message.campaign)
     except Exception as exc:  # noqa: BLE001
         logger.error("Failed to send message %s: %s", message.id, exc)
-        message.status = MessageStatus.FAILED
-        message.save(update_fields=["status"])
-        raise
+        provider_breaker.record_failure()
+        metrics.record(message.run_id, "failed")
+        _schedule_retry(message, exc)
     else:
-        message.status = MessageStatus.SENT
-        message.save(update_fields=["status"])
+        provider_breaker.record_success()
+        metrics.record(message.run_id, "sent")
+        _record_outcome(message, MessageStatus.SENT)
     finally:
-        _refresh_run_status(message.run)
+        # With write-behind only a final failure changes the run state synchronously.
+        if not settings.SEND_STATUS_WRITE_BEHIND or message.status == MessageStatus.FAILED:
+            refresh_run_status(message.run)
+
+
+def _materialize_messages(campaign, run: CampaignRun, recipients) -> None:
+    """Bulk-insert one message per planned recipient; re-running the same run is a no-op."""
+    planned = plan_send_times(campaign, recipients)
+    batch_size = settings.MATERIALIZE_BATCH_SIZE
+    while True:
+        batch = [
+            Message(
+                campaign=campaign,
+                client_id=client_id,
+                run=run,
+                message_text=campaign.text_message,
+                planned_send_at=planned_send_at,
+            )
+            for client_id, planned_send_at in islice(planned, batch_size)
+        ]
+        if not batch:
+            return
+        Message.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def _materialize(campaign, run: CampaignRun, recipients) -> None:
+    if settings.MATERIALIZE_ENGINE == "sql" and supports_sql_materialization(campaign):
+        insert_messages(campaign, run, recipients)
+    else:
+        _materialize_messages(campaign, run, recipients)
 
 
 @shared_task(bind=True)
@@ -138,28 +390,31 @@ def start_campaign_async(self, run_id: str) -> None:
 
         if run.status in {CampaignRunStatus.FINISHED, CampaignRunStatus.FAILED}:
             return
+        if run.started_at is not None:
+            # Already materialized by an earlier delivery of this task.
+            return
 
         now = timezone.now()
-        for client in recipients:
-            planned = calculate_planned_send_at(campaign, client)
-            if planned is None:
-                continue
-            Message.objects.get_or_create(
-                campaign=campaign,
-                client=client,
-                run=run,
-                defaults={
-                    "message_text": campaign.text_message,
-                    "planned_send_at": planned,
-                },
-            )
+        if not run.force_resend:
+            recipients = undelivered_recipients(campaign, recipients)
+        _materialize(campaign, run, recipients)
 
         if not run.messages.exists():
-            run.status = CampaignRunStatus.FAILED
+            # A delta re-run with nothing left to deliver is complete, not failed. One
+            # whose undelivered recipients no longer fit before end_datetime has failed.
+            unplanned = recipients.exists()
+            if unplanned:
+                logger.warning("Run %s planned none of its recipients before end_datetime.", run.id)
+            delivered = (
+                not run.force_resend
+                and not unplanned
+                and campaign.messages.filter(status=MessageStatus.SENT).exists()
+            )
+            run.status = CampaignRunStatus.FINISHED if delivered else CampaignRunStatus.FAILED
             run.finished_at = now
             run.save(update_fields=["status", "finished_at"])
             if campaign.active_run_id == run.id:
-                campaign.status = CampaignStatus.FAILED
+                campaign.status = CampaignStatus.FINISHED if delivered else CampaignStatus.FAILED
                 campaign.is_active = False
                 campaign.save(update_fields=["status", "is_active"])
             return
@@ -175,3 +430,106 @@ def start_campaign_async(self, run_id: str) -> None:
         campaign.save(update_fields=["status", "is_active", "last_started_at", "active_run"])
 
     dispatch_due_messages.delay()
+
+
+@shared_task(bind=True)
+def start_scheduled_runs(self) -> int:
+    """Claim scheduled runs whose ``start_at`` has passed and hand them to workers.
+
+    Scheduled starts live in the database instead of as broker ETA tasks, so worker
+    memory does not grow with the number of queued campaigns. A claim that was not
+    followed by a start within ``SCHEDULED_START_CLAIM_TIMEOUT`` is retried;
+    ``start_campaign_async`` skips runs that have already started.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.SCHEDULED_START_CLAIM_TIMEOUT)
+    with transaction.atomic():
+        due = list(
+            CampaignRun.objects.select_for_update(skip_locked=True, of=("self",))
+            .filter(status=CampaignRunStatus.SCHEDULED, start_at__lte=now)
+            .filter(Q(claimed_at__isnull=True) | Q(claimed_at__lt=stale))
+            .order_by("start_at")
+            .values_list("id", "campaign__priority")[: settings.SCHEDULED_START_BATCH_SIZE]
+        )
+        if not due:
+            return 0
+        CampaignRun.objects.filter(pk__in=[run_id for run_id, _ in due]).update(claimed_at=now)
+        for run_id, priority in due:
+            transaction.on_commit(
+                partial(start_campaign_async.apply_async, args=[str(run_id)], priority=priority)
+            )
+    logger.info("Claimed %s scheduled campaign runs.", len(due))
+    return len(due)
+
+
+@shared_task(bind=True)
+def prune_throughput(self) -> int:
+    """Drop throughput buckets older than ``THROUGHPUT_RETENTION_DAYS``."""
+    cutoff = timezone.now() - timedelta(days=settings.THROUGHPUT_RETENTION_DAYS)
+    deleted, _ = RunThroughput.objects.filter(bucket__lt=cutoff).delete()
+    if deleted:
+        logger.info("Pruned %s throughput buckets older than %s.", deleted, cutoff)
+    return deleted
+
+
+def _purge_step(job: DeletionJob) -> None:
+    """Delete one batch of the job's messages, or, once none are left, the object itself."""
+    messages = Message.objects.filter(**{f"{job.target}_id": job.object_id})
+    if job.status == DeletionStatus.PENDING:
+        job.status = DeletionStatus.RUNNING
+        job.total = messages.count()
+
+    batch = list(
+        messages.order_by().values_list("id", "run_id", "status")[: settings.DELETION_BATCH_SIZE]
+    )
+    if batch:
+        # Message has no dependents or delete signals, so this is one DELETE statement.
+        deleted, _ = Message.objects.filter(pk__in=[row[0] for row in batch]).delete()
+        job.deleted += deleted
+        job.save(update_fields=["status", "total", "deleted", "updated_at"])
+        if job.target == DeletionTarget.CLIENT:
+            # Runs that were waiting on the client's unsent messages may be done now.
+            unsent = {MessageStatus.PENDING, MessageStatus.QUEUED}
+            run_ids = {run_id for _, run_id, status in batch if status in unsent}
+            for run in CampaignRun.objects.filter(pk__in=run_ids).select_related("campaign"):
+                refresh_run_status(run)
+        return
+
+    if job.target == DeletionTarget.CAMPAIGN:
+        runs = CampaignRun.objects.filter(campaign_id=job.object_id)
+        RunThroughput.objects.filter(run__in=runs).delete()
+        Newsletter.all_objects.filter(pk=job.object_id).update(active_run=None)
+        runs.delete()
+        Newsletter.all_objects.filter(pk=job.object_id).delete()
+    else:
+        Client.all_objects.filter(pk=job.object_id).delete()
+    job.status = DeletionStatus.FINISHED
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "total", "finished_at", "updated_at"])
+
+
+@shared_task(bind=True)
+def purge_deleted_objects(self) -> int:
+    """Remove soft-deleted clients and campaigns in ``DELETION_BATCH_SIZE`` batches.
+
+    Every batch is its own transaction holding the job row, so deletes never lock
+    tables for long, concurrent purges split the jobs between them, and a purge that
+    dies mid-way resumes where it stopped. After ``DELETION_TASK_TIME_LIMIT`` seconds
+    the task re-queues itself instead of holding a worker.
+    """
+    deadline = time.monotonic() + settings.DELETION_TASK_TIME_LIMIT
+    steps = 0
+    while time.monotonic() < deadline:
+        with transaction.atomic():
+            job = (
+                DeletionJob.objects.select_for_update(skip_locked=True)
+                .filter(finished_at__isnull=True)
+                .order_by("created_at")
+                .first()
+            )
+            if job is None:
+                return steps
+            _purge_step(job)
+        steps += 1
+    purge_deleted_objects.delay()
+    return steps
@@ -1,14 +1,16 @@
-from datetime import time, timedelta
+from datetime import datetime, time, timedelta
 from zoneinfo import ZoneInfo
 
 import pytest
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import override_settings
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from api.materialize import insert_messages
 from api.models import (
     CampaignRun,
     CampaignRunStatus,
@@ -19,10 +21,17 @@ from api.models import (
     Newsletter,
 )
 from api.serializers import ClientSerializer
+from api.snapshots import run_snapshots
 from api.tasks import dispatch_due_messages, start_campaign_async
 from api.utils import campaign_recipients
 
 
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+    run_snapshots.clear()
+
+
 @pytest.fixture
 def api_client():
     return APIClient()
@@ -223,7 +232,9 @@ def test_start_before_window_moves_to_next_slot(auth_client):
     assert time(9, 0) <= local_time.time() <= time(17, 0)
 
 
-@override_settings(CELERY_TASK_ALWAYS_EAGER=True, CELERY_TASK_EAGER_PROPAGATES=False)
+@override_settings(
+    CELERY_TASK_ALWAYS_EAGER=True, CELERY_TASK_EAGER_PROPAGATES=False, SEND_MAX_ATTEMPTS=1
+)
 @pytest.mark.django_db
 def test_provider_failure_marks_failed_without_duplicates(auth_client):
     client = create_client(tag="vip")
@@ -251,3 +262,1205 @@ def test_provider_failure_marks_failed_without_duplicates(auth_client):
     assert Message.objects.count() == 1
     assert message.status == MessageStatus.FAILED
     assert run.status in {CampaignRunStatus.FAILED, CampaignRunStatus.RUNNING}
+
+
+def test_profile_writes_collapsed_stacks_and_merges(tmp_path):
+    from django.core.management import call_command
+
+    from api import profiling
+
+    def busy():
+        return sum(i * i for i in range(2000))
+
+    with override_settings(PROFILE_DIR=str(tmp_path)):
+        for _ in range(2):
+            with profiling.profile("api.tasks.send_message_async"):
+                busy()
+
+    files = list(tmp_path.glob("api.tasks.send_message_async-*.collapsed"))
+    assert files
+    assert any("busy" in path.read_text() for path in files)
+
+    merged = tmp_path / "merged.txt"
+    call_command("merge_profiles", dir=str(tmp_path), match="api.tasks.*", output=str(merged))
+    lines = merged.read_text().splitlines()
+    assert lines
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+@pytest.mark.django_db
+def test_profiling_middleware_samples_matching_paths(tmp_path):
+    user = User.objects.create_user(username="profiler", password="secret")
+    campaign = create_campaign()
+
+    with override_settings(PROFILE_DIR=str(tmp_path), PROFILE_URLS={"*/stats/": 1}):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        client.get(reverse("campaign-list-create"))
+        assert not list(tmp_path.iterdir())
+        response = client.get(reverse("campaign-stats-detail", args=[campaign.id]))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(list(tmp_path.glob("*.collapsed"))) == 1
+
+
+@pytest.mark.django_db
+def test_async_stats_requires_auth_and_matches_sync_view(auth_client):
+    from django.test import Client as DjangoClient
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    create_client(tag="vip")
+    campaign = create_campaign()
+
+    anonymous = DjangoClient().get(reverse("async-campaign-stats-detail", args=[campaign.id]))
+    assert anonymous.status_code == status.HTTP_401_UNAUTHORIZED
+    assert anonymous["WWW-Authenticate"].startswith("Bearer")
+
+    user = User.objects.get(username="tester")
+    jwt_client = DjangoClient(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+    async_resp = jwt_client.get(reverse("async-campaign-stats-detail", args=[campaign.id]))
+    sync_resp = auth_client.get(reverse("campaign-stats-detail", args=[campaign.id]))
+
+    assert async_resp.status_code == status.HTTP_200_OK
+    assert async_resp.json() == sync_resp.json()
+    assert async_resp.json()["eligible_clients"] == 1
+
+    missing = jwt_client.get(reverse("async-campaign-stats-detail", args=[campaign.id + 100]))
+    assert missing.status_code == status.HTTP_404_NOT_FOUND
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True, CELERY_TASK_EAGER_PROPAGATES=True)
+@pytest.mark.django_db
+def test_async_detail_and_start(auth_client):
+    from django.test import Client as DjangoClient
+
+    create_client(tag="vip")
+    campaign = create_campaign()
+    session_client = DjangoClient()
+    session_client.force_login(User.objects.create_user(username="session", password="x"))
+
+    detail = session_client.get(reverse("async-campaign-detail", args=[campaign.id]))
+    assert detail.status_code == status.HTTP_200_OK
+    assert detail.json() == auth_client.get(reverse("campaign-detail", args=[campaign.id])).json()
+
+    started = session_client.post(
+        reverse("async-campaign-start", args=[campaign.id]), {}, content_type="application/json"
+    )
+    assert started.status_code == status.HTTP_202_ACCEPTED
+    assert CampaignRun.objects.filter(pk=started.json()["run_id"]).exists()
+
+    again = session_client.post(reverse("async-campaign-start", args=[campaign.id]))
+    assert again.status_code == status.HTTP_409_CONFLICT
+
+
+@pytest.mark.django_db
+def test_worker_process_init_preloads_client_timezones():
+    from unittest import mock
+
+    from api import worker
+    from api.utils import _as_zoneinfo
+
+    create_client(phone_number="79000000001", timezone_name="Asia/Vladivostok")
+    create_client(phone_number="79000000002", timezone_name="Europe/Moscow")
+    _as_zoneinfo.cache_clear()
+
+    assert worker.preload_timezones() == 3
+    assert _as_zoneinfo.cache_info().currsize == 3
+    assert _as_zoneinfo("Europe/Moscow") is ZoneInfo("Europe/Moscow")
+
+    with mock.patch("api.buffers.BufferedWriter.start_background_flush") as start_flush:
+        worker.process_init()
+    start_flush.assert_called_once_with()  # throughput counters
+    assert _as_zoneinfo.cache_info().hits >= 1
+
+
+def test_tasks_are_routed_to_workload_queues():
+    from Work.celery import app
+
+    router = app.amqp.router
+    assert router.route({}, "api.tasks.send_message_async")["queue"].name == "send"
+    assert router.route({}, "api.tasks.dispatch_due_messages")["queue"].name == "dispatch"
+    assert router.route({}, "api.tasks.start_campaign_async")["queue"].name == "campaigns"
+
+
+@pytest.mark.django_db
+def test_dispatch_sends_with_campaign_priority():
+    from unittest import mock
+
+    from api.models import CampaignPriority
+
+    client = create_client(tag="vip")
+    campaign = create_campaign(priority=CampaignPriority.TRANSACTIONAL)
+    run = CampaignRun.objects.create(campaign=campaign, status=CampaignRunStatus.RUNNING)
+    message = Message.objects.create(
+        campaign=campaign, client=client, run=run, message_text="Hi", planned_send_at=timezone.now()
+    )
+
+    with mock.patch("api.tasks.send_message_async.apply_async") as apply_async:
+        dispatch_due_messages()
+
+    apply_async.assert_called_once_with(args=[message.id], priority=CampaignPriority.TRANSACTIONAL)
+    message.refresh_from_db()
+    assert message.status == MessageStatus.QUEUED
+
+
+def _running_run_with_messages(campaign, count, phone_prefix):
+    run = CampaignRun.objects.create(campaign=campaign, status=CampaignRunStatus.RUNNING)
+    due = timezone.now() - timedelta(minutes=1)
+    for index in range(count):
+        client = create_client(phone_number=f"{phone_prefix}{index:04d}")
+        Message.objects.create(
+            campaign=campaign, client=client, run=run, message_text="Hi", planned_send_at=due
+        )
+    return run
+
+
+@override_settings(DISPATCH_QUANTUM=5, DISPATCH_BATCH_SIZE=20)
+@pytest.mark.django_db
+def test_dispatch_interleaves_runs_by_weight():
+    from unittest import mock
+
+    bulk = _running_run_with_messages(create_campaign(weight=1), 40, "7900000")
+    urgent = _running_run_with_messages(create_campaign(weight=2), 8, "7911111")
+
+    with (
+        mock.patch("api.tasks.send_message_async.apply_async"),
+        mock.patch("api.tasks.dispatch_due_messages.delay") as redispatch,
+    ):
+        dispatch_due_messages()
+
+    queued = Message.objects.filter(status=MessageStatus.QUEUED)
+    assert queued.count() == 20
+    assert queued.filter(run=urgent).count() == 8
+    assert queued.filter(run=bulk).count() == 12
+    redispatch.assert_called_once_with()
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True, CELERY_TASK_EAGER_PROPAGATES=True)
+@pytest.mark.django_db
+def test_max_rate_staggers_planned_send_at_within_window():
+    from api.models import CampaignRunStatus as RunStatus
+
+    for index in range(6):
+        create_client(phone_number=f"7900000000{index}", timezone_name="UTC")
+    for index in range(4):
+        create_client(phone_number=f"7910000000{index}", timezone_name="Europe/Moscow")
+    now = timezone.now()
+    campaign = create_campaign(
+        start_datetime=now - timedelta(minutes=1),
+        end_datetime=now + timedelta(seconds=3),
+        max_rate=2,
+    )
+    run = CampaignRun.objects.create(campaign=campaign, status=RunStatus.RUNNING)
+
+    start_campaign_async(str(run.id))
+
+    planned = sorted(Message.objects.values_list("planned_send_at", flat=True))
+    # At most four seconds of window at two sends per second for ten recipients.
+    assert 0 < len(planned) <= 8
+    assert all(moment <= campaign.end_datetime for moment in planned)
+    per_second = {}
+    for moment in planned:
+        per_second[int(moment.timestamp())] = per_second.get(int(moment.timestamp()), 0) + 1
+    assert max(per_second.values()) <= 2
+    assert len(set(planned)) == len(planned)
+
+
+@pytest.mark.django_db
+def test_recipients_past_the_rate_capacity_are_counted_and_logged():
+    from unittest import mock
+
+    from api.utils import campaign_recipients, plan_send_times
+
+    for index in range(10):
+        create_client(phone_number=f"7900000000{index}", timezone_name="UTC")
+    start = datetime(2030, 1, 1, tzinfo=ZoneInfo("UTC"))
+    campaign = create_campaign(
+        start_datetime=start, end_datetime=start + timedelta(seconds=2), max_rate=1
+    )
+
+    with mock.patch("api.utils.logger") as logger:
+        planned = list(plan_send_times(campaign, campaign_recipients(campaign)))
+    assert 0 < len(planned) < 10
+    logger.warning.assert_called_once_with(mock.ANY, 10 - len(planned), 10, campaign.pk)
+
+
+@pytest.mark.django_db
+def test_send_rate_shaper_shares_seconds_between_zones():
+    from api.utils import SendRateShaper
+
+    now = timezone.now()
+    campaign = create_campaign(end_datetime=now + timedelta(hours=1), max_rate=3)
+    shaper = SendRateShaper(campaign, 3)
+
+    utc_times = list(shaper.times("UTC", 4))
+    other_times = list(shaper.times("Europe/London", 4))
+
+    assert len(utc_times) == len(other_times) == 4
+    merged = sorted(utc_times + other_times)
+    buckets = {}
+    for moment in merged:
+        buckets[int(moment.timestamp())] = buckets.get(int(moment.timestamp()), 0) + 1
+    assert max(buckets.values()) <= 3
+    assert merged[-1] - merged[0] >= timedelta(seconds=2)
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True, CELERY_TASK_EAGER_PROPAGATES=True)
+@pytest.mark.django_db
+def test_rerun_materializes_only_undelivered_recipients():
+    from unittest import mock
+
+    clients = [create_client(phone_number=f"7900000000{index}") for index in range(3)]
+    campaign = create_campaign()
+
+    def start(force_resend):
+        run = CampaignRun.objects.create(
+            campaign=campaign, status=CampaignRunStatus.RUNNING, force_resend=force_resend
+        )
+        with mock.patch("api.tasks.dispatch_due_messages.delay"):
+            start_campaign_async(str(run.id))
+        run.refresh_from_db()
+        return run
+
+    first = start(force_resend=False)
+    assert first.messages.count() == 3
+    first.messages.filter(client__in=clients[:2]).update(status=MessageStatus.SENT)
+
+    delta = start(force_resend=False)
+    assert list(delta.messages.values_list("client_id", flat=True)) == [clients[2].id]
+
+    forced = start(force_resend=True)
+    assert forced.messages.count() == 3
+
+    # The third client is still undelivered, but its window has closed.
+    campaign.end_datetime = timezone.now() - timedelta(seconds=1)
+    campaign.save(update_fields=["end_datetime"])
+    late = start(force_resend=False)
+    assert late.messages.count() == 0
+    assert late.status == CampaignRunStatus.FAILED
+
+    Message.objects.update(status=MessageStatus.SENT)
+    done = start(force_resend=False)
+    assert done.messages.count() == 0
+    assert done.status == CampaignRunStatus.FINISHED
+
+
+@pytest.mark.django_db
+def test_pause_and_resume_gate_dispatch_and_sends(auth_client, django_capture_on_commit_callbacks):
+    from unittest import mock
+
+    from api.tasks import send_message_async
+
+    campaign = create_campaign()
+    run = _running_run_with_messages(campaign, 3, "7900000")
+    campaign.active_run = run
+    campaign.status = CampaignStatus.RUNNING
+    campaign.save(update_fields=["active_run", "status"])
+    in_flight = run.messages.first()
+    Message.objects.filter(pk=in_flight.pk).update(status=MessageStatus.QUEUED)
+
+    with mock.patch("api.views.dispatch_due_messages.delay"):
+        paused = auth_client.post(reverse("campaign-pause", args=[campaign.id]))
+        assert paused.status_code == status.HTTP_200_OK
+        again = auth_client.post(reverse("campaign-pause", args=[campaign.id]))
+        assert again.status_code == status.HTTP_409_CONFLICT
+
+    run.refresh_from_db()
+    campaign.refresh_from_db()
+    assert run.status == CampaignRunStatus.PAUSED
+    assert campaign.status == CampaignStatus.PAUSED
+
+    with mock.patch("api.tasks.send_message_async.apply_async") as apply_async:
+        dispatch_due_messages()
+    apply_async.assert_not_called()
+
+    with mock.patch("api.tasks.send_message_to_external_service") as provider:
+        send_message_async(in_flight.id)
+    provider.assert_not_called()
+    in_flight.refresh_from_db()
+    assert in_flight.status == MessageStatus.PENDING
+
+    with mock.patch("api.views.dispatch_due_messages.delay") as redispatch:
+        with django_capture_on_commit_callbacks(execute=True):
+            resumed = auth_client.post(reverse("campaign-resume", args=[campaign.id]))
+    assert resumed.status_code == status.HTTP_200_OK
+    redispatch.assert_called_once_with()
+    run.refresh_from_db()
+    assert run.status == CampaignRunStatus.RUNNING
+
+    with mock.patch("api.tasks.send_message_async.apply_async") as apply_async:
+        dispatch_due_messages()
+    assert apply_async.call_count == 3
+
+
+@pytest.mark.django_db
+def test_future_runs_are_claimed_from_the_database_once(
+    auth_client, django_capture_on_commit_callbacks
+):
+    from unittest import mock
+
+    from api.tasks import start_scheduled_runs
+
+    create_client(tag="vip")
+    now = timezone.now()
+    campaign = create_campaign(
+        start_datetime=now + timedelta(days=2), end_datetime=now + timedelta(days=3)
+    )
+
+    with mock.patch("api.views.start_campaign_async.apply_async") as eta_task:
+        with django_capture_on_commit_callbacks(execute=True):
+            response = auth_client.post(reverse("campaign-start", args=[campaign.id]))
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    eta_task.assert_not_called()
+
+    run = CampaignRun.objects.get(pk=response.json()["run_id"])
+    assert run.status == CampaignRunStatus.SCHEDULED
+    assert run.start_at == campaign.start_datetime
+    assert start_scheduled_runs() == 0
+
+    CampaignRun.objects.filter(pk=run.pk).update(start_at=now - timedelta(seconds=1))
+    with mock.patch("api.tasks.start_campaign_async.apply_async") as start:
+        with django_capture_on_commit_callbacks(execute=True):
+            assert start_scheduled_runs() == 1
+            assert start_scheduled_runs() == 0
+    start.assert_called_once_with(args=[str(run.id)], priority=campaign.priority)
+
+    with override_settings(SCHEDULED_START_CLAIM_TIMEOUT=0):
+        CampaignRun.objects.filter(pk=run.pk).update(claimed_at=now - timedelta(minutes=1))
+        with mock.patch("api.tasks.start_campaign_async.apply_async"):
+            assert start_scheduled_runs() == 1
+
+
+@pytest.mark.django_db
+def test_receipts_are_updated_in_full_chunks_without_a_parameter_limit():
+    from unittest import mock
+
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from api.services import apply_delivery_receipts
+
+    # PostgreSQL reports no max_query_params; that must not shrink the chunks.
+    receipts = [{"id": pk, "status": "DELIVERED", "at": "2030-01-01T00:00:00Z"} for pk in range(5)]
+    with (
+        mock.patch.object(connection.features, "max_query_params", None),
+        mock.patch("api.services.RECEIPT_UPDATE_CHUNK", 2),
+        CaptureQueriesContext(connection) as queries,
+    ):
+        apply_delivery_receipts(receipts)
+    assert len([query for query in queries if "UPDATE" in query["sql"]]) == 3
+
+
+@pytest.mark.django_db
+def test_delivery_receipts_are_buffered_and_applied_in_bulk(auth_client):
+    from api.models import DeliveryStatus
+    from api.services import receipt_writer
+
+    campaign = create_campaign()
+    run = CampaignRun.objects.create(campaign=campaign, status=CampaignRunStatus.RUNNING)
+    first, second = (
+        Message.objects.create(
+            campaign=campaign,
+            client=create_client(phone_number=f"7900000000{i}"),
+            run=run,
+            message_text="Hello",
+            status=MessageStatus.SENT,
+        )
+        for i in range(2)
+    )
+    now = timezone.now()
+
+    response = auth_client.post(
+        reverse("delivery-receipts"),
+        {
+            "receipts": [
+                {"message_id": first.id, "status": "UNDELIVERED", "timestamp": now.isoformat()},
+                {"message_id": second.id, "status": "DELIVERED"},
+            ]
+        },
+        format="json",
+    )
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.json() == {"accepted": 2}
+
+    # A late report older than the stored one must not win, even when replayed.
+    stale = (now - timedelta(minutes=1)).isoformat()
+    auth_client.post(
+        reverse("delivery-receipts"),
+        {"message_id": first.id, "status": "DELIVERED", "timestamp": stale},
+        format="json",
+    )
+    receipt_writer.flush()
+
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert first.delivery_status == DeliveryStatus.UNDELIVERED
+    assert first.delivery_updated_at == now
+    assert second.delivery_status == DeliveryStatus.DELIVERED
+
+    response = auth_client.post(
+        reverse("delivery-receipts"), {"message_id": first.id, "status": "LOST"}, format="json"
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@override_settings(SEND_STATUS_WRITE_BEHIND=True)
+@pytest.mark.django_db
+def test_write_behind_batches_send_outcomes(django_assert_max_num_queries):
+    from unittest import mock
+
+    from api.tasks import send_message_async, status_writer
+
+    campaign = create_campaign()
+    run = _running_run_with_messages(campaign, 3, "7901")
+    run.messages.update(status=MessageStatus.QUEUED)
+    ids = list(run.messages.values_list("id", flat=True))
+
+    with (
+        mock.patch.object(status_writer, "interval", 3600),
+        mock.patch.object(status_writer, "batch_size", 100),
+        mock.patch("api.tasks.send_message_to_external_service"),
+    ):
+        run_snapshots.warm()  # as worker.process_init does
+        for message_id in ids:
+            with django_assert_max_num_queries(1):
+                send_message_async(message_id)
+        assert not run.messages.exclude(status=MessageStatus.QUEUED).exists()
+
+        # A replayed outcome (redelivered batch) must not downgrade a sent message.
+        status_writer.buffer.push([{"id": ids[0], "status": "FAILED", "run": str(run.id)}])
+        status_writer.flush()
+
+    assert set(run.messages.values_list("status", flat=True)) == {MessageStatus.SENT}
+    run.refresh_from_db()
+    assert run.status == CampaignRunStatus.FINISHED
+
+
+@override_settings(SEND_MAX_ATTEMPTS=3)
+@pytest.mark.django_db
+def test_failed_send_is_retried_from_the_database_behind_a_breaker():
+    from unittest import mock
+
+    from api.services import provider_breaker
+    from api.tasks import send_message_async
+
+    campaign = create_campaign()
+    run = _running_run_with_messages(campaign, 2, "7902")
+    first, second = run.messages.order_by("id")
+
+    with mock.patch("api.tasks.send_message_to_external_service", side_effect=Exception("timeout")):
+        send_message_async(first.id)
+    first.refresh_from_db()
+    assert first.status == MessageStatus.PENDING
+    assert first.attempts == 1
+    assert first.last_error == "Exception: timeout"
+    assert first.next_attempt_at > timezone.now() - timedelta(seconds=1)
+
+    # Not due yet: dispatch only claims the untouched message.
+    with mock.patch("api.tasks.send_message_async.apply_async") as apply_async:
+        Message.objects.filter(pk=first.pk).update(
+            next_attempt_at=timezone.now() + timedelta(minutes=5)
+        )
+        dispatch_due_messages()
+    assert [c.kwargs["args"] for c in apply_async.call_args_list] == [[second.id]]
+
+    with (
+        mock.patch.object(provider_breaker, "threshold", 1),
+        mock.patch("api.tasks.send_message_to_external_service") as provider,
+    ):
+        provider_breaker.record_failure()
+        assert provider_breaker.is_open()
+        with mock.patch("api.tasks.send_message_async.apply_async") as apply_async:
+            dispatch_due_messages()
+        apply_async.assert_not_called()
+
+        send_message_async(second.id)
+        provider.assert_not_called()
+    second.refresh_from_db()
+    assert second.status == MessageStatus.PENDING
+    assert second.attempts == 0
+    assert second.next_attempt_at >= timezone.now() + timedelta(
+        seconds=provider_breaker.cooldown - 5
+    )
+
+
+@pytest.mark.django_db
+def test_throughput_counters_are_bucketed_and_downsampled(auth_client):
+    from unittest import mock
+
+    from api import metrics
+    from api.models import RunThroughput
+    from api.tasks import prune_throughput, send_message_async
+
+    metrics.throughput.flush()
+    campaign = create_campaign()
+    run = _running_run_with_messages(campaign, 3, "7903")
+    campaign.active_run = run
+    campaign.save(update_fields=["active_run"])
+
+    now = timezone.now().timestamp() // 60 * 60 + 30
+    with (
+        mock.patch.object(metrics.throughput, "interval", 3600),
+        mock.patch("api.tasks.send_message_async.apply_async"),
+        mock.patch("api.metrics.time") as clock,
+    ):
+        clock.time.return_value = now
+        dispatch_due_messages()
+        with mock.patch("api.tasks.send_message_to_external_service"):
+            for message in run.messages.all():
+                send_message_async(message.id)
+        hour_ago = now - 3600
+        metrics.record(run.id, "sent", 5, at=hour_ago)
+        metrics.record(run.id, "failed", 1, at=hour_ago + 60)
+        assert not RunThroughput.objects.exists()
+        metrics.throughput.flush()
+        metrics.record(run.id, "sent", 2, at=hour_ago)
+        metrics.throughput.flush()
+
+    assert RunThroughput.objects.filter(run=run).count() == 3
+    url = reverse("campaign-throughput", args=[campaign.id])
+    minutes = auth_client.get(url).json()
+    assert minutes["run"] == str(run.id)
+    assert [(b["queued"], b["sent"], b["failed"]) for b in minutes["buckets"]] == [
+        (0, 7, 0),
+        (0, 0, 1),
+        (3, 3, 0),
+    ]
+    days = auth_client.get(url, {"resolution": "day", "run": str(run.id)}).json()["buckets"]
+    assert sum(b["sent"] for b in days) == 10
+    assert auth_client.get(url, {"resolution": "week"}).status_code == 400
+
+    with override_settings(THROUGHPUT_RETENTION_DAYS=0):
+        assert prune_throughput() == 3
+
+
+@pytest.mark.django_db
+def test_reads_are_cached_and_conditional(auth_client, django_assert_num_queries):
+    client = create_client(phone_number="79000000011")
+    campaign = create_campaign()
+    detail = reverse("client-detail", args=[client.id])
+
+    first = auth_client.get(detail)
+    assert first.status_code == status.HTTP_200_OK
+    etag = first["ETag"]
+    with django_assert_num_queries(0):
+        cached = auth_client.get(detail, HTTP_IF_NONE_MATCH=etag)
+    assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+    assert auth_client.get(detail, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]).status_code == 304
+
+    auth_client.patch(detail, {"tag": "gold"}, format="json")
+    changed = auth_client.get(detail, HTTP_IF_NONE_MATCH=etag)
+    assert changed.status_code == status.HTTP_200_OK
+    assert changed.json()["tag"] == "gold"
+
+    campaign_detail = reverse("campaign-detail", args=[campaign.id])
+    etag = auth_client.get(campaign_detail)["ETag"]
+    campaign.status = CampaignStatus.RUNNING
+    campaign.save(update_fields=["status"])  # partial saves from tasks bump the version too
+    response = auth_client.get(campaign_detail, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["status"] == CampaignStatus.RUNNING
+
+    listing = reverse("client-list-create")
+    etag = auth_client.get(listing)["ETag"]
+    with django_assert_num_queries(0):
+        assert auth_client.get(listing, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    create_client(phone_number="79000000012")
+    response = auth_client.get(listing, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["count"] == 2
+
+
+@pytest.mark.django_db
+def test_values_serializers_match_model_serializers(auth_client):
+    from api.renderers import ORJSONRenderer
+    from api.serializers import MessageSerializer, NewsletterSerializer, ValuesSerializer
+
+    client = create_client()
+    campaign = create_campaign(client_filter={"tags": ["vip"]}, max_rate=10)
+    run = CampaignRun.objects.create(campaign=campaign)
+    Message.objects.create(
+        campaign=campaign,
+        client=client,
+        run=run,
+        message_text="Hi",
+        planned_send_at=timezone.now().replace(microsecond=0),
+    )
+
+    for serializer_class, queryset in (
+        (ClientSerializer, Client.objects.order_by("id")),
+        (NewsletterSerializer, Newsletter.objects.order_by("id")),
+        (MessageSerializer, Message.objects.order_by("id")),
+    ):
+        fast = ValuesSerializer(serializer_class)
+        expected = serializer_class(queryset, many=True).data
+        actual = fast.serialize(queryset.values_list(*fast.lookups))
+        assert ORJSONRenderer().render(actual) == ORJSONRenderer().render(expected)
+
+    page = auth_client.get(reverse("message-list-create")).json()
+    assert page["results"][0]["planned_send_at"].endswith("Z")
+    assert page["results"][0]["run"] == str(run.id)
+
+
+def test_orjson_renderer_writes_what_drf_would():
+    import datetime
+    import decimal
+    import uuid
+
+    from rest_framework.renderers import JSONRenderer
+
+    from api.renderers import ORJSONRenderer
+
+    moment = datetime.datetime(2030, 1, 1, 6, 0, 0, 123456, tzinfo=datetime.timezone.utc)
+    data = {
+        "datetime": moment,
+        "naive": moment.replace(tzinfo=None),
+        "date": moment.date(),
+        "time": moment.time(),
+        "decimal": decimal.Decimal("12.50"),
+        "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "nested": [{"at": moment.replace(microsecond=0)}],
+    }
+    assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+@pytest.mark.django_db
+def test_jwt_users_are_cached_until_changed(api_client, django_assert_num_queries):
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    user = User.objects.create_user(username="integration", password="secret")
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+    url = reverse("campaign-stats")
+
+    assert api_client.get(url).status_code == status.HTTP_200_OK
+    with django_assert_num_queries(1):  # the stats query only
+        assert api_client.get(url).status_code == status.HTTP_200_OK
+
+    user.is_active = False
+    user.save(update_fields=["is_active"])
+    assert api_client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_backfill_resumes_from_its_checkpoint():
+    from api.backfill import BACKFILLS, run_backfill
+    from api.models import BackfillCheckpoint
+
+    first = create_campaign()
+    second = create_campaign()
+    third = create_campaign()
+    Newsletter.objects.filter(pk=first.pk).update(client_filter='{"tags": ["vip"]}')
+    Newsletter.objects.filter(pk=second.pk).update(client_filter="not json")
+    Newsletter.objects.filter(pk=third.pk).update(client_filter=42)
+    backfill = BACKFILLS["normalize_client_filter"]
+
+    def crash(checkpoint, remaining, eta):
+        assert remaining == 2
+        raise RuntimeError("worker lost")
+
+    with pytest.raises(RuntimeError):
+        run_backfill(backfill, chunk_size=1, progress=crash)
+    assert Newsletter.objects.get(pk=first.pk).client_filter == {"tags": ["vip"]}
+    assert Newsletter.objects.get(pk=second.pk).client_filter == "not json"
+
+    reports = []
+    checkpoint = run_backfill(
+        backfill, chunk_size=1, progress=lambda *report: reports.append(report)
+    )
+    assert [remaining for _, remaining, _ in reports] == [1, 0]
+    assert (checkpoint.processed, checkpoint.updated) == (3, 3)
+    assert checkpoint.finished_at is not None
+    assert Newsletter.objects.get(pk=second.pk).client_filter == {}
+    assert Newsletter.objects.get(pk=third.pk).client_filter == {}
+
+    checkpoint = run_backfill(backfill, restart=True)
+    assert (checkpoint.processed, checkpoint.updated) == (3, 0)
+    assert BackfillCheckpoint.objects.count() == 1
+
+
+def test_worker_and_api_start_within_the_import_budget():
+    import os
+    import subprocess
+    import sys
+
+    from django.conf import settings
+
+    # The budget already has HEADROOM; IMPORT_BUDGET_TOLERANCE=0 is the opt-out for
+    # noisy runners and skips only the timing, forbidden modules always fail.
+    tolerance = os.environ.get("IMPORT_BUDGET_TOLERANCE", "1")
+    result = subprocess.run(
+        [
+            sys.executable,
+            "benchmarks/importtime.py",
+            "--check",
+            "--tolerance",
+            tolerance,
+            "--runs",
+            "3",
+            "--top",
+            "0",
+        ],
+        cwd=settings.BASE_DIR,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+
+
+@override_settings(DISPATCH_SHARDS=4)
+@pytest.mark.django_db
+def test_dispatch_shards_are_rebalanced_between_dispatchers():
+    from unittest import mock
+
+    from api.dispatch import ShardCoordinator
+    from api.tasks import dispatch_round
+
+    run = _running_run_with_messages(create_campaign(), 12, "7900000")
+    first = ShardCoordinator("dispatcher-a")
+    second = ShardCoordinator("dispatcher-b")
+
+    assert first.heartbeat() == [0, 1, 2, 3]
+    # The newcomer waits until the current owner hands its shards over.
+    assert second.heartbeat() == []
+    assert first.heartbeat() == [0, 2]
+    assert second.heartbeat() == [1, 3]
+
+    with mock.patch("api.tasks.send_message_async.apply_async") as apply_async:
+        dispatch_due_messages()  # beat dispatch stays out while dispatchers are alive
+        assert not apply_async.called
+        queued, more = dispatch_round(second.owned)
+
+    claimed = set(Message.objects.filter(status=MessageStatus.QUEUED).values_list("id", flat=True))
+    assert (queued, more) == (len(claimed), False)
+    assert claimed == {pk for pk in run.messages.values_list("id", flat=True) if pk % 4 in (1, 3)}
+
+    second.release()
+    assert first.heartbeat() == [0, 1, 2, 3]
+    first.release()
+    with mock.patch("api.tasks.send_message_async.apply_async") as apply_async:
+        dispatch_due_messages()
+    assert not Message.objects.filter(status=MessageStatus.PENDING).exists()
+
+
+SQL_ENGINE_ZONES = [
+    "UTC",
+    "Europe/Moscow",
+    "Asia/Vladivostok",
+    "Asia/Kolkata",
+    "America/New_York",
+    "Australia/Lord_Howe",
+    "Not/AZone",
+]
+
+
+@pytest.mark.parametrize(
+    "window", [(time(9, 0), time(18, 0)), (time(22, 0), time(6, 0)), (time(0, 0), time(23, 59))]
+)
+@pytest.mark.parametrize("start_offset", [timedelta(hours=-1), timedelta(days=2, hours=7)])
+@pytest.mark.parametrize("length", [timedelta(hours=5), timedelta(days=3)])
+@pytest.mark.parametrize(
+    "now",
+    [
+        datetime(2024, 3, 10, 6, 30, tzinfo=ZoneInfo("UTC")),  # US DST gap
+        datetime(2024, 11, 3, 5, 45, tzinfo=ZoneInfo("UTC")),  # US DST overlap
+        datetime(2024, 6, 30, 21, 59, tzinfo=ZoneInfo("UTC")),
+    ],
+)
+@pytest.mark.django_db
+def test_sql_engine_plans_the_same_send_times_as_python(window, start_offset, length, now):
+    from django.db import connection
+
+    from api.materialize import zone_send_times
+    from api.utils import next_send_at
+
+    if connection.vendor != "postgresql":
+        pytest.skip("The SQL materialization engine needs PostgreSQL.")
+    campaign = create_campaign(
+        start_datetime=now + start_offset,
+        end_datetime=now + start_offset + length,
+        time_interval_start=window[0],
+        time_interval_end=window[1],
+    )
+
+    expected = {tz: next_send_at(campaign, tz, not_before=now) for tz in SQL_ENGINE_ZONES}
+    assert zone_send_times(campaign, SQL_ENGINE_ZONES, now) == expected
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True, CELERY_TASK_EAGER_PROPAGATES=True)
+@pytest.mark.django_db
+def test_sql_engine_materializes_like_python_or_falls_back():
+    from unittest import mock
+
+    from django.db import connection
+
+    for index, tz_name in enumerate(SQL_ENGINE_ZONES):
+        create_client(phone_number=f"7900000000{index}", timezone_name=tz_name)
+    now = timezone.now()
+    campaign = create_campaign(
+        start_datetime=now + timedelta(days=1),
+        end_datetime=now + timedelta(days=2),
+        time_interval_start=time(9, 0),
+        time_interval_end=time(18, 0),
+    )
+
+    planned = {}
+    for engine in ("python", "sql"):
+        run = CampaignRun.objects.create(campaign=campaign)
+        with (
+            override_settings(MATERIALIZE_ENGINE=engine),
+            mock.patch("api.tasks.insert_messages", wraps=insert_messages) as sql_engine,
+            mock.patch("api.tasks.dispatch_due_messages.delay"),
+        ):
+            start_campaign_async(str(run.id))
+        assert sql_engine.called == (engine == "sql" and connection.vendor == "postgresql")
+        planned[engine] = set(run.messages.values_list("client_id", "planned_send_at"))
+
+    assert len(planned["python"]) == len(SQL_ENGINE_ZONES)
+    assert planned["sql"] == planned["python"]
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True, CELERY_TASK_EAGER_PROPAGATES=True)
+@pytest.mark.django_db
+def test_sql_engine_delta_run_skips_delivered_clients():
+    from unittest import mock
+
+    from django.db import connection
+
+    clients = [
+        create_client(phone_number=f"7900000000{index}", timezone_name=tz_name)
+        for index, tz_name in enumerate(SQL_ENGINE_ZONES)
+    ]
+    now = timezone.now()
+    campaign = create_campaign(
+        start_datetime=now + timedelta(days=1), end_datetime=now + timedelta(days=2)
+    )
+    first_run = CampaignRun.objects.create(campaign=campaign)
+    for client in clients[:2]:
+        Message.objects.create(
+            campaign=campaign,
+            client=client,
+            run=first_run,
+            status=MessageStatus.SENT,
+            planned_send_at=now,
+        )
+
+    # The NOT EXISTS anti-join runs inside the SQL engine's INSERT ... SELECT.
+    delta = CampaignRun.objects.create(campaign=campaign, force_resend=False)
+    with (
+        override_settings(MATERIALIZE_ENGINE="sql"),
+        mock.patch("api.tasks.insert_messages", wraps=insert_messages) as sql_engine,
+        mock.patch("api.tasks.dispatch_due_messages.delay"),
+    ):
+        start_campaign_async(str(delta.id))
+    assert sql_engine.called == (connection.vendor == "postgresql")
+    assert set(delta.messages.values_list("client_id", flat=True)) == {
+        client.id for client in clients[2:]
+    }
+
+
+@pytest.mark.django_db
+def test_clients_are_filtered_with_estimated_counts_for_broad_results(auth_client):
+    from unittest import mock
+
+    create_client(phone_number="79001112233", tag="vip", timezone_name="Europe/Moscow")
+    create_client(phone_number="79001119999", tag="vip", operator="901")
+    create_client(phone_number="79500000000", tag="regular")
+    url = reverse("client-list-create")
+
+    def phones(**params):
+        page = auth_client.get(url, params).json()
+        return sorted(row["phone_number"] for row in page["results"]), page
+
+    assert phones(phone="79001112233")[0] == ["79001112233"]
+    assert phones(phone_prefix="7900111")[0] == ["79001112233", "79001119999"]
+    assert phones(tag="vip", operator="901")[0] == ["79001119999"]
+    assert phones(timezone="Europe/Moscow")[0] == ["79001112233"]
+    _, page = phones(tag="regular")
+    assert (page["count"], page["count_estimated"]) == (1, False)
+
+    with mock.patch("api.pagination.estimated_count", return_value=2_500_000):
+        _, page = phones(tag="vip")
+    assert (page["count"], page["count_estimated"]) == (2_500_000, True)
+
+
+@pytest.mark.django_db
+def test_estimated_count_reads_the_postgres_plan(auth_client):
+    from django.db import connection
+
+    from api.pagination import estimated_count
+
+    if connection.vendor != "postgresql":
+        pytest.skip("Planner estimates need PostgreSQL.")
+    Client.objects.bulk_create(
+        Client(phone_number=f"79{index:09d}", tag="bulk", timezone="UTC") for index in range(3000)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE api_client")
+        # A small table is cheaper to scan; keep the planner on the index under test.
+        cursor.execute("SET LOCAL enable_seqscan = off")
+
+    assert estimated_count(Client.objects.all()) == 3000
+    prefix = Client.objects.filter(phone_number__startswith="790000")
+    assert "client_phone_idx" in prefix.explain()
+    assert 0 < estimated_count(prefix) <= 3000
+
+    with override_settings(ESTIMATED_COUNT_THRESHOLD=1000):
+        page = auth_client.get(reverse("client-list-create"), {"tag": "bulk"}).json()
+    assert page["count_estimated"] is True
+    assert page["count"] >= 1000
+
+
+@pytest.mark.django_db
+def test_forecast_previews_the_schedule_without_writing(auth_client, django_assert_max_num_queries):
+    utc = ZoneInfo("UTC")
+    delivered = create_client(phone_number="79000000001")
+    create_client(phone_number="79000000002")
+    create_client(phone_number="79000000003", timezone_name="Europe/Moscow")
+    create_client(phone_number="79000000004", timezone_name="America/New_York")
+    campaign = create_campaign(
+        start_datetime=datetime(2030, 1, 1, 0, 0, tzinfo=utc),
+        end_datetime=datetime(2030, 1, 1, 12, 0, tzinfo=utc),
+        time_interval_start=time(9, 0),
+        time_interval_end=time(10, 0),
+    )
+    run = CampaignRun.objects.create(campaign=campaign, status=CampaignRunStatus.FINISHED)
+    Message.objects.create(campaign=campaign, client=delivered, run=run, status=MessageStatus.SENT)
+    url = reverse("campaign-forecast", args=[campaign.id])
+
+    with django_assert_max_num_queries(2):
+        forecast = auth_client.get(url, {"force_resend": "true"}).json()
+    # New York opens at 14:00 UTC, after end_datetime.
+    assert (forecast["recipients"], forecast["scheduled"], forecast["missed"]) == (4, 3, 1)
+    assert forecast["missed_share"] == 0.25
+    assert forecast["hours"] == [
+        {"at": "2030-01-01T06:00:00Z", "sends": 1},
+        {"at": "2030-01-01T09:00:00Z", "sends": 2},
+    ]
+    assert [zone["scheduled"] for zone in forecast["timezones"]] == [0, 1, 2]
+
+    assert auth_client.get(url).json()["recipients"] == 3  # the delivered client is skipped
+
+    campaign.max_rate = 1
+    campaign.end_datetime = datetime(2030, 1, 1, 9, 0, tzinfo=utc)
+    campaign.save()
+    forecast = auth_client.get(url, {"force_resend": "true"}).json()
+    # One UTC send fits the single second left before end_datetime.
+    assert (forecast["scheduled"], forecast["missed"]) == (2, 2)
+    assert forecast["last_send_at"] == "2030-01-01T09:00:00Z"
+    assert Message.objects.count() == 1 and CampaignRun.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_admin_pages_do_not_count_or_list_whole_tables(client, django_assert_max_num_queries):
+    from unittest import mock
+
+    admin_user = User.objects.create_superuser(username="admin", password="secret")
+    client.force_login(admin_user)
+    customer = create_client()
+    create_client(phone_number="79500000000")
+    campaign = create_campaign()
+    run = CampaignRun.objects.create(campaign=campaign)
+    message = Message.objects.create(campaign=campaign, client=customer, run=run)
+    other_run = CampaignRun.objects.create(campaign=campaign)
+
+    for model in ("client", "newsletter", "campaignrun", "message"):
+        response = client.get(reverse(f"admin:api_{model}_changelist"))
+        assert response.status_code == 200, model
+
+    with django_assert_max_num_queries(10):
+        response = client.get(
+            reverse("admin:api_message_changelist"), {"status__exact": "PENDING", "run": run.id}
+        )
+    assert response.context["cl"].result_count == 1
+    # The run filter offers only the selected run, never a list of all of them.
+    assert str(run.id) in response.content.decode()
+    assert str(other_run.id) not in response.content.decode()
+    assert client.get(reverse("admin:api_message_changelist"), {"run": "x"}).status_code == 302
+
+    response = client.get(reverse("admin:api_client_changelist"), {"q": "7950"})
+    assert [row.phone_number for row in response.context["cl"].result_list] == ["79500000000"]
+
+    with mock.patch("api.pagination.estimated_count", return_value=50_000_000):
+        response = client.get(reverse("admin:api_message_changelist"))
+    assert response.context["cl"].result_count == 50_000_000
+    assert response.context["cl"].full_result_count is None
+
+    response = client.get(reverse("admin:api_message_change", args=[message.id]))
+    assert response.status_code == 200
+    assert "vForeignKeyRawIdAdminField" in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_send_reuses_the_run_snapshot_until_the_run_changes(auth_client):
+    from unittest import mock
+
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from api.tasks import send_message_async
+
+    campaign = create_campaign(text_message="x" * 1000)
+    run = _running_run_with_messages(campaign, 3, "7903")
+    campaign.active_run, campaign.status, campaign.is_active = run, CampaignStatus.RUNNING, True
+    campaign.save()
+    first, second, third = run.messages.order_by("id")
+
+    with mock.patch("api.tasks.send_message_to_external_service") as send:
+        send_message_async(first.id)
+        with CaptureQueriesContext(connection) as queries:
+            send_message_async(second.id)
+    assert send.call_args.args[1].text_message == "x" * 1000
+    # Only the slim message + client row (plus run status and campaign deletion) is
+    # read; the campaign comes from the snapshot.
+    reads = [query["sql"] for query in queries if query["sql"].startswith("SELECT")]
+    assert not [sql for sql in reads[1:] if "api_newsletter" in sql or "api_campaignrun" in sql]
+    assert "message_text" in reads[0] and "phone_number" in reads[0]
+    assert "client_filter" not in reads[0] and "text_message" not in reads[0]
+
+    auth_client.post(reverse("campaign-pause", args=[campaign.id]))
+    with mock.patch("api.tasks.send_message_to_external_service") as send:
+        send_message_async(third.id)
+    send.assert_not_called()
+    third.refresh_from_db()
+    assert third.status == MessageStatus.PENDING
+
+
+@pytest.mark.django_db
+def test_pause_and_delete_stop_sends_without_a_shared_snapshot_cache():
+    from unittest import mock
+
+    from api.snapshots import run_snapshots
+    from api.tasks import send_message_async
+
+    campaign = create_campaign()
+    run = _running_run_with_messages(campaign, 3, "7903")
+    campaign.active_run, campaign.status, campaign.is_active = run, CampaignStatus.RUNNING, True
+    campaign.save()
+    first, second, third = run.messages.order_by("id")
+    run_snapshots.warm()
+
+    # Queryset updates skip the generation bump, as another process's saves do when
+    # CACHE_URL is not shared: the snapshot alone would still say RUNNING.
+    CampaignRun.objects.filter(pk=run.pk).update(status=CampaignRunStatus.PAUSED)
+    with mock.patch("api.tasks.send_message_to_external_service") as send:
+        send_message_async(first.id)
+    send.assert_not_called()
+    first.refresh_from_db()
+    assert first.status == MessageStatus.PENDING
+
+    CampaignRun.objects.filter(pk=run.pk).update(status=CampaignRunStatus.RUNNING)
+    with mock.patch("api.tasks.send_message_to_external_service") as send:
+        send_message_async(second.id)
+    send.assert_called_once()
+
+    Newsletter.objects.filter(pk=campaign.pk).update(deleted_at=timezone.now())
+    with mock.patch("api.tasks.send_message_to_external_service") as send:
+        send_message_async(third.id)
+    send.assert_not_called()
+
+
+@override_settings(DELETION_BATCH_SIZE=2)
+@pytest.mark.django_db
+def test_client_delete_is_soft_and_purged_in_batches(
+    auth_client, django_capture_on_commit_callbacks
+):
+    from unittest import mock
+
+    from api.models import DeletionJob, DeletionStatus
+    from api.tasks import purge_deleted_objects
+
+    client = create_client(phone_number="79000000001")
+    create_client(phone_number="79000000002")
+    campaigns = [create_campaign() for _ in range(5)]
+    runs = [_running_run_with_messages(campaign, 0, "") for campaign in campaigns]
+    for campaign, run in zip(campaigns, runs, strict=True):
+        Message.objects.create(campaign=campaign, client=client, run=run)
+
+    with (
+        mock.patch("api.tasks.purge_deleted_objects.delay") as queued,
+        django_capture_on_commit_callbacks(execute=True),
+    ):
+        response = auth_client.delete(reverse("client-detail", args=[client.id]))
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    queued.assert_called_once_with()
+    assert auth_client.get(reverse("client-detail", args=[client.id])).status_code == 404
+    assert list(campaign_recipients(campaigns[0]).values_list("phone_number", flat=True)) == [
+        "79000000002"
+    ]
+    progress = reverse("deletion-detail", args=[response.data["deletion_id"]])
+    assert response.data["progress"] == progress
+
+    job = DeletionJob.objects.get()
+    with mock.patch("api.tasks.purge_deleted_objects.delay"):
+        with override_settings(DELETION_TASK_TIME_LIMIT=0.0):
+            assert purge_deleted_objects() == 0  # out of time before the first batch
+        with mock.patch("api.tasks.time.monotonic", side_effect=[0, 0, 0, 1e9]):
+            assert purge_deleted_objects() == 2
+    job.refresh_from_db()
+    assert (job.status, job.total, job.deleted) == (DeletionStatus.RUNNING, 5, 4)
+    assert auth_client.get(progress).json()["progress"] == 0.8
+
+    assert purge_deleted_objects() == 2  # the last message, then the client itself
+    assert auth_client.get(progress).json()["status"] == DeletionStatus.FINISHED
+    assert not Client.all_objects.filter(pk=client.id).exists()
+    assert Client.objects.count() == 1
+    # Runs that only waited for the deleted client's messages are complete.
+    assert set(CampaignRun.objects.values_list("status", flat=True)) == {CampaignRunStatus.FINISHED}
+
+
+@pytest.mark.django_db
+def test_campaign_delete_stops_its_runs_and_purges_everything(auth_client):
+    from unittest import mock
+
+    from api.tasks import purge_deleted_objects, send_message_async
+
+    campaign = create_campaign()
+    run = _running_run_with_messages(campaign, 3, "7904")
+    campaign.active_run = run
+    campaign.save()
+    first = run.messages.first()
+
+    with mock.patch("api.tasks.purge_deleted_objects.delay"):
+        response = auth_client.delete(reverse("campaign-detail", args=[campaign.id]))
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert auth_client.get(reverse("campaign-detail", args=[campaign.id])).status_code == 404
+    run.refresh_from_db()
+    assert run.status == CampaignRunStatus.FAILED
+    with mock.patch("api.tasks.send_message_to_external_service") as send:
+        send_message_async(first.id)
+    send.assert_not_called()
+
+    assert purge_deleted_objects() == 2
+    assert not Newsletter.all_objects.exists()
+    assert not CampaignRun.objects.exists() and not Message.objects.exists()
+    assert Client.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_api_process_flushes_local_receipts_off_the_request_path(auth_client):
+    from unittest import mock
+
+    from api import services
+
+    writer = services.receipt_writer
+    with (
+        mock.patch.object(writer, "apply") as apply,
+        mock.patch.object(writer, "batch_size", 1),
+        mock.patch.object(writer, "interval", 3600),
+        mock.patch("api.services.atexit.register") as at_exit,
+    ):
+        services.start_receipt_flusher()
+        try:
+            assert writer.flushing_in_background
+            at_exit.assert_called_once_with(services._drain_receipts)
+            response = auth_client.post(
+                reverse("delivery-receipts"),
+                {"message_id": 1, "status": "DELIVERED"},
+                format="json",
+            )
+            assert response.status_code == status.HTTP_202_ACCEPTED
+            apply.assert_not_called()  # the request only buffers
+        finally:
+            services._drain_receipts()  # as at process exit
+        assert not writer.flushing_in_background
+    assert [item["id"] for item in apply.call_args.args[0]] == [1]
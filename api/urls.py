@@ -1,13 +1,20 @@
 from django.urls import path
 
+from .async_views import AsyncCampaignDetailView, AsyncCampaignStartView, AsyncCampaignStatsView
 from .views import (
     ApiRoot,
     CampaignDetailView,
+    CampaignForecastView,
     CampaignListCreateView,
+    CampaignPauseView,
+    CampaignResumeView,
     CampaignStartView,
     CampaignStatsView,
+    CampaignThroughputView,
     ClientDetailView,
     ClientListCreateView,
+    DeletionJobView,
+    DeliveryReceiptView,
     MessageDetailView,
     MessageListCreateView,
 )
@@ -19,8 +26,38 @@ urlpatterns = [
     path("campaigns/", CampaignListCreateView.as_view(), name="campaign-list-create"),
     path("campaigns/<int:pk>/", CampaignDetailView.as_view(), name="campaign-detail"),
     path("campaigns/<int:pk>/start/", CampaignStartView.as_view(), name="campaign-start"),
+    path("campaigns/<int:pk>/pause/", CampaignPauseView.as_view(), name="campaign-pause"),
+    path("campaigns/<int:pk>/resume/", CampaignResumeView.as_view(), name="campaign-resume"),
     path("campaigns/stats/", CampaignStatsView.as_view(), name="campaign-stats"),
     path("campaigns/<int:pk>/stats/", CampaignStatsView.as_view(), name="campaign-stats-detail"),
+    path(
+        "campaigns/<int:pk>/forecast/",
+        CampaignForecastView.as_view(),
+        name="campaign-forecast",
+    ),
+    path(
+        "campaigns/<int:pk>/throughput/",
+        CampaignThroughputView.as_view(),
+        name="campaign-throughput",
+    ),
     path("messages/", MessageListCreateView.as_view(), name="message-list-create"),
     path("messages/<int:pk>/", MessageDetailView.as_view(), name="message-detail"),
+    path("receipts/", DeliveryReceiptView.as_view(), name="delivery-receipts"),
+    path("deletions/<uuid:pk>/", DeletionJobView.as_view(), name="deletion-detail"),
+    path(
+        "async/campaigns/<int:pk>/",
+        AsyncCampaignDetailView.as_view(),
+        name="async-campaign-detail",
+    ),
+    path(
+        "async/campaigns/<int:pk>/start/",
+        AsyncCampaignStartView.as_view(),
+        name="async-campaign-start",
+    ),
+    path("async/campaigns/stats/", AsyncCampaignStatsView.as_view(), name="async-campaign-stats"),
+    path(
+        "async/campaigns/<int:pk>/stats/",
+        AsyncCampaignStatsView.as_view(),
+        name="async-campaign-stats-detail",
+    ),
 ]
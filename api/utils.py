@@ -1,13 +1,17 @@
 import logging
+import math
 from datetime import datetime, timedelta
 from datetime import timezone as dt_timezone
-from typing import Iterable, Set
+from functools import lru_cache
+from itertools import repeat
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from django.db.models import QuerySet
+from django.conf import settings
+from django.db.models import Count, Exists, OuterRef, QuerySet
 from django.utils import timezone
 
-from .models import Client, Newsletter
+from .models import Client, Message, MessageStatus, Newsletter
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +24,7 @@ def _collect(value: Iterable) -> Set[str]:
     return {str(item) for item in value if item}
 
 
+@lru_cache(maxsize=None)
 def _as_zoneinfo(tz_name: str) -> ZoneInfo:
     try:
         return ZoneInfo(tz_name)
@@ -74,10 +79,10 @@ def campaign_recipients(campaign: Newsletter) -> QuerySet:
     return Client.objects.none()
 
 
-def calculate_planned_send_at(campaign: Newsletter, client: Client):
-    """Calculate the first allowed send datetime for the client in their timezone."""
-    tz = _as_zoneinfo(client.timezone)
-    now_local = timezone.localtime(timezone.now(), tz)
+def next_send_at(campaign: Newsletter, tz_name: str, not_before: Optional[datetime] = None):
+    """First allowed send instant (UTC) in the zone at or after ``not_before`` (default: now)."""
+    tz = _as_zoneinfo(tz_name)
+    now_local = timezone.localtime(not_before or timezone.now(), tz)
     start_local = timezone.localtime(campaign.start_datetime, tz)
     start_from = max(start_local, now_local)
     end_local = timezone.localtime(campaign.end_datetime, tz)
@@ -102,3 +107,180 @@ def calculate_planned_send_at(campaign: Newsletter, client: Client):
         date_cursor += timedelta(days=1)
 
     return None
+
+
+def undelivered_recipients(campaign: Newsletter, recipients: QuerySet) -> QuerySet:
+    """Drop clients that already got the campaign, as a ``NOT EXISTS`` anti-join.
+
+    The unique (campaign, client, run) index serves the correlated lookup, so the
+    delta is computed by the database in the same query that feeds the insert.
+    """
+    delivered = Message.objects.filter(
+        campaign=campaign, client=OuterRef("pk"), status=MessageStatus.SENT
+    )
+    return recipients.exclude(Exists(delivered))
+
+
+def calculate_planned_send_at(campaign: Newsletter, client: Client):
+    """Calculate the first allowed send datetime for the client in their timezone."""
+    return next_send_at(campaign, client.timezone)
+
+
+def recipient_zone_counts(recipients: QuerySet) -> Dict[str, int]:
+    """Number of recipients per client timezone, in one grouped query."""
+    rows = recipients.order_by().values("timezone").annotate(total=Count("id", distinct=True))
+    return {row["timezone"]: row["total"] for row in rows}
+
+
+class SendRateShaper:
+    """Place sends into whole seconds holding at most ``rate`` messages each.
+
+    Seconds are shared by every zone allocated through the same shaper, so zones
+    whose windows open together split the budget instead of stacking up.
+    """
+
+    def __init__(self, campaign: Newsletter, rate: int):
+        self.campaign = campaign
+        self.rate = rate
+        self._used: Dict[int, int] = {}
+
+    def allocate(self, tz_name: str, count: int) -> Iterator[Tuple[datetime, int, int]]:
+        """Yield ``(second, offset, n)``: ``n`` sends from slot ``offset`` of ``second``.
+
+        Stops early when the campaign runs out of allowed window for the zone.
+        """
+        remaining = count
+        cursor = next_send_at(self.campaign, tz_name)
+        while remaining > 0 and cursor is not None:
+            epoch = math.ceil(cursor.timestamp())
+            second = datetime.fromtimestamp(epoch, tz=dt_timezone.utc)
+            allowed = next_send_at(self.campaign, tz_name, not_before=second)
+            if allowed is None:
+                return
+            if allowed != second:
+                # This second is outside the window; jump to where it reopens.
+                cursor = allowed
+                continue
+            used = self._used.get(epoch, 0)
+            placed = self._open_slots(tz_name, second, used, min(self.rate - used, remaining))
+            if placed > 0:
+                self._used[epoch] = used + placed
+                remaining -= placed
+                yield second, used, placed
+            cursor = second + timedelta(seconds=1)
+
+    def slot_at(self, second: datetime, slot: int) -> datetime:
+        """When slot ``slot`` of ``second`` is sent; slots are ``1 / rate`` apart."""
+        return second + timedelta(seconds=slot / self.rate)
+
+    def _is_open(self, tz_name: str, moment: datetime) -> bool:
+        return next_send_at(self.campaign, tz_name, not_before=moment) == moment
+
+    def _open_slots(self, tz_name: str, second: datetime, used: int, wanted: int) -> int:
+        """How many of ``wanted`` slots after ``used`` still fall inside the window."""
+        if wanted <= 0 or self._is_open(tz_name, self.slot_at(second, used + wanted - 1)):
+            return max(wanted, 0)
+        low, high = 0, wanted - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self._is_open(tz_name, self.slot_at(second, used + middle - 1)):
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    def times(self, tz_name: str, count: int) -> Iterator[datetime]:
+        for second, offset, placed in self.allocate(tz_name, count):
+            for slot in range(offset, offset + placed):
+                yield self.slot_at(second, slot)
+
+
+def plan_send_times(campaign: Newsletter, recipients: QuerySet) -> Iterator[Tuple[int, datetime]]:
+    """Yield ``(client_id, planned_send_at)`` for every recipient that fits the campaign window.
+
+    The plan is computed once per timezone. With ``campaign.max_rate`` set, sends are
+    staggered across the window instead of all landing on the instant it opens.
+    Recipients that get no time are logged once the plan is exhausted, as the
+    forecast's ``missed``.
+    """
+    zones = recipient_zone_counts(recipients)
+    first_slots = {tz_name: next_send_at(campaign, tz_name) for tz_name in zones}
+    ordered = sorted((slot, tz_name) for tz_name, slot in first_slots.items() if slot is not None)
+    shaper = SendRateShaper(campaign, campaign.max_rate) if campaign.max_rate else None
+
+    planned = 0
+    for first_slot, tz_name in ordered:
+        client_ids = (
+            recipients.filter(timezone=tz_name)
+            .order_by("id")
+            .values_list("id", flat=True)
+            .iterator(chunk_size=settings.MATERIALIZE_BATCH_SIZE)
+        )
+        if shaper is None:
+            times = repeat(first_slot)
+        else:
+            times = shaper.times(tz_name, zones[tz_name])
+        for client_id, planned_send_at in zip(client_ids, times, strict=False):
+            planned += 1
+            yield client_id, planned_send_at
+
+    missed = sum(zones.values()) - planned
+    if missed > 0:
+        logger.warning(
+            "%s of %s recipients of campaign %s do not fit its window or max_rate",
+            missed,
+            sum(zones.values()),
+            campaign.pk,
+        )
+
+
+def forecast_sends(campaign: Newsletter, recipients: QuerySet) -> dict:
+    """What starting the campaign now would schedule, without writing anything.
+
+    Counts recipients per timezone in one query and plans each zone once, as
+    ``plan_send_times`` does, so the cost does not grow with the audience. Sends
+    are bucketed by UTC hour. ``missed`` counts recipients whose window does not
+    open (or, with ``max_rate``, does not fit them) before ``end_datetime``.
+    """
+    zones = recipient_zone_counts(recipients)
+    first_slots = {tz_name: next_send_at(campaign, tz_name) for tz_name in zones}
+    ordered = sorted((slot, tz_name) for tz_name, slot in first_slots.items() if slot is not None)
+    shaper = SendRateShaper(campaign, campaign.max_rate) if campaign.max_rate else None
+
+    hours: Dict[datetime, int] = {}
+    scheduled = {tz_name: 0 for tz_name in zones}
+    last_send_at = None
+    for first_slot, tz_name in ordered:
+        if shaper is None:
+            placements = [(first_slot, first_slot, zones[tz_name])]
+        else:
+            placements = (
+                (second, shaper.slot_at(second, offset + placed - 1), placed)
+                for second, offset, placed in shaper.allocate(tz_name, zones[tz_name])
+            )
+        for moment, last, placed in placements:
+            hour = moment.replace(minute=0, second=0, microsecond=0)
+            hours[hour] = hours.get(hour, 0) + placed
+            scheduled[tz_name] += placed
+            last_send_at = max(last_send_at or last, last)
+
+    total = sum(zones.values())
+    missed = total - sum(scheduled.values())
+    return {
+        "recipients": total,
+        "scheduled": total - missed,
+        "missed": missed,
+        "missed_share": missed / total if total else 0.0,
+        "first_send_at": ordered[0][0] if ordered else None,
+        "last_send_at": last_send_at,
+        "timezones": [
+            {
+                "timezone": tz_name,
+                "recipients": count,
+                "scheduled": scheduled[tz_name],
+                "first_send_at": first_slots[tz_name],
+            }
+            for tz_name, count in sorted(zones.items())
+        ],
+        "hours": [{"at": hour, "sends": sends} for hour, sends in sorted(hours.items())],
+    }
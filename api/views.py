@@ -1,31 +1,50 @@
 import logging
+from typing import Any, Dict, Tuple
 
 from django.db import transaction
-from django.db.models import Count, Q
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Trunc
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.utils import timezone
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .caching import CachedListMixin, CachedRetrieveMixin
+from .filters import ClientFilter
 from .models import (
     CampaignRun,
     CampaignRunStatus,
     CampaignStatus,
     Client,
+    DeletionJob,
+    DeletionTarget,
     Message,
     MessageStatus,
     Newsletter,
+    RunThroughput,
 )
+from .pagination import EstimatedCountPagination
 from .serializers import (
     CampaignStartSerializer,
     ClientSerializer,
+    DeletionJobSerializer,
+    DeliveryReceiptSerializer,
     MessageSerializer,
     NewsletterSerializer,
+    ThroughputQuerySerializer,
+    ValuesSerializer,
 )
-from .tasks import start_campaign_async
-from .utils import campaign_recipients
+from .services import receipt_writer
+from .tasks import (
+    dispatch_due_messages,
+    purge_deleted_objects,
+    refresh_run_status,
+    start_campaign_async,
+)
+from .utils import campaign_recipients, forecast_sends, undelivered_recipients
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +57,7 @@ def _schedule_campaign_run(campaign: Newsletter, *, force_resend: bool) -> Campa
         campaign=campaign,
         status=run_status,
         force_resend=force_resend,
+        start_at=start_at,
     )
     campaign.active_run = run
     campaign.status = (
@@ -49,15 +69,42 @@ def _schedule_campaign_run(campaign: Newsletter, *, force_resend: bool) -> Campa
     if campaign.is_active:
         campaign.last_started_at = now
     campaign.save(update_fields=["status", "is_active", "last_started_at", "active_run"])
-    if run_status == CampaignRunStatus.SCHEDULED:
+    if run_status == CampaignRunStatus.RUNNING:
         transaction.on_commit(
-            lambda: start_campaign_async.apply_async(args=[str(run.id)], eta=start_at)
+            lambda: start_campaign_async.apply_async(args=[str(run.id)], priority=campaign.priority)
         )
-    else:
-        transaction.on_commit(lambda: start_campaign_async.delay(str(run.id)))
+    # Future runs stay in the table and are claimed by start_scheduled_runs when due.
     return run
 
 
+def _schedule_deletion(instance, target: str) -> Dict[str, Any]:
+    """Soft-delete ``instance`` now and leave its messages to ``purge_deleted_objects``."""
+    instance.deleted_at = timezone.now()
+    instance.save(update_fields=["deleted_at"])
+    job = DeletionJob.objects.create(target=target, object_id=instance.pk)
+    transaction.on_commit(lambda: purge_deleted_objects.delay())
+    return {
+        "status": "deleting",
+        "deletion_id": str(job.id),
+        "progress": reverse("deletion-detail", args=[job.id]),
+    }
+
+
+class ValuesListMixin:
+    """Build GET list pages from ``values_list()`` rows with ``values_serializer``."""
+
+    values_serializer: ValuesSerializer
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).values_list(
+            *self.values_serializer.lookups
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.values_serializer.serialize(page))
+        return Response(self.values_serializer.serialize(queryset))
+
+
 class ApiRoot(APIView):
     def get(self, request, format=None):
         return Response(
@@ -69,83 +116,149 @@ class ApiRoot(APIView):
         )
 
 
-class ClientListCreateView(generics.ListCreateAPIView):
-    queryset = Client.objects.all()
+class ClientListCreateView(CachedListMixin, ValuesListMixin, generics.ListCreateAPIView):
+    """Clients filtered by ``phone``, ``phone_prefix``, ``tag``, ``operator`` and ``timezone``."""
+
+    queryset = Client.objects.order_by("id")
     serializer_class = ClientSerializer
+    values_serializer = ValuesSerializer(ClientSerializer)
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = ClientFilter
+    pagination_class = EstimatedCountPagination
+    cache_prefix = "client"
 
 
-class ClientDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ClientDetailView(CachedRetrieveMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
+    cache_prefix = "client"
 
     def destroy(self, request, *args, **kwargs):
-        instance = self.get_object()
-        self.perform_destroy(instance)
-        return Response(
-            {"message": "Client successfully deleted"}, status=status.HTTP_204_NO_CONTENT
-        )
+        with transaction.atomic():
+            body = _schedule_deletion(self.get_object(), DeletionTarget.CLIENT)
+        return Response(body, status=status.HTTP_202_ACCEPTED)
 
 
-class CampaignListCreateView(generics.ListCreateAPIView):
+class CampaignListCreateView(CachedListMixin, ValuesListMixin, generics.ListCreateAPIView):
     queryset = Newsletter.objects.all().order_by("-start_datetime")
     serializer_class = NewsletterSerializer
+    values_serializer = ValuesSerializer(NewsletterSerializer)
+    cache_prefix = "campaign"
 
     def perform_create(self, serializer):
         campaign = serializer.save()
         _schedule_campaign_run(campaign, force_resend=False)
 
 
-class CampaignDetailView(generics.RetrieveUpdateDestroyAPIView):
+class CampaignDetailView(CachedRetrieveMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Newsletter.objects.all()
     serializer_class = NewsletterSerializer
+    cache_prefix = "campaign"
 
     def perform_update(self, serializer):
         serializer.save()
 
     def destroy(self, request, *args, **kwargs):
-        instance = self.get_object()
-        self.perform_destroy(instance)
-        return Response(
-            {"message": "Campaign successfully deleted"}, status=status.HTTP_204_NO_CONTENT
-        )
+        with transaction.atomic():
+            campaign = self.get_object()
+            # Stop dispatch and scheduled starts; the campaign save below bumps the
+            # snapshot generation, so send tasks see the deletion and skip its messages.
+            campaign.runs.filter(
+                status__in=[
+                    CampaignRunStatus.SCHEDULED,
+                    CampaignRunStatus.RUNNING,
+                    CampaignRunStatus.PAUSED,
+                ]
+            ).update(status=CampaignRunStatus.FAILED, finished_at=timezone.now())
+            body = _schedule_deletion(campaign, DeletionTarget.CAMPAIGN)
+        return Response(body, status=status.HTTP_202_ACCEPTED)
+
+
+def _start_campaign(pk, payload) -> Tuple[Dict[str, Any], int]:
+    """Validate a start request and schedule a run; returns ``(body, status_code)``."""
+    start_serializer = CampaignStartSerializer(data=payload)
+    start_serializer.is_valid(raise_exception=True)
+    force_resend = start_serializer.validated_data.get("force_resend", False)
+
+    with transaction.atomic():
+        campaign = get_object_or_404(Newsletter.objects.select_for_update(), pk=pk)
+        if (
+            campaign.status
+            in {
+                CampaignStatus.RUNNING,
+                CampaignStatus.SCHEDULED,
+                CampaignStatus.FINISHED,
+                CampaignStatus.PAUSED,
+            }
+            and not force_resend
+        ):
+            return (
+                {"detail": "Campaign is already scheduled or running."},
+                status.HTTP_409_CONFLICT,
+            )
+
+        recipients = campaign_recipients(campaign)
+        if not recipients.exists():
+            return (
+                {"detail": "Аудитория пуста, запуск невозможен."},
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+        run = _schedule_campaign_run(campaign, force_resend=force_resend)
+
+    return {"status": "scheduled", "run_id": str(run.id)}, status.HTTP_202_ACCEPTED
 
 
 class CampaignStartView(APIView):
     def post(self, request, pk, format=None):
         payload = request.data or request.query_params
-        start_serializer = CampaignStartSerializer(data=payload)
-        start_serializer.is_valid(raise_exception=True)
-        force_resend = start_serializer.validated_data.get("force_resend", False)
+        body, status_code = _start_campaign(pk, payload)
+        return Response(body, status=status_code)
 
-        with transaction.atomic():
-            campaign = get_object_or_404(Newsletter.objects.select_for_update(), pk=pk)
-            if (
-                campaign.status
-                in {CampaignStatus.RUNNING, CampaignStatus.SCHEDULED, CampaignStatus.FINISHED}
-                and not force_resend
-            ):
-                return Response(
-                    {"detail": "Campaign is already scheduled or running."},
-                    status=status.HTTP_409_CONFLICT,
-                )
-
-            recipients = campaign_recipients(campaign)
-            if not recipients.exists():
-                return Response(
-                    {"detail": "Аудитория пуста, запуск невозможен."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            run = _schedule_campaign_run(campaign, force_resend=force_resend)
 
-        return Response(
-            {"status": "scheduled", "run_id": str(run.id)}, status=status.HTTP_202_ACCEPTED
-        )
+def _set_run_paused(pk, *, paused: bool) -> Tuple[Dict[str, Any], int]:
+    """Flip the active run between RUNNING and PAUSED with a constant number of writes.
 
+    Pending messages are left untouched: dispatch only claims messages of RUNNING runs
+    and send tasks park messages of paused runs back to PENDING.
+    """
+    expected = CampaignRunStatus.RUNNING if paused else CampaignRunStatus.PAUSED
+    with transaction.atomic():
+        campaign = get_object_or_404(Newsletter.objects.select_for_update(), pk=pk)
+        run = CampaignRun.objects.select_for_update().filter(pk=campaign.active_run_id).first()
+        if run is None or run.status != expected:
+            detail = "Campaign is not running." if paused else "Campaign is not paused."
+            return {"detail": detail}, status.HTTP_409_CONFLICT
 
-class MessageListCreateView(generics.ListCreateAPIView):
-    queryset = Message.objects.all()
+        run.status = CampaignRunStatus.PAUSED if paused else CampaignRunStatus.RUNNING
+        run.save(update_fields=["status"])
+        campaign.status = CampaignStatus.PAUSED if paused else CampaignStatus.RUNNING
+        campaign.is_active = not paused
+        campaign.save(update_fields=["status", "is_active"])
+
+        if not paused:
+            refresh_run_status(run)
+            transaction.on_commit(lambda: dispatch_due_messages.delay())
+
+    return {"status": run.status, "run_id": str(run.id)}, status.HTTP_200_OK
+
+
+class CampaignPauseView(APIView):
+    def post(self, request, pk, format=None):
+        body, status_code = _set_run_paused(pk, paused=True)
+        return Response(body, status=status_code)
+
+
+class CampaignResumeView(APIView):
+    def post(self, request, pk, format=None):
+        body, status_code = _set_run_paused(pk, paused=False)
+        return Response(body, status=status_code)
+
+
+class MessageListCreateView(ValuesListMixin, generics.ListCreateAPIView):
+    queryset = Message.objects.order_by("id")
     serializer_class = MessageSerializer
+    values_serializer = ValuesSerializer(MessageSerializer)
 
 
 class MessageDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -160,6 +273,43 @@ class MessageDetailView(generics.RetrieveUpdateDestroyAPIView):
         )
 
 
+class DeliveryReceiptView(APIView):
+    """Accept provider delivery reports and acknowledge them before they hit the database.
+
+    The body is one receipt, a list of receipts or ``{"receipts": [...]}``; receipts
+    are buffered and written to ``Message`` in bulk by the flusher.
+    """
+
+    def post(self, request, format=None):
+        data = request.data
+        if isinstance(data, dict) and "receipts" in data:
+            data = data["receipts"]
+        many = isinstance(data, list)
+        serializer = DeliveryReceiptSerializer(data=data, many=many)
+        serializer.is_valid(raise_exception=True)
+        receipts = serializer.validated_data if many else [serializer.validated_data]
+
+        received_at = timezone.now()
+        receipt_writer.add(
+            [
+                {
+                    "id": receipt["message_id"],
+                    "status": receipt["status"],
+                    "at": (receipt.get("timestamp") or received_at).isoformat(),
+                }
+                for receipt in receipts
+            ]
+        )
+        return Response({"accepted": len(receipts)}, status=status.HTTP_202_ACCEPTED)
+
+
+class DeletionJobView(generics.RetrieveAPIView):
+    """Progress of a background deletion started by ``DELETE`` on a client or campaign."""
+
+    queryset = DeletionJob.objects.all()
+    serializer_class = DeletionJobSerializer
+
+
 class CampaignStatsView(APIView):
     def get(self, request, pk=None, format=None):
         if pk is None:
@@ -185,3 +335,55 @@ class CampaignStatsView(APIView):
             "status": campaign.status,
         }
         return Response(stats)
+
+
+class CampaignForecastView(APIView):
+    """Dry run of a start: audience per timezone and expected sends per hour.
+
+    ``?force_resend=true`` forecasts a full resend instead of the undelivered delta.
+    Nothing is materialized; the planner runs once per timezone.
+    """
+
+    def get(self, request, pk, format=None):
+        query = CampaignStartSerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        campaign = get_object_or_404(Newsletter, pk=pk)
+        recipients = campaign_recipients(campaign)
+        if not query.validated_data["force_resend"]:
+            recipients = undelivered_recipients(campaign, recipients)
+        return Response({"campaign": campaign.id, **forecast_sends(campaign, recipients)})
+
+
+class CampaignThroughputView(APIView):
+    """Sends per minute (or hour/day) of a run, read from the ``RunThroughput`` buckets.
+
+    ``?run=<uuid>`` selects a run of the campaign (default: the active run),
+    ``?resolution=minute|hour|day`` downsamples the buckets in the database.
+    """
+
+    def get(self, request, pk, format=None):
+        query = ThroughputQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        campaign = get_object_or_404(Newsletter, pk=pk)
+        run_id = query.validated_data.get("run", campaign.active_run_id)
+        resolution = query.validated_data["resolution"]
+        if run_id is not None:
+            get_object_or_404(CampaignRun, pk=run_id, campaign=campaign)
+
+        buckets = RunThroughput.objects.filter(run_id=run_id)
+        if resolution == "minute":
+            buckets = buckets.values("queued", "sent", "failed", at=F("bucket"))
+        else:
+            buckets = (
+                buckets.annotate(at=Trunc("bucket", resolution))
+                .values("at")
+                .annotate(queued=Sum("queued"), sent=Sum("sent"), failed=Sum("failed"))
+            )
+        return Response(
+            {
+                "campaign": campaign.id,
+                "run": str(run_id) if run_id else None,
+                "resolution": resolution,
+                "buckets": list(buckets.order_by("at")),
+            }
+        )
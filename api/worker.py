@@ -0,0 +1,83 @@
+"""Celery worker process lifecycle: warm-up after fork and clean shutdown.
+
+Prefork children inherit nothing usable from the parent, so without warm-up the
+first tasks in every child pay for the DB handshake and timezone database
+reads. ``process_init`` pays those costs once per child and loads the snapshots
+of running runs (``api.snapshots``) that send tasks will ask for; connections are
+then kept for ``CONN_MAX_AGE`` and validated by ``CONN_HEALTH_CHECKS`` between tasks.
+
+Each child also flushes its in-memory throughput counters, and with
+``SEND_STATUS_WRITE_BEHIND`` but no shared buffer its send outcomes, on a timer
+and once more on shutdown.
+"""
+
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.core.cache import close_caches
+from django.db import connections
+
+from .buffers import LocalBuffer
+from .models import Client
+from .snapshots import run_snapshots
+from .utils import _as_zoneinfo
+
+logger = logging.getLogger(__name__)
+
+
+def open_connections() -> None:
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+def preload_timezones() -> int:
+    """Resolve every timezone used by clients so ``_as_zoneinfo`` never hits tzdata on send."""
+    names = set(Client.objects.values_list("timezone", flat=True).distinct())
+    names.add(settings.TIME_ZONE)
+    for name in names:
+        _as_zoneinfo(name)
+    return len(names)
+
+
+def _local_writers():
+    from .metrics import throughput
+    from .tasks import status_writer
+
+    writers = [throughput]
+    if settings.SEND_STATUS_WRITE_BEHIND and isinstance(status_writer.buffer, LocalBuffer):
+        writers.append(status_writer)
+    return writers
+
+
+def process_init(**kwargs) -> None:
+    for writer in _local_writers():
+        writer.start_background_flush()
+    started = time.perf_counter()
+    try:
+        open_connections()
+        zones = preload_timezones()
+        runs = run_snapshots.warm()
+    except Exception as exc:  # noqa: BLE001
+        # A cold child still works, it just pays the setup on its first task.
+        logger.warning("Worker process %s warm-up failed: %s", os.getpid(), exc)
+        return
+    logger.info(
+        "Worker process %s warmed up in %.1f ms (%d timezones, %d runs)",
+        os.getpid(),
+        (time.perf_counter() - started) * 1000,
+        zones,
+        runs,
+    )
+
+
+def process_shutdown(**kwargs) -> None:
+    for writer in _local_writers():
+        writer.stop_background_flush()
+        try:
+            writer.flush()
+        except Exception as exc:  # noqa: BLE001
+            logger.error("Worker process %s lost buffered %s: %s", os.getpid(), writer.name, exc)
+    connections.close_all()
+    close_caches()
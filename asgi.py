@@ -3,5 +3,12 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "Work.settings")
+# Async views run the ORM in executor threads that the per-request cleanup never
+# closes, so persistent connections would pile up; see DB_CONN_MAX_AGE in settings.
+os.environ.setdefault("DB_CONN_MAX_AGE", "0")
 
 application = get_asgi_application()
+
+from api.services import start_receipt_flusher  # noqa: E402
+
+start_receipt_flusher()
@@ -0,0 +1,72 @@
+"""Per-request cost of JWT authentication with and without the user cache.
+
+Usage:
+    python benchmarks/auth_queries.py --requests 2000
+
+Sends ``--requests`` authenticated GETs to the API root, which runs no queries
+of its own, in-process with the stock ``JWTAuthentication`` and with
+``CachedJWTAuthentication`` and reports queries per request and latency
+percentiles.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+from unittest import mock
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "Work.settings")
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+from rest_framework.views import APIView  # noqa: E402
+from rest_framework_simplejwt.authentication import JWTAuthentication  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+
+from api.authentication import CachedJWTAuthentication  # noqa: E402
+
+
+def measure(label, authentication_class, client, requests):
+    samples = []
+    with mock.patch.object(APIView, "authentication_classes", [authentication_class]):
+        client.get("/api/")  # warm-up, fills the user cache
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(requests):
+                started = time.perf_counter()
+                response = client.get("/api/")
+                samples.append(time.perf_counter() - started)
+                assert response.status_code == 200, response.status_code
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(
+        f"{label:10} {len(queries) / requests:5.2f} queries/request  "
+        f"p50 {statistics.median(ordered) * 1000:6.2f} ms  p99 {p99 * 1000:6.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    user = User.objects.create_user(username=f"bench-{uuid.uuid4().hex[:8]}")
+    client = APIClient(SERVER_NAME="localhost")
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+    try:
+        measure("stock", JWTAuthentication, client, args.requests)
+        measure("cached", CachedJWTAuthentication, client, args.requests)
+    finally:
+        user.delete()
+
+
+if __name__ == "__main__":
+    main()
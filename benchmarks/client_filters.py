@@ -0,0 +1,96 @@
+"""Latency of filtered client list pages and the plan behind each filter.
+
+Usage:
+    python benchmarks/client_filters.py --clients 1000000 --requests 50
+
+Makes sure ``--clients`` clients exist, then requests the client list in-process
+``--requests`` times per filter with the response cache cleared. Reports the
+latency percentiles and the query plan of each filter. Against PostgreSQL, broad
+filters also show ``count_estimated``.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "Work.settings")
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from api.filters import ClientFilter  # noqa: E402
+from api.models import Client  # noqa: E402
+
+ZONES = ["UTC", "Europe/Moscow", "Asia/Vladivostok", "Asia/Yekaterinburg"]
+FILTERS = {
+    "phone": {"phone": "70000123456"},
+    "phone_prefix": {"phone_prefix": "7000012"},
+    "tag": {"tag": "bench-3"},
+    "operator": {"operator": "905"},
+    "timezone": {"timezone": "Asia/Vladivostok"},
+}
+
+
+def ensure_clients(count):
+    missing = count - Client.objects.count()
+    offset = Client.objects.count()
+    batch = 10_000
+    for start in range(offset, offset + max(missing, 0), batch):
+        Client.objects.bulk_create(
+            Client(
+                phone_number=f"7{index:010d}",
+                mobile_operator_code=f"9{index % 10:02d}",
+                tag=f"bench-{index % 20}",
+                timezone=ZONES[index % len(ZONES)],
+            )
+            for index in range(start, min(start + batch, offset + missing))
+        )
+
+
+def measure(client, name, params, requests):
+    samples = []
+    for _ in range(requests):
+        cache.clear()
+        started = time.perf_counter()
+        response = client.get("/api/clients/", params)
+        samples.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.status_code
+    page = response.json()
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    plan = ClientFilter(params, Client.objects.order_by("id")).qs[:50].explain()
+    print(
+        f"{name:13} count {page['count']:9d} estimated={page.get('count_estimated')!s:5}  "
+        f"p50 {statistics.median(ordered) * 1000:7.2f} ms  p99 {p99 * 1000:7.2f} ms"
+    )
+    print(f"{'':13} {' | '.join(plan.splitlines())}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=1_000_000)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    ensure_clients(args.clients)
+    user = User.objects.create_user(username=f"bench-{uuid.uuid4().hex[:8]}")
+    client = APIClient(SERVER_NAME="localhost")
+    client.force_authenticate(user=user)
+    try:
+        for name, params in FILTERS.items():
+            measure(client, name, params, args.requests)
+    finally:
+        user.delete()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Dispatch throughput with 1..N concurrent sharded dispatchers.
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmarks/dispatch_scaling.py --messages 200000 --dispatchers 1 2 4
+
+Creates a running run with ``--messages`` due messages, then for every count in
+``--dispatchers`` forks that many processes. Each process leases its shards with
+``ShardCoordinator`` and calls ``dispatch_round`` until nothing is due. Broker
+publishing is stubbed out, so only the database claim is measured. Between
+measurements the messages are reset to PENDING. Reports messages queued per
+second. SQLite serializes all writers, so run it against PostgreSQL.
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+import uuid
+from datetime import time as dt_time
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "Work.settings")
+django.setup()
+
+from django.db import connections  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from api.dispatch import ShardCoordinator  # noqa: E402
+from api.models import (  # noqa: E402
+    CampaignRun,
+    CampaignRunStatus,
+    Client,
+    Message,
+    MessageStatus,
+    Newsletter,
+)
+from api.tasks import dispatch_round  # noqa: E402
+
+
+def create_run(count):
+    tag = f"bench-{uuid.uuid4().hex[:8]}"
+    now = timezone.now()
+    campaign = Newsletter.objects.create(
+        start_datetime=now,
+        end_datetime=now + timedelta(days=1),
+        text_message="benchmark",
+        time_interval_start=dt_time(0, 0),
+        time_interval_end=dt_time(23, 59),
+        tag=tag,
+    )
+    run = CampaignRun.objects.create(campaign=campaign, status=CampaignRunStatus.RUNNING)
+    clients = Client.objects.bulk_create(
+        Client(phone_number=f"7{i:010d}", mobile_operator_code="900", tag=tag, timezone="UTC")
+        for i in range(count)
+    )
+    Message.objects.bulk_create(
+        (
+            Message(
+                campaign=campaign,
+                client=client,
+                run=run,
+                message_text="benchmark",
+                planned_send_at=now - timedelta(minutes=1),
+            )
+            for client in clients
+        ),
+        batch_size=5000,
+    )
+    return run
+
+
+def dispatcher(name, ready, start):
+    connections.close_all()
+    coordinator = ShardCoordinator(name)
+    with mock.patch("api.tasks.send_message_async.apply_async"):
+        coordinator.heartbeat()  # register
+        ready.wait()
+        coordinator.heartbeat()  # release shards that belong to the others
+        start.wait()
+        coordinator.heartbeat()  # take over the released ones
+        while True:
+            _, more = dispatch_round(coordinator.shards())
+            if not more:
+                break
+    coordinator.release()
+
+
+def measure(run, processes):
+    run.messages.update(status=MessageStatus.PENDING)
+    connections.close_all()
+    ready = multiprocessing.Barrier(processes + 1)
+    start = multiprocessing.Barrier(processes + 1)
+    workers = [
+        multiprocessing.Process(target=dispatcher, args=(f"bench-{index}", ready, start))
+        for index in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    ready.wait()
+    time.sleep(0.5)
+    start.wait()
+    started = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    queued = run.messages.filter(status=MessageStatus.QUEUED).count()
+    print(f"{processes:2d} dispatchers  {queued:8d} queued  {queued / elapsed:9.0f} messages/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--dispatchers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    run = create_run(args.messages)
+    for processes in args.dispatchers:
+        measure(run, processes)
+
+
+if __name__ == "__main__":
+    main()
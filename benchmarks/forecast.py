@@ -0,0 +1,97 @@
+"""Latency of the campaign forecast on a large audience.
+
+Usage:
+    python benchmarks/forecast.py --clients 1000000 --requests 20 --max-rate 0 500
+
+Makes sure ``--clients`` clients exist, spread over a handful of timezones, and
+creates a campaign over all of them. Then calls ``GET
+/api/campaigns/<id>/forecast/`` ``--requests`` times for each ``--max-rate``
+(0 means unlimited) and reports the latency percentiles. It also checks that the
+forecast wrote no messages.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import time as dt_time
+from datetime import timedelta
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "Work.settings")
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from api.models import Client, Message, Newsletter  # noqa: E402
+
+ZONES = ["UTC", "Europe/Moscow", "Asia/Vladivostok", "Asia/Yekaterinburg", "America/New_York"]
+
+
+def ensure_clients(count):
+    offset = Client.objects.filter(tag="forecast-bench").count()
+    for start in range(offset, count, 10_000):
+        Client.objects.bulk_create(
+            Client(
+                phone_number=f"8{index:010d}",
+                mobile_operator_code="900",
+                tag="forecast-bench",
+                timezone=ZONES[index % len(ZONES)],
+            )
+            for index in range(start, min(start + 10_000, count))
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=1_000_000)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--max-rate", type=int, nargs="+", default=[0, 500])
+    args = parser.parse_args()
+
+    ensure_clients(args.clients)
+    now = timezone.now()
+    campaign = Newsletter.objects.create(
+        start_datetime=now,
+        end_datetime=now + timedelta(days=1),
+        text_message="benchmark",
+        time_interval_start=dt_time(9, 0),
+        time_interval_end=dt_time(21, 0),
+        tag="forecast-bench",
+    )
+    user = User.objects.create_user(username=f"bench-{uuid.uuid4().hex[:8]}")
+    client = APIClient(SERVER_NAME="localhost")
+    client.force_authenticate(user=user)
+    url = reverse("campaign-forecast", args=[campaign.id])
+    messages_before = Message.objects.count()
+    try:
+        for max_rate in args.max_rate:
+            Newsletter.objects.filter(pk=campaign.pk).update(max_rate=max_rate or None)
+            samples = []
+            for _ in range(args.requests):
+                started = time.perf_counter()
+                forecast = client.get(url).json()
+                samples.append(time.perf_counter() - started)
+            ordered = sorted(samples)
+            p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+            print(
+                f"max_rate {max_rate or '-':>6}  {forecast['recipients']:8d} recipients  "
+                f"{forecast['missed']:8d} missed  {len(forecast['hours']):3d} hours  "
+                f"p50 {statistics.median(ordered) * 1000:7.1f} ms  p99 {p99 * 1000:7.1f} ms"
+            )
+        assert Message.objects.count() == messages_before, "the forecast wrote messages"
+    finally:
+        campaign.delete()
+        user.delete()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Cold-start import time of a Celery worker and of the API, against a budget.
+
+Usage:
+    python benchmarks/importtime.py --runs 5 --top 15
+    python benchmarks/importtime.py --check     # exit 1 if over budget
+    python benchmarks/importtime.py --check --tolerance 0   # modules only, noisy runners
+    python benchmarks/importtime.py --record    # rewrite the budget
+
+Starts each target ``--runs`` times in a fresh interpreter under
+``python -X importtime``: the worker as ``celery worker`` loads it (Celery app,
+``django.setup()``, system checks, task modules) with ``Work.settings_worker``;
+the API as the WSGI application plus its URLconf with ``Work.settings``. Prints
+the median startup time, the packages with the most self import time and the
+heaviest top-level imports. ``--check`` compares the median with
+``import_budget.json`` times ``--tolerance`` (0 skips the timing) and fails if a
+worker loaded any of its forbidden HTTP-only modules, whatever the tolerance;
+``--record`` stores the medians with ``HEADROOM``.
+"""
+
+import argparse
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+from collections import Counter
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+BUDGET_FILE = Path(__file__).resolve().parent / "import_budget.json"
+HEADROOM = 1.5
+
+TARGETS = {
+    "worker": (
+        "Work.settings_worker",
+        "from Work.celery import app\napp.loader.import_default_modules()",
+    ),
+    "api": (
+        "Work.settings",
+        "from Work.wsgi import application\n"
+        "from django.urls import get_resolver\n"
+        "get_resolver().url_patterns",
+    ),
+}
+
+SNIPPET = """\
+import json, sys, time
+started = time.perf_counter()
+{startup}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"ms": elapsed * 1000, "modules": sorted(sys.modules)}}))
+"""
+
+
+def start(target):
+    settings_module, startup = TARGETS[target]
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings_module}
+    # A generated default key may contain "$", which django-environ tries to expand.
+    env.setdefault("DJANGO_SECRET_KEY", "importtime")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SNIPPET.format(startup=startup)],
+        cwd=BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        imports.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return report["ms"], set(report["modules"]), imports
+
+
+def summarize(target, runs, top):
+    samples = [start(target) for _ in range(runs)]
+    median_ms = statistics.median(ms for ms, _, _ in samples)
+    _, modules, imports = samples[-1]
+
+    by_package = Counter()
+    for self_us, _, name in imports:
+        by_package[name.strip().split(".")[0]] += self_us
+    top_level = sorted(
+        ((cumulative_us, name.strip()) for _, cumulative_us, name in imports if name[1] != " "),
+        reverse=True,
+    )
+
+    print(f"{target}: {median_ms:.0f} ms median of {runs}, {len(modules)} modules")
+    print("  self time by package:")
+    for package, self_us in by_package.most_common(top):
+        print(f"    {self_us / 1000:8.1f} ms  {package}")
+    print("  heaviest top-level imports (cumulative):")
+    for cumulative_us, name in top_level[:top]:
+        print(f"    {cumulative_us / 1000:8.1f} ms  {name}")
+    return median_ms, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", choices=[*TARGETS, "all"], default="all")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument(
+        "--tolerance", type=float, default=1.0, help="Budget multiplier; 0 skips the timing."
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--check", action="store_true", help="Fail if over budget.")
+    mode.add_argument("--record", action="store_true", help="Rewrite the budget file.")
+    args = parser.parse_args()
+
+    budget = json.loads(BUDGET_FILE.read_text())
+    targets = list(TARGETS) if args.target == "all" else [args.target]
+    failures = []
+    for target in targets:
+        median_ms, modules = summarize(target, args.runs, args.top)
+        limits = budget.setdefault(target, {})
+        if args.record:
+            limits["startup_ms"] = math.ceil(median_ms * HEADROOM)
+        elif args.check:
+            allowed_ms = limits["startup_ms"] * args.tolerance
+            if args.tolerance and median_ms > allowed_ms:
+                failures.append(
+                    f"{target} starts in {median_ms:.0f} ms, budget {limits['startup_ms']} ms "
+                    f"x {args.tolerance:g}"
+                )
+            loaded = sorted(
+                module
+                for module in modules
+                for forbidden in limits.get("forbidden_modules", [])
+                if module == forbidden or module.startswith(f"{forbidden}.")
+            )
+            if loaded:
+                failures.append(f"{target} imports HTTP-only modules: {', '.join(loaded)}")
+
+    if args.record:
+        BUDGET_FILE.write_text(json.dumps(budget, indent=2) + "\n")
+    for failure in failures:
+        print(f"OVER BUDGET: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
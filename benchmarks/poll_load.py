@@ -0,0 +1,80 @@
+"""Concurrent polling load test: WSGI (sync views) vs ASGI (async views).
+
+Usage:
+    python benchmarks/poll_load.py --token <JWT> --campaign 1 \\
+        --wsgi http://localhost:8000/api --asgi http://localhost:8001/api \\
+        --concurrency 200 --requests 5000
+
+Each target is polled on its stats and detail endpoints by ``--concurrency``
+threads; throughput and latency percentiles are printed per deployment.
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(label, urls, token, concurrency, total):
+    session_headers = {"Authorization": f"Bearer {token}"}
+    latencies = []
+    errors = 0
+
+    def hit(i):
+        url = urls[i % len(urls)]
+        started = time.perf_counter()
+        try:
+            response = requests.get(url, headers=session_headers, timeout=30)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for elapsed, ok in pool.map(hit, range(total)):
+            latencies.append(elapsed)
+            errors += 0 if ok else 1
+    wall = time.perf_counter() - started
+
+    print(
+        f"{label:5} {total / wall:8.1f} req/s  "
+        f"p50 {statistics.median(latencies) * 1000:7.1f} ms  "
+        f"p95 {_percentile(latencies, 95) * 1000:7.1f} ms  "
+        f"p99 {_percentile(latencies, 99) * 1000:7.1f} ms  "
+        f"errors {errors}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--campaign", type=int, required=True)
+    parser.add_argument("--wsgi", default="http://localhost:8000/api")
+    parser.add_argument("--asgi", default="http://localhost:8001/api")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    pk = args.campaign
+    wsgi_urls = [f"{args.wsgi}/campaigns/{pk}/stats/", f"{args.wsgi}/campaigns/{pk}/"]
+    asgi_urls = [
+        f"{args.asgi}/async/campaigns/{pk}/stats/",
+        f"{args.asgi}/async/campaigns/{pk}/",
+    ]
+    run("wsgi", wsgi_urls, args.token, args.concurrency, args.requests)
+    run("asgi", asgi_urls, args.token, args.concurrency, args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Delivery-receipt ingestion: buffered bulk flushes vs. per-receipt saves.
+
+Usage:
+    python benchmarks/receipt_ingestion.py --messages 50000 --batch 2000
+
+Creates ``--messages`` sent messages, then applies one receipt per message
+twice: with a ``save()`` per receipt (the naive webhook) and through the
+receipt buffer, pushing in webhook-sized chunks and flushing ``--batch``
+receipts per ``UPDATE ... CASE``. Reports receipts per second for both and
+the flush latency percentiles. Set ``STATUS_BUFFER_URL`` to measure the Redis
+buffer instead of the in-process one.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import time as dt_time
+from datetime import timedelta
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "Work.settings")
+django.setup()
+
+from django.utils import timezone  # noqa: E402
+
+from api.buffers import BufferedWriter  # noqa: E402
+from api.models import (  # noqa: E402
+    CampaignRun,
+    CampaignRunStatus,
+    Client,
+    DeliveryStatus,
+    Message,
+    MessageStatus,
+    Newsletter,
+)
+from api.services import apply_delivery_receipts  # noqa: E402
+
+
+def create_messages(count):
+    tag = f"bench-{uuid.uuid4().hex[:8]}"
+    now = timezone.now()
+    campaign = Newsletter.objects.create(
+        start_datetime=now,
+        end_datetime=now + timedelta(days=1),
+        text_message="benchmark",
+        time_interval_start=dt_time(0, 0),
+        time_interval_end=dt_time(23, 59),
+        tag=tag,
+    )
+    run = CampaignRun.objects.create(campaign=campaign, status=CampaignRunStatus.RUNNING)
+    clients = Client.objects.bulk_create(
+        Client(phone_number=f"7{i:010d}", mobile_operator_code="900", tag=tag, timezone="UTC")
+        for i in range(count)
+    )
+    messages = Message.objects.bulk_create(
+        Message(
+            campaign=campaign,
+            client=client,
+            run=run,
+            message_text="benchmark",
+            status=MessageStatus.SENT,
+        )
+        for client in clients
+    )
+    if messages[0].pk is None:  # backends without RETURNING
+        return list(run.messages.values_list("id", flat=True))
+    return [message.pk for message in messages]
+
+
+def per_receipt(ids):
+    started = time.perf_counter()
+    for pk in ids:
+        message = Message.objects.get(pk=pk)
+        message.delivery_status = DeliveryStatus.DELIVERED
+        message.delivery_updated_at = timezone.now()
+        message.save(update_fields=["delivery_status", "delivery_updated_at"])
+    return len(ids) / (time.perf_counter() - started)
+
+
+def buffered(ids, batch, chunk):
+    latencies = []
+
+    def apply(items):
+        started = time.perf_counter()
+        apply_delivery_receipts(items)
+        latencies.append(time.perf_counter() - started)
+
+    writer = BufferedWriter(f"bench-{uuid.uuid4().hex[:8]}", apply, batch, interval=3600)
+    at = timezone.now().isoformat()
+    started = time.perf_counter()
+    for offset in range(0, len(ids), chunk):
+        writer.buffer.push(
+            [
+                {"id": pk, "status": DeliveryStatus.UNDELIVERED, "at": at}
+                for pk in ids[offset : offset + chunk]
+            ]
+        )
+        if len(writer.buffer) >= batch:
+            writer.flush()
+    writer.flush()
+    return len(ids) / (time.perf_counter() - started), latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=50_000)
+    parser.add_argument("--batch", type=int, default=2000, help="Receipts per flush.")
+    parser.add_argument("--chunk", type=int, default=100, help="Receipts per webhook call.")
+    parser.add_argument(
+        "--naive", type=int, default=5000, help="Receipts for the per-save baseline."
+    )
+    args = parser.parse_args()
+
+    ids = create_messages(args.messages)
+    print(f"per-receipt save  {per_receipt(ids[: args.naive]):10.0f} receipts/s")
+
+    rate, latencies = buffered(ids, args.batch, args.chunk)
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"buffered flush    {rate:10.0f} receipts/s")
+    print(
+        f"flush latency     p50 {statistics.median(ordered) * 1000:7.1f} ms  "
+        f"p99 {p99 * 1000:7.1f} ms  ({len(ordered)} flushes of <= {args.batch})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Bytes read from the database per send, with and without run snapshots.
+
+Usage:
+    python benchmarks/send_bytes.py --messages 500 --text-size 2000 --filter-size 200
+
+Creates a running run of ``--messages`` queued messages whose campaign carries a
+``--text-size`` character text and a ``client_filter`` with ``--filter-size``
+phone numbers. Sends every message with the provider stubbed out. Each SELECT
+the send tasks issue is re-executed, and the size of the rows it returns is added
+up, leaving out the ``EXISTS`` probes that every mode runs. Modes:
+  legacy    the row of the old ``select_related("campaign", "client", "run")`` fetch
+  cold      ``SEND_SNAPSHOT_CACHE_SIZE=0``: campaign and run reloaded on every send
+  snapshot  the default in-process snapshot cache
+"""
+
+import argparse
+import os
+import sys
+import uuid
+from datetime import time as dt_time
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "Work.settings")
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext, override_settings  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from api.models import (  # noqa: E402
+    CampaignRun,
+    CampaignRunStatus,
+    Client,
+    Message,
+    MessageStatus,
+    Newsletter,
+)
+from api.snapshots import run_snapshots  # noqa: E402
+from api.tasks import send_message_async  # noqa: E402
+
+
+def row_bytes(rows):
+    total = 0
+    for row in rows:
+        for value in row:
+            if isinstance(value, (str, bytes)):
+                total += len(value.encode() if isinstance(value, str) else value)
+            elif value is not None:
+                total += 8
+    return total
+
+
+def selected_bytes(queries):
+    total = 0
+    with connection.cursor() as cursor:
+        for query in queries:
+            # Row loads only; EXISTS probes and writes are the same in every mode.
+            if query["sql"].startswith("SELECT") and not query["sql"].startswith("SELECT 1 AS"):
+                cursor.execute(query["sql"])
+                total += row_bytes(cursor.fetchall())
+    return total
+
+
+def create_run(messages, text_size, filter_size):
+    tag = f"bench-{uuid.uuid4().hex[:8]}"
+    now = timezone.now()
+    campaign = Newsletter.objects.create(
+        start_datetime=now - timedelta(minutes=1),
+        end_datetime=now + timedelta(days=1),
+        text_message="x" * text_size,
+        client_filter={"phone_numbers": [f"7{i:010d}" for i in range(filter_size)]},
+        time_interval_start=dt_time(0, 0),
+        time_interval_end=dt_time(23, 59),
+        tag=tag,
+    )
+    run = CampaignRun.objects.create(campaign=campaign, status=CampaignRunStatus.RUNNING)
+    clients = Client.objects.bulk_create(
+        Client(phone_number=f"7{i:010d}", mobile_operator_code="900", tag=tag, timezone="UTC")
+        for i in range(messages)
+    )
+    Message.objects.bulk_create(
+        Message(campaign=campaign, client=client, run=run, message_text=campaign.text_message)
+        for client in clients
+    )
+    campaign.active_run = run
+    campaign.save()
+    return campaign, run
+
+
+def measure(run, mode):
+    run.messages.update(status=MessageStatus.QUEUED)
+    ids = list(run.messages.values_list("id", flat=True))
+    run_snapshots.clear()
+    if mode == "legacy":
+        legacy = Message.objects.select_related("campaign", "client", "run")
+        with CaptureQueriesContext(connection) as queries:
+            for message_id in ids:
+                legacy.get(pk=message_id)
+    else:
+        cache_size = 0 if mode == "cold" else None
+        settings = {} if cache_size is None else {"SEND_SNAPSHOT_CACHE_SIZE": cache_size}
+        with (
+            override_settings(**settings),
+            mock.patch("api.tasks.send_message_to_external_service"),
+            CaptureQueriesContext(connection) as queries,
+        ):
+            for message_id in ids:
+                send_message_async(message_id)
+    total = selected_bytes(queries.captured_queries)
+    print(f"{mode:9}  {total / len(ids):9.0f} bytes/send")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--text-size", type=int, default=2000)
+    parser.add_argument("--filter-size", type=int, default=200)
+    args = parser.parse_args()
+
+    campaign, run = create_run(args.messages, args.text_size, args.filter_size)
+    try:
+        for mode in ("legacy", "cold", "snapshot"):
+            measure(run, mode)
+    finally:
+        Client.objects.filter(tag=campaign.tag).delete()
+        campaign.delete()
+
+
+if __name__ == "__main__":
+    main()
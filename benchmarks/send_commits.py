@@ -0,0 +1,106 @@
+"""Message-table writes per send: synchronous status saves vs. write-behind.
+
+Usage:
+    python benchmarks/send_commits.py --messages 5000
+
+Runs ``send_message_async`` in-process for ``--messages`` queued messages twice,
+once with ``SEND_STATUS_WRITE_BEHIND`` off and once on, and counts the UPDATE
+statements hitting ``api_message``; each one is a separate commit in autocommit.
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import time as dt_time
+from datetime import timedelta
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "Work.settings")
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test import override_settings  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from api.models import (  # noqa: E402
+    CampaignRun,
+    CampaignRunStatus,
+    Client,
+    Message,
+    MessageStatus,
+    Newsletter,
+)
+from api.tasks import send_message_async, status_writer  # noqa: E402
+
+
+class StatementCounter:
+    def __init__(self):
+        self.message_updates = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        statement = sql.lstrip().upper()
+        if statement.startswith("UPDATE") and "API_MESSAGE" in statement:
+            self.message_updates += 1
+        return execute(sql, params, many, context)
+
+
+def create_run(count):
+    tag = f"bench-{uuid.uuid4().hex[:8]}"
+    now = timezone.now()
+    campaign = Newsletter.objects.create(
+        start_datetime=now,
+        end_datetime=now + timedelta(days=1),
+        text_message="benchmark",
+        time_interval_start=dt_time(0, 0),
+        time_interval_end=dt_time(23, 59),
+        tag=tag,
+    )
+    run = CampaignRun.objects.create(campaign=campaign, status=CampaignRunStatus.RUNNING)
+    clients = Client.objects.bulk_create(
+        Client(phone_number=f"7{i:010d}", mobile_operator_code="900", tag=tag, timezone="UTC")
+        for i in range(count)
+    )
+    Message.objects.bulk_create(
+        Message(
+            campaign=campaign,
+            client=client,
+            run=run,
+            message_text="benchmark",
+            status=MessageStatus.QUEUED,
+        )
+        for client in clients
+    )
+    return list(run.messages.values_list("id", flat=True))
+
+
+def measure(label, ids, write_behind):
+    counter = StatementCounter()
+    with override_settings(SEND_STATUS_WRITE_BEHIND=write_behind):
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            for message_id in ids:
+                send_message_async(message_id)
+            status_writer.flush()
+            elapsed = time.perf_counter() - started
+    print(
+        f"{label:13} {counter.message_updates:7d} message UPDATEs  "
+        f"{counter.message_updates / len(ids):6.3f} per send  {len(ids) / elapsed:8.0f} sends/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=5000)
+    args = parser.parse_args()
+
+    measure("synchronous", create_run(args.messages), write_behind=False)
+    measure("write-behind", create_run(args.messages), write_behind=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Send-queue latency while a large campaign is being materialized.
+
+Usage (with docker-compose workers running):
+    python benchmarks/send_latency.py --recipients 1000000 --probes 200
+
+Creates ``--recipients`` clients with a dedicated tag, starts a campaign for
+them and, before and during materialization, measures the round trip of probe
+``send_message_async`` calls (unknown message ids return immediately). With
+per-workload queues the "during" percentiles should match the idle baseline.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from datetime import time as dt_time
+from datetime import timedelta
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "Work.settings")
+django.setup()
+
+from django.utils import timezone  # noqa: E402
+
+from api.models import CampaignRun, CampaignRunStatus, Client, Newsletter  # noqa: E402
+from api.tasks import send_message_async, start_campaign_async  # noqa: E402
+
+
+def probe_latencies(count):
+    samples = []
+    for _ in range(count):
+        started = time.perf_counter()
+        send_message_async.apply_async(args=[-1]).get(timeout=120)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def report(label, samples):
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(
+        f"{label:7} p50 {statistics.median(ordered) * 1000:7.1f} ms  "
+        f"p99 {p99 * 1000:7.1f} ms  max {ordered[-1] * 1000:7.1f} ms"
+    )
+
+
+def create_audience(tag, count, batch=10000):
+    for offset in range(0, count, batch):
+        Client.objects.bulk_create(
+            Client(
+                phone_number=f"7{offset + i:010d}",
+                mobile_operator_code="900",
+                tag=tag,
+                timezone="UTC",
+            )
+            for i in range(min(batch, count - offset))
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipients", type=int, default=1_000_000)
+    parser.add_argument("--probes", type=int, default=200)
+    args = parser.parse_args()
+
+    tag = f"bench-{uuid.uuid4().hex[:8]}"
+    print(f"creating {args.recipients} clients tagged {tag}")
+    create_audience(tag, args.recipients)
+
+    report("idle", probe_latencies(args.probes))
+
+    now = timezone.now()
+    campaign = Newsletter.objects.create(
+        start_datetime=now,
+        end_datetime=now + timedelta(days=1),
+        text_message="benchmark",
+        time_interval_start=dt_time(0, 0),
+        time_interval_end=dt_time(23, 59),
+        tag=tag,
+        client_filter={},
+    )
+    run = CampaignRun.objects.create(campaign=campaign, status=CampaignRunStatus.RUNNING)
+    result = start_campaign_async.apply_async(args=[str(run.id)])
+
+    during = []
+    waiter = threading.Thread(target=result.get, kwargs={"timeout": 3600, "propagate": False})
+    waiter.start()
+    while waiter.is_alive():
+        during.extend(probe_latencies(10))
+    report("during", during)
+
+
+if __name__ == "__main__":
+    main()
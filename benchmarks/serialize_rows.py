@@ -0,0 +1,99 @@
+"""List serialization throughput: ModelSerializer + JSONRenderer vs. values rows + orjson.
+
+Usage:
+    python benchmarks/serialize_rows.py --rows 20000
+
+Serializes the first ``--rows`` messages, clients and campaigns (creating messages
+if there are fewer) both ways, checks that the rendered bytes are identical and
+reports rows per second including the query.
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import time as dt_time
+from datetime import timedelta
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "Work.settings")
+django.setup()
+
+from django.utils import timezone  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from api.models import CampaignRun, Client, Message, Newsletter  # noqa: E402
+from api.renderers import ORJSONRenderer  # noqa: E402
+from api.serializers import (  # noqa: E402
+    ClientSerializer,
+    MessageSerializer,
+    NewsletterSerializer,
+    ValuesSerializer,
+)
+
+
+def ensure_messages(count):
+    missing = count - Message.objects.count()
+    if missing <= 0:
+        return
+    tag = f"bench-{uuid.uuid4().hex[:8]}"
+    now = timezone.now()
+    campaign = Newsletter.objects.create(
+        start_datetime=now,
+        end_datetime=now + timedelta(days=1),
+        text_message="benchmark",
+        time_interval_start=dt_time(0, 0),
+        time_interval_end=dt_time(23, 59),
+        tag=tag,
+    )
+    run = CampaignRun.objects.create(campaign=campaign)
+    clients = Client.objects.bulk_create(
+        Client(phone_number=f"7{i:010d}", mobile_operator_code="900", tag=tag, timezone="UTC")
+        for i in range(missing)
+    )
+    Message.objects.bulk_create(
+        Message(campaign=campaign, client=client, run=run, message_text="benchmark")
+        for client in clients
+    )
+
+
+def measure(serializer_class, queryset, rows):
+    queryset = queryset.order_by("id")[:rows]
+
+    started = time.perf_counter()
+    slow = JSONRenderer().render(serializer_class(queryset.all(), many=True).data)
+    slow_elapsed = time.perf_counter() - started
+
+    fast_serializer = ValuesSerializer(serializer_class)
+    started = time.perf_counter()
+    fast = ORJSONRenderer().render(
+        fast_serializer.serialize(queryset.values_list(*fast_serializer.lookups))
+    )
+    fast_elapsed = time.perf_counter() - started
+
+    count = queryset.count()
+    print(
+        f"{serializer_class.__name__:22} {count:7d} rows  "
+        f"model {count / slow_elapsed:9.0f} rows/s  "
+        f"values {count / fast_elapsed:9.0f} rows/s  "
+        f"x{slow_elapsed / fast_elapsed:4.1f}  identical={slow == fast}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    args = parser.parse_args()
+
+    ensure_messages(args.rows)
+    measure(MessageSerializer, Message.objects.all(), args.rows)
+    measure(ClientSerializer, Client.objects.all(), args.rows)
+    measure(NewsletterSerializer, Newsletter.objects.all(), args.rows)
+
+
+if __name__ == "__main__":
+    main()
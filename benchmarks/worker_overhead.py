@@ -0,0 +1,63 @@
+"""Per-task setup overhead with and without worker warm-up.
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmarks/worker_overhead.py --tasks 500
+
+"cold" mimics the old behaviour: a fresh DB connection and uncached timezone
+lookups for every task. "warm" reuses the connection opened by
+``api.worker.process_init`` and the preloaded ``ZoneInfo`` cache.
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "Work.settings")
+django.setup()
+
+from django.db import connection  # noqa: E402
+
+from api import worker  # noqa: E402
+from api.models import Client  # noqa: E402
+from api.utils import _as_zoneinfo  # noqa: E402
+
+
+def fake_task(zones):
+    # The fixed part of send_message_async: one indexed read plus a timezone lookup.
+    Client.objects.filter(pk=0).exists()
+    for name in zones:
+        _as_zoneinfo(name)
+
+
+def measure(label, tasks, zones, cold):
+    started = time.perf_counter()
+    for _ in range(tasks):
+        if cold:
+            connection.close()
+            _as_zoneinfo.cache_clear()
+        fake_task(zones)
+    elapsed = time.perf_counter() - started
+    print(f"{label:5} {elapsed / tasks * 1000:8.3f} ms/task")
+    return elapsed / tasks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=200)
+    args = parser.parse_args()
+
+    zones = ["Europe/Moscow", "Asia/Vladivostok", "UTC"]
+    cold = measure("cold", args.tasks, zones, cold=True)
+    worker.process_init()
+    warm = measure("warm", args.tasks, zones, cold=False)
+    print(f"saved {(cold - warm) * 1000:.3f} ms per task")
+    worker.process_shutdown()
+
+
+if __name__ == "__main__":
+    main()
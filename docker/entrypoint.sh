@@ -1,7 +1,9 @@
 #!/bin/sh
 set -eu
 
-python manage.py migrate --noinput
+if [ "${SKIP_MIGRATE:-0}" != "1" ]; then
+  python manage.py migrate --noinput
+fi
 
 if [ "${SKIP_COLLECTSTATIC:-0}" != "1" ]; then
   python manage.py collectstatic --noinput